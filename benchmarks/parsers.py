@@ -0,0 +1,87 @@
+"""Бенчмарк разбора HTML снимков и линтинга страниц парсерами 'lxml' и 'html.parser'.
+
+Запуск: python -m benchmarks.parsers --pages 200 --sections 40
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Iterator
+
+from seo_scanner_service.scanner.facts import collect_page_facts
+from seo_scanner_service.scanner.linting import LINT_RULES
+from seo_scanner_service.scanner.parsers import HtmlParser, extract_markdown_text, parse_html
+
+PARSERS: tuple[HtmlParser, ...] = ("lxml", "html.parser")
+WORDS = ("телефон", "доставка", "каталог", "цена", "скидка", "гарантия", "отзыв", "модель")
+
+
+def generate_page(rng: random.Random, sections: int) -> str:
+    """Синтетический снимок страницы: шапка с меню, разделы с текстом, списками,
+    таблицами и изображениями, скрипты и подвал
+    """
+    def sentence() -> str:
+        return " ".join(rng.choices(WORDS, k=rng.randint(8, 20)))
+
+    parts = [
+        "<!DOCTYPE html><html lang='ru'><head><meta charset='utf-8'>",
+        f"<title>{sentence()}</title><meta name='description' content='{sentence()}'>",
+        "<script>window.state = {'items': [1, 2, 3]};</script></head><body>",
+        "<header><nav>",
+        *(f"<a href='/section-{i}'>{rng.choice(WORDS)}</a>" for i in range(20)),
+        "</nav></header><main><h1>",
+        sentence(),
+        "</h1>",
+    ]
+    for i in range(sections):
+        parts += [
+            f"<section><h2>{sentence()}</h2><p>{sentence()} <b>{sentence()}</b></p>",
+            "<ul>", *(f"<li>{sentence()}</li>" for _ in range(5)), "</ul>",
+            f"<img src='/images/{i}.png' alt='{rng.choice(WORDS)}'><img src='/images/{i}.webp'>",
+            f"<table><tr><th>{rng.choice(WORDS)}</th><td>{rng.randrange(10_000)}</td></tr></table>",
+            "</section>",
+        ]
+    parts.append(f"</main><footer><p>{sentence()}</p></footer></body></html>")
+    return "".join(parts)
+
+
+def generate_pages(count: int, sections: int, seed: int = 42) -> Iterator[str]:
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield generate_page(rng, sections)
+
+
+def measure(pages: list[str], parser: HtmlParser) -> tuple[float, float]:
+    """Время разбора документов и время сбора фактов, извлечения текста и линтинга"""
+    parse_time = lint_time = 0.0
+    for html in pages:
+        start_time = time.perf_counter()
+        soup = parse_html(html, parser)
+        parse_time += time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        facts = collect_page_facts(soup)
+        LINT_RULES.run(facts, extract_markdown_text(soup))
+        lint_time += time.perf_counter() - start_time
+    return parse_time, lint_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--sections", type=int, default=40)
+    args = parser.parse_args()
+
+    pages = list(generate_pages(args.pages, args.sections))
+    size_mb = sum(len(html.encode()) for html in pages) / 1024 / 1024
+    print(f"Pages: {args.pages}, HTML size: {size_mb:.1f} MB")
+    for html_parser in PARSERS:
+        parse_time, lint_time = measure(pages, html_parser)
+        total_time = parse_time + lint_time
+        print(
+            f"{html_parser}: parse {parse_time:.2f} s, facts, text and lint {lint_time:.2f} s, "
+            f"total {total_time:.2f} s ({args.pages / total_time:,.0f} pages/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
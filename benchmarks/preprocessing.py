@@ -0,0 +1,59 @@
+"""Бенчмарк предобработки текстов страниц сайта с кэшем лемм и без него.
+
+Запуск: python -m benchmarks.preprocessing --pages 2000 --words 800
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Iterator
+
+from seo_scanner_service.scanner.preprocessing import TextPreprocessor, get_stopwords
+
+SYLLABLES = ("ка", "ло", "ми", "ро", "ста", "не", "ву", "пре", "до", "зи", "тель", "ный")
+PUNCTUATION = (" ", " ", " ", ", ", ". ", " - ", " (", ") ")
+
+
+def generate_texts(pages: int, words: int, vocabulary: int, seed: int = 42) -> Iterator[str]:
+    """Синтетические тексты страниц: слова словаря по закону Ципфа со стоп-словами и числами"""
+    rng = random.Random(seed)
+    vocabulary_words = [
+        "".join(rng.choices(SYLLABLES, k=rng.randint(2, 5))) for _ in range(vocabulary)
+    ]
+    vocabulary_words += get_stopwords()
+    weights = [1 / rank for rank in range(1, len(vocabulary_words) + 1)]
+    for _ in range(pages):
+        page_words = rng.choices(vocabulary_words, weights=weights, k=words)
+        yield "".join(
+            f"{word}{rng.choice(PUNCTUATION)}" if i % 50 else f"{word} {rng.randrange(1000)} "
+            for i, word in enumerate(page_words)
+        )
+
+
+def measure(texts: list[str], lemma_cache_size: int) -> tuple[float, float]:
+    """Время предобработки всех текстов одним пакетом и скорость в токенах в секунду"""
+    preprocessor = TextPreprocessor(lemma_cache_size=lemma_cache_size)
+    start_time = time.perf_counter()
+    preprocessor.preprocess_batch(texts)
+    return time.perf_counter() - start_time, preprocessor.tokens_per_second
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=800)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--cache-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    texts = list(generate_texts(args.pages, args.words, args.vocabulary))
+    # Первый прогон загружает WordNet, чтобы его загрузка не попала в замер
+    TextPreprocessor().preprocess(texts[0])
+    print(f"Pages: {args.pages}, words per page: {args.words}, vocabulary: {args.vocabulary}")
+    for label, cache_size in (("without lemma cache", 0), ("with lemma cache", args.cache_size)):
+        elapsed_time, tokens_per_second = measure(texts, cache_size)
+        print(f"Preprocessing {label}: {elapsed_time:.2f} s ({tokens_per_second:,.0f} tokens/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Бенчмарк тематической кластеризации страниц сайта.
+
+Запуск: python -m benchmarks.topics --pages 10000 --topics 60
+"""
+
+import argparse
+import random
+import resource
+import time
+from collections.abc import Iterator
+
+from pydantic import HttpUrl
+
+from seo_scanner_service.scanner.nlp import preprocess_texts
+from seo_scanner_service.scanner.topics import find_topic_issues, vectorize_topics
+from seo_scanner_service.schemas import Page, PageContent, PageMeta
+
+SYLLABLES = ("ка", "ло", "ми", "ро", "ста", "не", "ву", "пре", "до", "зи", "тель", "ный")
+# Доля слов страницы из словаря её темы, остальные - общие слова сайта
+TOPIC_WORD_SHARE = 0.7
+
+
+def generate_words(rng: random.Random, count: int) -> list[str]:
+    return ["".join(rng.choices(SYLLABLES, k=rng.randint(2, 5))) for _ in range(count)]
+
+
+def generate_pages(
+        count: int, topics: int, words: int, duplicate_rate: float, seed: int = 42
+) -> Iterator[Page]:
+    """Синтетический сайт: страницы тем со своим словарём и общими словами сайта,
+    часть страниц - почти копии других страниц той же темы
+    """
+    rng = random.Random(seed)
+    common_words = generate_words(rng, 300)
+    topic_words = [generate_words(rng, 150) for _ in range(topics)]
+    topic_texts: list[list[str]] = [[] for _ in range(topics)]
+    for i in range(count):
+        topic = rng.randrange(topics)
+        if topic_texts[topic] and rng.random() < duplicate_rate:
+            # Почти копия страницы темы, конкурирующая с ней за запросы
+            page_words = rng.choice(topic_texts[topic]).split()
+            page_words[rng.randrange(len(page_words))] = rng.choice(topic_words[topic])
+        else:
+            # Длина страниц от тонких до подробных
+            page_words = [
+                rng.choice(topic_words[topic])
+                if rng.random() < TOPIC_WORD_SHARE else rng.choice(common_words)
+                for _ in range(max(20, int(rng.lognormvariate(0, 0.6) * words)))
+            ]
+        text = " ".join(page_words)
+        topic_texts[topic].append(text)
+        yield Page(
+            url=HttpUrl(f"https://shop.example/topic-{topic}/page-{i}"),
+            rendering_time=0.5,
+            seo_logs=[],
+            content=PageContent(meta=PageMeta(title=f"Страница {i}", description=""), text=text),
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=10_000)
+    parser.add_argument("--topics", type=int, default=60)
+    parser.add_argument("--words", type=int, default=400)
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    pages = list(generate_pages(args.pages, args.topics, args.words, args.duplicate_rate))
+    texts = [page.content.text for page in pages]
+    # Первый прогон загружает WordNet, чтобы его загрузка не попала в замер
+    preprocess_texts(texts[:1])
+
+    start_time = time.perf_counter()
+    processed_texts = preprocess_texts(texts)
+    preprocess_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    vectors = vectorize_topics(processed_texts)
+    vectorize_time = time.perf_counter() - start_time
+
+    # Полное правило повторяет предобработку с уже заполненным кэшем лемм
+    start_time = time.perf_counter()
+    findings = find_topic_issues(pages)
+    rule_time = time.perf_counter() - start_time
+
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    dimensions = vectors.shape[1] if vectors is not None else 0
+    print(f"Pages: {args.pages}, synthetic topics: {args.topics}, words per page: {args.words}")
+    print(f"Preprocessing: {preprocess_time:.2f} s ({args.pages / preprocess_time:,.0f} pages/s)")
+    print(f"TF-IDF and SVD ({dimensions} dimensions): {vectorize_time:.2f} s")
+    print(f"Topics rule with clustering: {rule_time:.2f} s, pages with findings: {len(findings)}")
+    print(f"Peak RSS: {max_rss_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Бенчмарк построения дерева сайта и отбора ключевых страниц по большому sitemap.
+
+Запуск: python -m benchmarks.tree --urls 1000000
+"""
+
+import argparse
+import random
+import resource
+import time
+from collections.abc import Iterator
+from datetime import UTC, datetime, timedelta
+
+from pydantic import HttpUrl
+
+from seo_scanner_service.scanner.sitemaps import SitemapEntry
+from seo_scanner_service.scanner.tree import PRIORITY_KEYWORDS, SiteTrie, extract_key_pages
+
+SECTIONS = (*PRIORITY_KEYWORDS, *(f"section-{i}" for i in range(35)))
+START_DATE = datetime(2020, 1, 1, tzinfo=UTC)
+
+
+def generate_entries(count: int, seed: int = 42) -> Iterator[SitemapEntry]:
+    """Синтетический sitemap: разделы, категории и страницы с приоритетами и датами"""
+    rng = random.Random(seed)
+    for i in range(count):
+        section = rng.choice(SECTIONS)
+        category = rng.randrange(500)
+        yield SitemapEntry(
+            url=f"https://shop.example/{section}/category-{category}/page-{i}",
+            priority=rng.choice((None, 0.3, 0.5, 0.8)),
+            last_modified=START_DATE + timedelta(minutes=rng.randrange(3_000_000)),
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--urls", type=int, default=1_000_000)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    entries = list(generate_entries(args.urls))
+    trie = SiteTrie(HttpUrl("https://shop.example/"), "shop.example")
+    start_time = time.perf_counter()
+    for entry in entries:
+        trie.add_page(entry)
+    trie_time = time.perf_counter() - start_time
+    del entries
+
+    start_time = time.perf_counter()
+    key_pages = extract_key_pages(trie, list(PRIORITY_KEYWORDS), args.top)
+    top_time = time.perf_counter() - start_time
+
+    # Преобразование нужно только для сохранения или отображения дерева
+    start_time = time.perf_counter()
+    trie.to_tree_node()
+    tree_time = time.perf_counter() - start_time
+
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"URLs: {args.urls}, tree nodes: {len(trie)}")
+    print(f"Trie build: {trie_time:.2f} s ({args.urls / trie_time:,.0f} URL/s)")
+    print(f"Top {len(key_pages)} key pages: {top_time:.2f} s")
+    print(f"TreeNode conversion (persistence only): {tree_time:.2f} s")
+    print(f"Peak RSS: {max_rss_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""add page content_hash and last_modified
+
+Revision ID: 8d3f2b6a1c47
+Revises:
+Create Date: 2026-10-16 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d3f2b6a1c47"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _get_page_columns() -> set[str] | None:
+    # Таблицы создаются create_all при запуске, поэтому в новой базе колонки уже есть
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("pages"):
+        return None
+    return {column["name"] for column in inspector.get_columns("pages")}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing_columns = _get_page_columns()
+    if existing_columns is None:
+        return
+    if "content_hash" not in existing_columns:
+        op.add_column("pages", sa.Column("content_hash", sa.String(), nullable=True))
+    if "last_modified" not in existing_columns:
+        op.add_column(
+            "pages", sa.Column("last_modified", sa.DateTime(timezone=True), nullable=True)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing_columns = _get_page_columns()
+    if existing_columns is None:
+        return
+    if "last_modified" in existing_columns:
+        op.drop_column("pages", "last_modified")
+    if "content_hash" in existing_columns:
+        op.drop_column("pages", "content_hash")
@@ -0,0 +1,40 @@
+"""make page rendering_time nullable
+
+Revision ID: 3c9e71f0b2d5
+Revises: 8d3f2b6a1c47
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9e71f0b2d5"
+down_revision: Union[str, Sequence[str], None] = "8d3f2b6a1c47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_pages_table() -> bool:
+    return sa.inspect(op.get_bind()).has_table("pages")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Страницы профиля с блокировкой ресурсов вне выборки сохраняются без времени рендеринга
+    if not _has_pages_table():
+        return
+    with op.batch_alter_table("pages") as batch_op:
+        batch_op.alter_column("rendering_time", existing_type=sa.Integer(), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not _has_pages_table():
+        return
+    op.execute("UPDATE pages SET rendering_time = 0 WHERE rendering_time IS NULL")
+    with op.batch_alter_table("pages") as batch_op:
+        batch_op.alter_column("rendering_time", existing_type=sa.Integer(), nullable=False)
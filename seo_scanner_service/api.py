@@ -7,7 +7,7 @@ from uuid import UUID
 from fastapi import FastAPI, HTTPException, Query, status
 from pydantic import HttpUrl, PositiveInt
 
-from .broker import faststream_app
+from .broker import broker
 from .database.base import create_tables
 from .database.quieries import read_all_websites_url, read_website, read_websites_by_url
 from .schemas import LogLevelDistribution, Website
@@ -16,10 +16,11 @@ from .schemas import LogLevelDistribution, Website
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncGenerator[None]:
     await create_tables()
-    await faststream_app.broker.start()
-    await faststream_app.broker.publish({"url": "https://corada.ru/"}, queue="start_scan")
+    # API только публикует события, сканирование выполняет воркер (worker.py)
+    await broker.connect()
+    await broker.publish({"url": "https://corada.ru/"}, queue="start_scan")
     yield
-    await faststream_app.broker.stop()
+    await broker.stop()
 
 
 app: Final[FastAPI] = FastAPI(lifespan=lifespan)
@@ -1,6 +1,7 @@
+from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import DateTime, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base, JsonDict, StrText
@@ -21,7 +22,9 @@ class PageModel(Base):
 
     website_id: Mapped[UUID] = mapped_column(ForeignKey("websites.id"), unique=False)
     url: Mapped[str]
-    rendering_time: Mapped[int]
+    rendering_time: Mapped[int | None]
+    content_hash: Mapped[str | None]
+    last_modified: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     seo_logs: Mapped[list["SEOLogModel"]] = relationship(back_populates="page")
     content: Mapped["PageContentModel"] = relationship(
         back_populates="page", uselist=False
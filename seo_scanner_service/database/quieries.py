@@ -23,6 +23,8 @@ async def persist_website(website: Website) -> None:
                         website_id=website.id,
                         url=str(page.url),
                         rendering_time=page.rendering_time,
+                        content_hash=page.content_hash,
+                        last_modified=page.last_modified,
                         seo_logs=[
                             SEOLogModel(page_id=page.id, **seo_log.model_dump())
                             for seo_log in page.seo_logs
@@ -95,3 +97,31 @@ async def read_websites_by_url(url: str) -> list[Website]:
         return [Website.model_validate(model) for model in models]
     except SQLAlchemyError as e:
         raise ReadingError(f"Error while reading by URL {url}, error: {e}") from e
+
+
+async def read_latest_website_by_url(url: str) -> Website | None:
+    try:
+        async with sessionmaker() as session:
+            latest_id = (
+                select(WebsiteModel.id)
+                .where(WebsiteModel.url == url)
+                .order_by(WebsiteModel.created_at.desc())
+                .limit(1)
+                .scalar_subquery()
+            )
+            stmt = (
+                select(WebsiteModel)
+                .options(
+                    joinedload(WebsiteModel.pages)
+                    .options(
+                        joinedload(PageModel.seo_logs),
+                        joinedload(PageModel.content)
+                    )
+                )
+                .where(WebsiteModel.id == latest_id)
+            )
+            result = await session.execute(stmt)
+            model = result.unique().scalar_one_or_none()
+            return Website.model_validate(model) if model else None
+    except SQLAlchemyError as e:
+        raise ReadingError(f"Error while reading latest website by URL {url}, error: {e}") from e
@@ -8,3 +8,11 @@ class WritingError(AppError):
 
 class ReadingError(AppError):
     pass
+
+
+class EmbeddingError(AppError):
+    pass
+
+
+class AnalysisError(AppError):
+    pass
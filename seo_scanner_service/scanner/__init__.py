@@ -1,3 +1,11 @@
-__all__ = ("scan_website_seo_optimization",)
+__all__ = (
+    "AnalysisExecutor",
+    "BrowserPool",
+    "create_analysis_cache",
+    "scan_website_seo_optimization",
+)
 
+from .analysis import AnalysisExecutor
+from .cache import create_analysis_cache
 from .main import scan_website_seo_optimization
+from .pool import BrowserPool
@@ -0,0 +1,246 @@
+"""Анализ HTML снимка страницы: линтинг, извлечение мета-данных и текста"""
+
+from typing import Any, Self
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+from collections.abc import Callable, Collection
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pydantic import BaseModel, Field
+
+from ..exceptions import AnalysisError
+from ..schemas import PageContent, SEOLog
+from ..settings import settings
+from .cache import AnalysisCache, hash_normalized_text
+from .facts import PageFacts, PageSnapshot, collect_page_facts
+from .fetching import extract_document_text
+from .linting import LINT_RULES
+from .parsers import convert_fragments_to_markdown, extract_markdown_text, parse_html
+
+logger = logging.getLogger(__name__)
+
+# Количество попыток анализа страницы при падении процесса пула
+ANALYSIS_ATTEMPTS = 2
+
+
+class PageAnalysis(BaseModel):
+    """Результат анализа HTML снимка страницы.
+
+    Attributes:
+        seo_logs: Найденные SEO замечания.
+        content: Текстовый контент страницы.
+        rule_timings: Время выполнения правил линтинга в секундах по их идентификаторам.
+    """
+    seo_logs: list[SEOLog]
+    content: PageContent
+    rule_timings: dict[str, float] = Field(default_factory=dict)
+
+
+def analyze_html(html: str, rule_ids: Collection[str] | None = None) -> PageAnalysis:
+    """Разбирает HTML снимок страницы один раз, собирает факты для правил линтинга
+    за один обход документа и затем извлекает из того же документа текст.
+
+    :param html: Сериализованный DOM страницы.
+    :param rule_ids: Выполняемые правила линтинга, None - все правила.
+    :return Результат анализа страницы.
+    """
+    soup = parse_html(html)
+    facts = collect_page_facts(soup)
+    # Извлечение текста удаляет элементы из документа, поэтому выполняется после сбора фактов
+    return _analyze_facts(facts, extract_markdown_text(soup), rule_ids)
+
+
+def analyze_snapshot(
+        snapshot: PageSnapshot, rule_ids: Collection[str] | None = None
+) -> PageAnalysis:
+    """Анализирует собранный в браузере снимок страницы без разбора HTML документа.
+
+    :param snapshot: Факты о странице и HTML фрагменты текстовых элементов.
+    :param rule_ids: Выполняемые правила линтинга, None - все правила.
+    :return Результат анализа страницы.
+    """
+    text = convert_fragments_to_markdown(snapshot.fragments) if snapshot.facts.has_body else ""
+    return _analyze_facts(snapshot.facts, text, rule_ids)
+
+
+def _analyze_facts(
+        facts: PageFacts, text: str, rule_ids: Collection[str] | None
+) -> PageAnalysis:
+    seo_logs, rule_timings = LINT_RULES.run(facts, text, rule_ids)
+    return PageAnalysis(
+        seo_logs=seo_logs,
+        content=PageContent(meta=facts.to_meta(), text=text),
+        rule_timings=rule_timings,
+    )
+
+
+def _analyze_html_to_json(html: str, rule_ids: frozenset[str] | None) -> str:
+    """Анализирует HTML снимок в процессе пула и сериализует результат в JSON"""
+    return analyze_html(html, rule_ids).model_dump_json()
+
+
+def _analyze_snapshot_to_json(data: str, rule_ids: frozenset[str] | None) -> str:
+    """Анализирует снимок страницы из JSON в процессе пула и сериализует результат в JSON"""
+    return analyze_snapshot(PageSnapshot.model_validate_json(data), rule_ids).model_dump_json()
+
+
+class AnalysisExecutor:
+    """Стадия анализа HTML снимков страниц в пуле процессов.
+
+    Разбор HTML, линтинг, извлечение текста и проверки сайта (оценка релевантности,
+    поиск дубликатов и кластеризация тем) выполняются на других ядрах,
+    пока event loop продолжает управлять браузером. Для анализа страницы в процесс передаётся
+    только HTML строка, результат возвращается в виде JSON. Если пул не запущен, то анализ
+    страниц выполняется в event loop, а проверки сайта - в отдельном потоке.
+    При наличии кэша страницы с уже проанализированным контентом повторно не анализируются.
+    """
+
+    def __init__(
+            self,
+            workers: int = settings.scanner.analysis_workers,
+            cache: AnalysisCache | None = None,
+    ) -> None:
+        self.workers = workers
+        self.cache = cache
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._executor is not None
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        # spawn, так как fork процесса с запущенными потоками Playwright небезопасен
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    async def start(self) -> None:
+        """Запускает пул процессов, если задан хотя бы один процесс"""
+        if self.workers <= 0 or self._executor is not None:
+            return
+        self._executor = self._create_executor()
+        logger.info("Analysis executor started with %s workers", self.workers)
+
+    async def stop(self) -> None:
+        """Останавливает пул процессов, отменяя ожидающие задачи"""
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+        logger.info("Analysis executor stopped")
+
+    async def __aenter__(self) -> Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        await self.stop()
+
+    async def _restart_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Заменяет упавший пул процессов новым, если его ещё не заменила другая задача"""
+        if self._executor is not executor:
+            return
+        logger.warning("Analysis executor is broken, restarting it")
+        self._executor = self._create_executor()
+        # Завершение процессов упавшего пула не блокирует event loop
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def run[R](self, func: Callable[..., R], /, *args: Any, **kwargs: Any) -> R:
+        """Выполняет функцию в пуле процессов, если пул не запущен - в отдельном потоке.
+        При падении пула функция один раз повторяется в пересозданном пуле.
+
+        :param func: Функция уровня модуля, её аргументы и результат сериализуются pickle.
+        :return Результат функции.
+        :raises AnalysisError: Пул процессов упал при повторном выполнении.
+        """
+        task = functools.partial(func, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        for attempt in range(ANALYSIS_ATTEMPTS):
+            executor = self._executor
+            if executor is None:
+                return await asyncio.to_thread(task)
+            try:
+                return await loop.run_in_executor(executor, task)
+            except BrokenProcessPool:
+                # Процесс пула упал (например, по памяти), пул пересоздаётся
+                logger.warning("Analysis process died on attempt %s", attempt + 1)
+                await self._restart_executor(executor)
+        raise AnalysisError(f"Analysis process died {ANALYSIS_ATTEMPTS} times in a row")
+
+    async def _execute(
+            self,
+            worker: Callable[[str, frozenset[str] | None], str],
+            payload: str,
+            rule_ids: frozenset[str] | None,
+    ) -> str:
+        """Выполняет анализ в пуле процессов, если пул не запущен - в текущем процессе"""
+        if self._executor is None:
+            return worker(payload, rule_ids)
+        return await self.run(worker, payload, rule_ids)
+
+    async def _submit(
+            self,
+            worker: Callable[[str, frozenset[str] | None], str],
+            payload: str,
+            rule_ids: frozenset[str] | None,
+    ) -> PageAnalysis:
+        """Возвращает результат анализа из кэша или выполняет анализ"""
+        if self.cache is None:
+            return PageAnalysis.model_validate_json(
+                await self._execute(worker, payload, rule_ids)
+            )
+        key = AnalysisCache.make_key(
+            payload,
+            worker.__name__,
+            settings.scanner.html_parser,
+            ",".join(sorted(rule_ids)) if rule_ids is not None else "*",
+        )
+        data = await self.cache.get(key)
+        if data is not None:
+            # Правила не выполнялись, поэтому время их выполнения не учитывается
+            return PageAnalysis.model_validate_json(data).model_copy(update={"rule_timings": {}})
+        data = await self._execute(worker, payload, rule_ids)
+        await self.cache.put(key, data)
+        return PageAnalysis.model_validate_json(data)
+
+    async def analyze(
+            self, html: str, rule_ids: frozenset[str] | None = None
+    ) -> PageAnalysis:
+        """Анализирует HTML снимок страницы в пуле процессов.
+
+        :param html: Сериализованный DOM страницы.
+        :param rule_ids: Выполняемые правила линтинга, None - все правила.
+        :return Результат анализа страницы.
+        """
+        if self._executor is None and self.cache is None:
+            return analyze_html(html, rule_ids)
+        return await self._submit(_analyze_html_to_json, html, rule_ids)
+
+    async def analyze_snapshot(
+            self, snapshot: PageSnapshot, rule_ids: frozenset[str] | None = None
+    ) -> PageAnalysis:
+        """Анализирует собранный в браузере снимок страницы в пуле процессов.
+
+        :param snapshot: Факты о странице и HTML фрагменты текстовых элементов.
+        :param rule_ids: Выполняемые правила линтинга, None - все правила.
+        :return Результат анализа страницы.
+        """
+        if self._executor is None and self.cache is None:
+            return analyze_snapshot(snapshot, rule_ids)
+        return await self._submit(
+            _analyze_snapshot_to_json, snapshot.model_dump_json(), rule_ids
+        )
+
+
+def compute_content_hash(html: str) -> str:
+    """Хеш title, meta-описания и видимого текста HTML документа
+    без учёта разметки и различий в пробельных символах.
+
+    :param html: HTML документ страницы.
+    :return Хеш документа в шестнадцатеричном виде.
+    """
+    return hash_normalized_text(extract_document_text(html))
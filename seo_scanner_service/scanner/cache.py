@@ -0,0 +1,233 @@
+"""Двухуровневый кэш по хешу контента: результаты анализа страниц и векторы текстов"""
+
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from pathlib import Path
+
+from ..settings import settings
+
+logger = logging.getLogger(__name__)
+
+BYTES_IN_MEGABYTE = 1024 * 1024
+ANALYSIS_FILE_SUFFIX = ".json.gz"
+
+
+def hash_normalized_text(text: str) -> str:
+    """Хеш текста без учёта различий в пробельных символах"""
+    normalized_text = " ".join(text.split())
+    return hashlib.blake2b(normalized_text.encode(), digest_size=16).hexdigest()
+
+
+class _MemoryTier:
+    """LRU кэш в памяти процесса с ограничением суммарного размера значений"""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._values: OrderedDict[str, bytes] = OrderedDict()
+
+    def get(self, key: str) -> bytes | None:
+        value = self._values.get(key)
+        if value is not None:
+            self._values.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        previous = self._values.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._values[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self._values.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class _DiskTier:
+    """Кэш на локальном диске (файл на запись) с вытеснением давно не использованных записей
+    при превышении суммарного размера файлов.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, suffix: str) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.size = 0
+        self._lock = threading.Lock()
+        # Размеры файлов в порядке последнего использования, строится при первом обращении
+        self._files: OrderedDict[str, int] | None = None
+
+    def _get_path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def _load_index(self) -> OrderedDict[str, int]:
+        if self._files is not None:
+            return self._files
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entries = sorted(
+            (
+                entry for entry in os.scandir(self.directory)
+                if entry.name.endswith(self.suffix)
+            ),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        self._files = OrderedDict(
+            (entry.name.removesuffix(self.suffix), entry.stat().st_size)
+            for entry in entries
+        )
+        self.size = sum(self._files.values())
+        return self._files
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            files = self._load_index()
+            if key not in files:
+                return None
+            path = self._get_path(key)
+            try:
+                value = path.read_bytes()
+                os.utime(path)
+            except OSError:
+                self.size -= files.pop(key)
+                return None
+            files.move_to_end(key)
+            return value
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, bytes]:
+        values = ((key, self.get(key)) for key in keys)
+        return {key: value for key, value in values if value is not None}
+
+    def put(self, key: str, value: bytes) -> None:
+        with self._lock:
+            files = self._load_index()
+            path = self._get_path(key)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(value)
+            tmp_path.replace(path)
+            self.size -= files.pop(key, 0)
+            files[key] = path.stat().st_size
+            self.size += files[key]
+            while self.size > self.max_bytes and files:
+                evicted_key, evicted_size = files.popitem(last=False)
+                self._get_path(evicted_key).unlink(missing_ok=True)
+                self.size -= evicted_size
+
+    def put_many(self, items: dict[str, bytes]) -> None:
+        for key, value in items.items():
+            self.put(key, value)
+
+
+class TieredCache:
+    """Двухуровневый кэш байтовых значений: LRU в памяти процесса
+    и опциональный ограниченный по размеру кэш на диске.
+    """
+
+    def __init__(
+            self, memory_limit_mb: int, directory: Path | None, disk_limit_mb: int, suffix: str
+    ) -> None:
+        self._memory = _MemoryTier(memory_limit_mb * BYTES_IN_MEGABYTE)
+        self._disk = (
+            _DiskTier(directory, disk_limit_mb * BYTES_IN_MEGABYTE, suffix)
+            if directory is not None else None
+        )
+
+    async def get(self, key: str) -> bytes | None:
+        """Получает значение из памяти, затем с диска"""
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, bytes]:
+        """Получает найденные значения из памяти, затем за одно обращение с диска"""
+        values: dict[str, bytes] = {}
+        missing: list[str] = []
+        for key in keys:
+            value = self._memory.get(key)
+            if value is not None:
+                values[key] = value
+            else:
+                missing.append(key)
+        if not missing or self._disk is None:
+            return values
+        try:
+            loaded = await asyncio.to_thread(self._disk.get_many, missing)
+        except OSError as e:
+            logger.warning("Error while reading cache, error: %s", e)
+            return values
+        for key, value in loaded.items():
+            self._memory.put(key, value)
+        return values | loaded
+
+    async def put(self, key: str, value: bytes) -> None:
+        """Сохраняет значение в память и на диск"""
+        await self.put_many({key: value})
+
+    async def put_many(self, items: dict[str, bytes]) -> None:
+        """Сохраняет значения в память и за одно обращение на диск"""
+        for key, value in items.items():
+            self._memory.put(key, value)
+        if self._disk is None or not items:
+            return
+        try:
+            await asyncio.to_thread(self._disk.put_many, items)
+        except OSError as e:
+            logger.warning("Error while writing cache, error: %s", e)
+
+
+class AnalysisCache:
+    """Кэш сериализованных результатов анализа, хранятся сжатыми gzip"""
+
+    def __init__(
+            self,
+            memory_limit_mb: int = settings.scanner.analysis_cache_memory_mb,
+            directory: Path | None = settings.scanner.analysis_cache_dir,
+            disk_limit_mb: int = settings.scanner.analysis_cache_disk_mb,
+    ) -> None:
+        self._cache = TieredCache(memory_limit_mb, directory, disk_limit_mb, ANALYSIS_FILE_SUFFIX)
+
+    @staticmethod
+    def make_key(payload: str, *parts: str) -> str:
+        """Ключ кэша по хешу байтов контента и параметрам анализа.
+        Пробельные символы не нормализуются, так как они влияют на текст страницы
+        (например, внутри <pre>) и на проверки длины title и meta-описания.
+
+        :param payload: HTML снимок или сериализованный снимок страницы.
+        :param parts: Параметры влияющие на результат, например: выполняемые правила.
+        :return Ключ кэша.
+        """
+        hasher = hashlib.blake2b(payload.encode(), digest_size=16)
+        for part in parts:
+            hasher.update(b"\x00")
+            hasher.update(part.encode())
+        return hasher.hexdigest()
+
+    async def get(self, key: str) -> str | None:
+        """Получает результат анализа из памяти, затем с диска"""
+        value = await self._cache.get(key)
+        if value is None:
+            return None
+        try:
+            return gzip.decompress(value).decode()
+        except (OSError, EOFError) as e:
+            logger.warning("Corrupted analysis cache entry, error: %s", e)
+            return None
+
+    async def put(self, key: str, value: str) -> None:
+        """Сохраняет результат анализа в память и на диск"""
+        await self._cache.put(key, gzip.compress(value.encode(), compresslevel=5))
+
+
+def create_analysis_cache() -> AnalysisCache | None:
+    """Кэш результатов анализа согласно настройкам сканера"""
+    if (
+            settings.scanner.analysis_cache_memory_mb <= 0
+            and settings.scanner.analysis_cache_dir is None
+    ):
+        return None
+    return AnalysisCache()
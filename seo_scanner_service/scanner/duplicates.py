@@ -0,0 +1,206 @@
+"""Поиск дубликатов title, meta-описаний и контента между страницами сайта"""
+
+from typing import Final
+
+import hashlib
+import itertools
+import re
+from collections import defaultdict
+from collections.abc import Callable, Collection, Iterable
+
+import numpy as np
+
+from ..schemas import LogLevel, Page, SEOLog
+from ..settings import settings
+from .rules import replace_site_findings
+
+# Категория замечаний о дубликатах, по ней замечания предыдущего сканирования заменяются новыми
+DUPLICATES_CATEGORY: Final[str] = "duplicates"
+SIMHASH_BITS: Final[int] = 64
+# Количество слов в шингле и минимальное количество слов для сравнения контента страниц
+SHINGLE_SIZE, MIN_CONTENT_WORDS = 3, 50
+# Максимальное количество URL адресов дубликатов перечисляемых в сообщении
+MAX_LISTED_URLS = 5
+
+WORD_PATTERN: Final[re.Pattern[str]] = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """Приводит текст к нижнему регистру и схлопывает пробельные символы"""
+    return " ".join(text.lower().split())
+
+
+def compute_simhash(text: str) -> int | None:
+    """Вычисляет 64-битный SimHash текста по шинглам из слов.
+
+    :param text: Текстовый контент страницы.
+    :return SimHash текста или None, если текст слишком короткий для сравнения.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < MIN_CONTENT_WORDS:
+        return None
+    shingles = {
+        " ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+    hashes = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+            for shingle in shingles
+        ),
+        dtype="<u8",
+        count=len(shingles),
+    )
+    # Биты хешей шинглов (младший бит первым), бит SimHash - голосование большинства
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(majority, bitorder="little").tobytes(), "little")
+
+
+def group_exact_duplicates(keys: Iterable[str | None]) -> list[list[int]]:
+    """Группирует индексы одинаковых значений через хеш индекс, пустые значения пропускаются.
+
+    :param keys: Нормализованные значения, например: title страниц.
+    :return Группы индексов из двух и более одинаковых значений.
+    """
+    index: defaultdict[str, list[int]] = defaultdict(list)
+    for i, key in enumerate(keys):
+        if key:
+            index[key].append(i)
+    return [group for group in index.values() if len(group) > 1]
+
+
+def find_near_duplicates(
+        fingerprints: list[int | None], max_distance: int
+) -> set[tuple[int, int]]:
+    """Находит пары почти совпадающих SimHash с помощью LSH по полосам бит.
+
+    SimHash делится на max_distance + 1 полос, поэтому у пары с расстоянием Хэмминга
+    не более max_distance хотя бы одна полоса совпадает. Сравниваются только пары
+    из общих корзин, что даёт почти линейное время вместо перебора всех пар.
+
+    :param fingerprints: SimHash текстов страниц, None - страница не сравнивается.
+    :param max_distance: Максимальное расстояние Хэмминга между почти дубликатами.
+    :return Пары индексов почти дубликатов (меньший индекс первым).
+    """
+    band_count = min(max_distance + 1, SIMHASH_BITS)
+    band_width = SIMHASH_BITS // band_count
+    indexed = {
+        i: fingerprint for i, fingerprint in enumerate(fingerprints) if fingerprint is not None
+    }
+    buckets: defaultdict[tuple[int, int], list[int]] = defaultdict(list)
+    for i, fingerprint in indexed.items():
+        for band in range(band_count):
+            # Последняя полоса забирает оставшиеся биты
+            width = band_width if band < band_count - 1 else SIMHASH_BITS - band * band_width
+            value = (fingerprint >> (band * band_width)) & ((1 << width) - 1)
+            buckets[band, value].append(i)
+    pairs: set[tuple[int, int]] = set()
+    for bucket in buckets.values():
+        for i, j in itertools.combinations(bucket, 2):
+            if (i, j) not in pairs and (indexed[i] ^ indexed[j]).bit_count() <= max_distance:
+                pairs.add((i, j))
+    return pairs
+
+
+def format_page_urls(pages: list[Page], indexes: Iterable[int]) -> str:
+    """Перечисляет URL адреса страниц для сообщения, не более MAX_LISTED_URLS"""
+    urls = [str(pages[i].url) for i in sorted(indexes)]
+    listed = ", ".join(urls[:MAX_LISTED_URLS])
+    if len(urls) > MAX_LISTED_URLS:
+        listed += f" и ещё {len(urls) - MAX_LISTED_URLS}"
+    return listed
+
+
+def _add_group_findings(
+        findings: defaultdict[int, list[SEOLog]],
+        pages: list[Page],
+        groups: list[list[int]],
+        make_log: Callable[[str], SEOLog],
+) -> None:
+    for group in groups:
+        for i in group:
+            findings[i].append(make_log(format_page_urls(pages, (j for j in group if j != i))))
+
+
+def find_duplicates(
+        pages: list[Page], max_distance: int = settings.scanner.near_duplicate_max_distance
+) -> dict[int, list[SEOLog]]:
+    """Находит на сайте дубликаты title, meta-описаний и контента страниц.
+
+    :param pages: Отсканированные страницы сайта.
+    :param max_distance: Максимальное расстояние Хэмминга между SimHash почти дубликатов.
+    :return Замечания о дубликатах по индексам страниц.
+    """
+    findings: defaultdict[int, list[SEOLog]] = defaultdict(list)
+    _add_group_findings(
+        findings,
+        pages,
+        group_exact_duplicates(normalize_text(page.content.meta.title) for page in pages),
+        lambda urls: SEOLog(
+            level=LogLevel.ERROR,
+            message=f"Title совпадает с title страниц: {urls}",
+            category=DUPLICATES_CATEGORY,
+            element="title",
+        ),
+    )
+    _add_group_findings(
+        findings,
+        pages,
+        group_exact_duplicates(normalize_text(page.content.meta.description) for page in pages),
+        lambda urls: SEOLog(
+            level=LogLevel.WARNING,
+            message=f"Meta-описание совпадает с meta-описанием страниц: {urls}",
+            category=DUPLICATES_CATEGORY,
+            element="meta",
+        ),
+    )
+    text_keys = [
+        hashlib.blake2b(normalize_text(page.content.text).encode(), digest_size=16).hexdigest()
+        if page.content.text.strip() else None
+        for page in pages
+    ]
+    _add_group_findings(
+        findings,
+        pages,
+        group_exact_duplicates(text_keys),
+        lambda urls: SEOLog(
+            level=LogLevel.ERROR,
+            message=f"Контент страницы полностью совпадает с контентом страниц: {urls}",
+            category=DUPLICATES_CATEGORY,
+            element="body",
+        ),
+    )
+    near_duplicates: defaultdict[int, set[int]] = defaultdict(set)
+    fingerprints = [compute_simhash(page.content.text) for page in pages]
+    for i, j in find_near_duplicates(fingerprints, max_distance):
+        # Полные дубликаты уже отмечены
+        if text_keys[i] == text_keys[j]:
+            continue
+        near_duplicates[i].add(j)
+        near_duplicates[j].add(i)
+    for i, others in near_duplicates.items():
+        findings[i].append(SEOLog(
+            level=LogLevel.WARNING,
+            message=f"Контент страницы почти совпадает с контентом страниц: "
+                    f"{format_page_urls(pages, others)}",
+            category=DUPLICATES_CATEGORY,
+            element="body",
+        ))
+    return dict(findings)
+
+
+def lint_duplicates(
+        pages: list[Page],
+        indexes: Collection[int],
+        max_distance: int = settings.scanner.near_duplicate_max_distance,
+) -> None:
+    """Добавляет в SEO логи страниц замечания о дубликатах на сайте,
+    заменяя замечания о дубликатах, скопированные из предыдущего сканирования.
+
+    :param pages: Отсканированные страницы сайта, дубликаты ищутся среди всех них.
+    :param indexes: Индексы страниц, которым добавляются замечания.
+    :param max_distance: Максимальное расстояние Хэмминга между SimHash почти дубликатов.
+    """
+    replace_site_findings(
+        pages, indexes, DUPLICATES_CATEGORY, find_duplicates(pages, max_distance)
+    )
@@ -0,0 +1,165 @@
+"""Асинхронный клиент сервиса векторов текстов с объединением запросов и кэшем"""
+
+import asyncio
+import hashlib
+import itertools
+import logging
+from collections.abc import Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ..exceptions import EmbeddingError
+from ..settings import settings
+from .cache import TieredCache
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_FILE_SUFFIX = ".f16"
+
+
+def _encode_vector(vector: np.ndarray) -> bytes:
+    """Вектор хранится в кэше в float16, что вдвое сокращает объём кэша"""
+    return np.asarray(vector, dtype="<f2").tobytes()
+
+
+def _decode_vector(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<f2").astype(np.float32)
+
+
+def create_embeddings_cache() -> TieredCache | None:
+    """Кэш векторов текстов согласно настройкам"""
+    if settings.embeddings.cache_memory_mb <= 0 and settings.embeddings.cache_dir is None:
+        return None
+    return TieredCache(
+        settings.embeddings.cache_memory_mb,
+        settings.embeddings.cache_dir,
+        settings.embeddings.cache_disk_mb,
+        EMBEDDING_FILE_SUFFIX,
+    )
+
+
+class EmbeddingsClient:
+    """Асинхронный клиент сервиса векторов текстов.
+
+    Тексты, запрошенные одновременно (например, чанки разных страниц сайта), объединяются
+    в пакеты до batch_size текстов и отправляются одним запросом. Векторы кэшируются
+    по хешу текста, поэтому одинаковые чанки не отправляются в сервис повторно.
+    """
+
+    def __init__(
+            self,
+            embeddings: Embeddings,
+            cache: TieredCache | None = None,
+            batch_size: int = settings.embeddings.batch_size,
+            batch_delay: float = settings.embeddings.batch_delay,
+            namespace: str = settings.embeddings.base_url,
+    ) -> None:
+        self.embeddings = embeddings
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+        self.batch_delay = batch_delay
+        # Векторы разных моделей (сервисов) не должны пересекаться в кэше
+        self.namespace = namespace
+        # Ожидающие ответа сервиса тексты, в том числе уже отправленные
+        self._futures: dict[str, asyncio.Future[np.ndarray]] = {}
+        # Тексты ещё не отправленные в сервис
+        self._queue: dict[str, str] = {}
+        self._flush_task: asyncio.Task[None] | None = None
+
+    def make_key(self, text: str) -> str:
+        """Ключ кэша вектора текста"""
+        return hashlib.blake2b(
+            f"{self.namespace}\x00{text}".encode(), digest_size=16
+        ).hexdigest()
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Возвращает векторы текстов.
+
+        :param texts: Тексты, например: чанки контента страниц.
+        :return Матрица векторов в порядке текстов.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        keys = [self.make_key(text) for text in texts]
+        unique_texts = dict(zip(keys, texts, strict=True))
+        vectors: dict[str, np.ndarray] = {}
+        if self.cache is not None:
+            cached = await self.cache.get_many(unique_texts)
+            vectors = {key: _decode_vector(value) for key, value in cached.items()}
+        missing = {key: text for key, text in unique_texts.items() if key not in vectors}
+        if missing:
+            # shield, чтобы отмена одного вызова не отменяла запрос для других страниц
+            results = await asyncio.gather(*(
+                asyncio.shield(self._enqueue(key, text)) for key, text in missing.items()
+            ))
+            vectors.update(zip(missing, results, strict=True))
+        return np.stack([vectors[key] for key in keys])
+
+    def _enqueue(self, key: str, text: str) -> asyncio.Future[np.ndarray]:
+        future = self._futures.get(key)
+        if future is not None:
+            return future
+        future = asyncio.get_running_loop().create_future()
+        self._futures[key] = future
+        self._queue[key] = text
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush())
+        return future
+
+    async def _flush(self) -> None:
+        """Отправляет накопленные тексты пакетами, пока очередь не опустеет"""
+        try:
+            if len(self._queue) < self.batch_size:
+                await asyncio.sleep(self.batch_delay)
+            while self._queue:
+                batch = dict(itertools.islice(self._queue.items(), self.batch_size))
+                for key in batch:
+                    del self._queue[key]
+                await self._send(batch)
+        finally:
+            self._flush_task = None
+            # При отмене не отправленные тексты не должны ждать ответа сервиса вечно
+            queued = {key: self._futures[key] for key in self._queue}
+            self._queue.clear()
+            self._fail(queued, EmbeddingError("Embedding request was cancelled"))
+
+    def _fail(self, futures: dict[str, asyncio.Future[np.ndarray]], error: Exception) -> None:
+        """Завершает ошибкой вызовы, ещё не получившие вектор, и удаляет их из ожидающих"""
+        for key, future in futures.items():
+            # Текст мог быть запрошен повторно, тогда новый вызов ожидает другой пакет
+            if self._futures.get(key) is future:
+                del self._futures[key]
+            if not future.done():
+                future.set_exception(error)
+
+    async def _request(self, texts: list[str]) -> np.ndarray:
+        """Запрашивает векторы текстов у сервиса и проверяет их количество"""
+        vectors = np.asarray(await self.embeddings.aembed_documents(texts), dtype=np.float32)
+        if len(vectors) != len(texts):
+            raise EmbeddingError(
+                f"Embeddings service returned {len(vectors)} vectors for {len(texts)} texts"
+            )
+        return vectors
+
+    async def _send(self, batch: dict[str, str]) -> None:
+        futures = {key: self._futures[key] for key in batch}
+        try:
+            # Векторы передаются вызовам только после проверки их количества
+            vectors = await self._request(list(batch.values()))
+            for future, vector in zip(futures.values(), vectors, strict=True):
+                if not future.done():
+                    future.set_result(vector)
+        except Exception as e:  # noqa: BLE001
+            # Ошибка сервиса передаётся всем ожидающим этот пакет вызовам
+            logger.warning("Error while embedding %s texts, error: %s", len(batch), e)
+            self._fail(futures, e)
+            return
+        finally:
+            # При отмене запроса ожидающие вызовы завершаются ошибкой, а не ждут вечно
+            self._fail(futures, EmbeddingError("Embedding request was cancelled"))
+        logger.debug("Embedded %s texts", len(batch))
+        if self.cache is not None:
+            await self.cache.put_many({
+                key: _encode_vector(vector) for key, vector in zip(batch, vectors, strict=True)
+            })
@@ -0,0 +1,147 @@
+"""Сбор фактов о странице, необходимых правилам линтинга, за один обход DOM"""
+
+from typing import Final, NamedTuple
+
+from bs4 import BeautifulSoup, Tag
+from playwright.async_api import Page
+from pydantic import BaseModel
+
+from ..schemas import PageMeta
+from .parsers import NON_CONTENT_TAGS, TEXT_TAGS
+
+SEMANTIC_TAGS: Final[list[str]] = [
+    "header", "nav", "main", "article", "section", "aside", "footer"
+]
+HEADING_LEVELS: Final[dict[str, int]] = {f"h{level}": level for level in range(1, 7)}
+# JS скрипт собирающий факты для линтинга и HTML фрагменты текстовых элементов за один вызов
+JS_COLLECT_PAGE_SNAPSHOT_SCRIPT = """
+([semanticTags, nonContentSelector, textSelector]) => {
+    const title = document.querySelector('title');
+    const description = Array.from(document.getElementsByTagName('meta'))
+        .find((meta) => meta.getAttribute('name') === 'description');
+    const headingLevels = Array.from(document.querySelectorAll('h1, h2, h3, h4, h5, h6'))
+        .map((heading) => Number(heading.tagName[1]));
+    const images = Array.from(document.getElementsByTagName('img'))
+        .map((image) => [image.getAttribute('alt') ?? '', image.getAttribute('src') ?? '']);
+    const fragments = [];
+    if (document.body !== null) {
+        for (const element of document.body.querySelectorAll(textSelector)) {
+            if (element.parentElement?.closest(nonContentSelector)) {
+                continue;
+            }
+            const clone = element.cloneNode(true);
+            clone.querySelectorAll(nonContentSelector).forEach((child) => child.remove());
+            fragments.push(clone.outerHTML);
+        }
+    }
+    return {
+        facts: {
+            title: title === null ? null : title.textContent,
+            description: description === undefined
+                ? null : (description.getAttribute('content') ?? ''),
+            heading_levels: headingLevels,
+            images: images,
+            semantic_tags: semanticTags.filter(
+                (tag) => document.getElementsByTagName(tag).length > 0
+            ),
+            has_body: document.body !== null,
+        },
+        fragments: fragments,
+    };
+}
+"""
+
+
+class ImageFacts(NamedTuple):
+    """Атрибуты изображения на странице"""
+    alt: str
+    src: str
+
+
+class PageFacts(BaseModel):
+    """Факты о странице, по которым вычисляются правила линтинга.
+
+    Attributes:
+        title: Текст первого тега <title> или None, если тег отсутствует.
+        description: Содержимое meta-описания или None, если тег отсутствует.
+        heading_levels: Уровни заголовков H1-H6 в порядке следования в документе.
+        images: Атрибуты alt и src изображений в порядке следования в документе.
+        semantic_tags: Используемые на странице семантические теги.
+        has_body: Присутствует ли на странице тег <body>.
+    """
+    title: str | None = None
+    description: str | None = None
+    heading_levels: list[int] = []
+    images: list[ImageFacts] = []
+    semantic_tags: set[str] = set()
+    has_body: bool = False
+
+    def to_meta(self) -> PageMeta:
+        """Мета-данные страницы"""
+        # Нормализация пробелов как у document.title
+        title = " ".join(self.title.split()) if self.title is not None else ""
+        return PageMeta(title=title, description=self.description or "")
+
+
+def collect_page_facts(soup: BeautifulSoup) -> PageFacts:
+    """Собирает факты о странице за один обход разобранного документа.
+
+    :param soup: Разобранный HTML документ.
+    :return Факты о странице.
+    """
+    title: str | None = None
+    description: str | None = None
+    heading_levels: list[int] = []
+    images: list[ImageFacts] = []
+    semantic_tags: set[str] = set()
+    has_body = False
+    semantic_tag_names = frozenset(SEMANTIC_TAGS)
+    for element in soup.descendants:
+        if not isinstance(element, Tag):
+            continue
+        name = element.name
+        if name in HEADING_LEVELS:
+            heading_levels.append(HEADING_LEVELS[name])
+        elif name == "img":
+            images.append(ImageFacts(alt=element.get("alt", ""), src=element.get("src", "")))
+        elif name in semantic_tag_names:
+            semantic_tags.add(name)
+        elif name == "title" and title is None:
+            title = element.get_text()
+        elif name == "meta" and description is None and element.get("name") == "description":
+            description = element.get("content", "")
+        elif name == "body":
+            has_body = True
+    return PageFacts(
+        title=title,
+        description=description,
+        heading_levels=heading_levels,
+        images=images,
+        semantic_tags=semantic_tags,
+        has_body=has_body,
+    )
+
+
+class PageSnapshot(BaseModel):
+    """Снимок страницы собранный в браузере вместо сериализованного DOM.
+
+    Attributes:
+        facts: Факты о странице для правил линтинга.
+        fragments: HTML фрагменты текстовых элементов body для извлечения текста.
+    """
+    facts: PageFacts
+    fragments: list[str]
+
+
+async def collect_page_snapshot(page: Page) -> PageSnapshot:
+    """Собирает факты о странице и фрагменты с текстом одним вызовом в браузере,
+    не передавая весь DOM страницы в Python.
+
+    :param page: Загруженная Playwright страница.
+    :return Снимок страницы.
+    """
+    result = await page.evaluate(
+        JS_COLLECT_PAGE_SNAPSHOT_SCRIPT,
+        [SEMANTIC_TAGS, ", ".join(sorted(NON_CONTENT_TAGS)), ", ".join(sorted(TEXT_TAGS))],
+    )
+    return PageSnapshot.model_validate(result)
@@ -0,0 +1,144 @@
+"""Загрузка HTML страниц по HTTP без запуска браузера"""
+
+from typing import Final
+
+import logging
+import re
+
+import httpx
+from pydantic import BaseModel, HttpUrl, NonNegativeFloat
+
+from ..settings import settings
+from .stealth import generate_accept_language, generate_user_agent
+
+logger = logging.getLogger(__name__)
+
+# Минимальная длина видимого текста body, при которой страница считается отрендеренной сервером
+MIN_BODY_TEXT_LENGTH = 200
+# Корневые элементы SPA приложений (React, Vue, Next.js, Nuxt, Gatsby, Angular)
+SPA_ROOT_PATTERN = re.compile(
+    r"<(div|app-root)[^>]*\bid=[\"'](root|app|__next|__nuxt|___gatsby)[\"'][^>]*>\s*</\1>",
+    re.IGNORECASE,
+)
+BODY_PATTERN = re.compile(r"<body[^>]*>(.*)</body>", re.IGNORECASE | re.DOTALL)
+INVISIBLE_CONTENT_PATTERN = re.compile(
+    r"<(script|style|noscript|template|svg)[^>]*>.*?</\1>", re.IGNORECASE | re.DOTALL
+)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+TITLE_PATTERN = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+META_DESCRIPTION_PATTERN = re.compile(
+    r"<meta\b[^>]*\bname=[\"']description[\"'][^>]*>", re.IGNORECASE
+)
+CONTENT_ATTRIBUTE_PATTERN = re.compile(r"\bcontent=(?:\"([^\"]*)\"|'([^']*)')", re.IGNORECASE)
+# Фиксированные заголовки запросов, ответ на которые сравнивается с предыдущим ответом
+STABLE_HEADERS: Final[dict[str, str]] = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "ru-RU,ru;q=0.9,en;q=0.8",
+}
+
+
+class FetchedPage(BaseModel):
+    """Страница загруженная по HTTP.
+
+    Attributes:
+        url: URL адрес страницы после редиректов.
+        html: HTML контент страницы.
+        elapsed: Время ответа сервера в секундах.
+    """
+    url: HttpUrl
+    html: str
+    elapsed: NonNegativeFloat
+
+
+def create_http_client(headers: dict[str, str] | None = None) -> httpx.AsyncClient:
+    """Создаёт HTTP клиент с пулом соединений, поддержкой HTTP/2 и сжатия.
+
+    :param headers: Заголовки, заменяющие случайно сгенерированные, например: STABLE_HEADERS.
+    :return HTTP клиент.
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        follow_redirects=True,
+        verify=False,  # noqa: S501
+        timeout=settings.scanner.http_timeout,
+        limits=httpx.Limits(
+            max_connections=settings.scanner.http_max_connections,
+            max_keepalive_connections=settings.scanner.http_max_connections,
+        ),
+        headers={
+            "User-Agent": generate_user_agent(),
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": generate_accept_language(),
+            "Accept-Encoding": "gzip, deflate, br",
+            **(headers or {}),
+        },
+    )
+
+
+async def fetch_page(client: httpx.AsyncClient, url: HttpUrl) -> FetchedPage | None:
+    """Загружает HTML страницы по HTTP.
+
+    :param client: HTTP клиент.
+    :param url: URL адрес страницы.
+    :return Загруженная страница или None, если не удалось получить HTML.
+    """
+    try:
+        response = await client.get(str(url))
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.warning("Error while fetching page %s, error: %s", url, e)
+        return None
+    if "html" not in response.headers.get("content-type", ""):
+        logger.warning("Page %s is not HTML document", url)
+        return None
+    return FetchedPage(
+        url=HttpUrl(str(response.url)),
+        html=response.text,
+        elapsed=response.elapsed.total_seconds(),
+    )
+
+
+def is_js_rendered_shell(html: str) -> bool:
+    """Эвристика определения страницы, контент которой рендерится JavaScript на клиенте:
+    пустой body, пустой корневой элемент SPA или слишком мало видимого текста.
+
+    :param html: HTML полученный по HTTP.
+    :return True, если для анализа страницы нужен браузер.
+    """
+    body = BODY_PATTERN.search(html)
+    if body is None:
+        return True
+    if SPA_ROOT_PATTERN.search(body.group(1)):
+        return True
+    return len(extract_visible_text(body.group(1))) < MIN_BODY_TEXT_LENGTH
+
+
+def extract_visible_text(html: str) -> str:
+    """Видимый текст HTML фрагмента без скриптов, стилей и разметки"""
+    visible_html = INVISIBLE_CONTENT_PATTERN.sub(" ", html)
+    return " ".join(TAG_PATTERN.sub(" ", visible_html).split())
+
+
+def extract_document_text(html: str) -> str:
+    """Текстовое представление HTML документа: title, meta-описание и видимый текст body.
+
+    В отличие от самого документа не зависит от разметки, скриптов и одноразовых токенов
+    в них, поэтому одинаково для документа полученного браузером и HTTP клиентом.
+
+    :param html: HTML документ страницы.
+    :return Title, meta-описание и видимый текст, каждый на отдельной строке.
+    """
+    title = TITLE_PATTERN.search(html)
+    description = META_DESCRIPTION_PATTERN.search(html)
+    content = (
+        CONTENT_ATTRIBUTE_PATTERN.search(description.group(0)) if description else None
+    )
+    body = BODY_PATTERN.search(html)
+    return "\n".join((
+        extract_visible_text(title.group(1)) if title else "",
+        " ".join((content.group(1) or content.group(2) or "").split()) if content else "",
+        extract_visible_text(body.group(1) if body else html),
+    ))
@@ -0,0 +1,87 @@
+"""Инкрементальное сканирование: переиспользование результатов неизменившихся страниц"""
+
+import asyncio
+import logging
+from datetime import datetime
+from uuid import uuid4
+
+import httpx
+from pydantic import HttpUrl
+
+from ..schemas import Page, Website
+from ..settings import settings
+from .analysis import compute_content_hash
+from .fetching import STABLE_HEADERS, create_http_client, fetch_page
+from .tree import SiteTrie, get_url_key
+
+logger = logging.getLogger(__name__)
+
+
+def get_last_modified(trie: SiteTrie, url: HttpUrl) -> datetime | None:
+    """Дата последнего изменения страницы из sitemap.xml"""
+    node = trie.find(url)
+    return node.last_modified if node is not None else None
+
+
+def _copy_forward(page: Page, last_modified: datetime | None) -> Page:
+    """Копирует результат сканирования страницы в новое сканирование"""
+    return page.model_copy(
+        update={"id": uuid4(), "last_modified": last_modified or page.last_modified}, deep=True
+    )
+
+
+async def _probe_content_hash(
+        client: httpx.AsyncClient, url: HttpUrl, semaphore: asyncio.Semaphore
+) -> str | None:
+    """Хеш текста HTML документа отдаваемого сервером сейчас"""
+    async with semaphore:
+        fetched_page = await fetch_page(client, url)
+    return compute_content_hash(fetched_page.html) if fetched_page is not None else None
+
+
+async def reuse_unchanged_pages(
+        trie: SiteTrie,
+        urls: list[HttpUrl],
+        previous: Website,
+        concurrency: int = settings.scanner.concurrency,
+) -> dict[str, Page]:
+    """Находит страницы не изменившиеся с предыдущего сканирования сайта.
+
+    Страница считается неизменившейся, если дата её последнего изменения в sitemap.xml
+    совпадает с сохранённой. Если дат нет, то сравнивается хеш текста HTML документа,
+    который загружается по HTTP без браузера с фиксированными заголовками.
+
+    :param trie: Компактное дерево структуры сайта.
+    :param urls: URL адреса выбранных для сканирования страниц.
+    :param previous: Последнее сохранённое сканирование сайта.
+    :param concurrency: Максимальное количество одновременных HTTP запросов.
+    :return Скопированные результаты неизменившихся страниц по ключу URL адреса.
+    """
+    previous_pages = {get_url_key(page.url): page for page in previous.pages}
+    reused: dict[str, Page] = {}
+    probes: list[tuple[HttpUrl, Page, datetime | None]] = []
+    for url in urls:
+        previous_page = previous_pages.get(get_url_key(url))
+        if previous_page is None:
+            continue
+        last_modified = get_last_modified(trie, url)
+        if last_modified is not None and previous_page.last_modified is not None:
+            if last_modified == previous_page.last_modified:
+                reused[get_url_key(url)] = _copy_forward(previous_page, last_modified)
+            continue
+        if previous_page.content_hash is not None:
+            probes.append((url, previous_page, last_modified))
+    if probes:
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        # Случайный язык или User-Agent могли бы изменить ответ неизменившейся страницы
+        async with create_http_client(headers=STABLE_HEADERS) as client:
+            content_hashes = await asyncio.gather(
+                *(_probe_content_hash(client, url, semaphore) for url, _, _ in probes)
+            )
+        for (url, previous_page, last_modified), content_hash in zip(
+                probes, content_hashes, strict=True
+        ):
+            if content_hash == previous_page.content_hash:
+                reused[get_url_key(url)] = _copy_forward(previous_page, last_modified)
+    logger.info("Reused %s of %s pages from previous scan", len(reused), len(urls))
+    return reused
@@ -1,40 +1,38 @@
-from typing import Final
+from typing import Literal
 
 import logging
-import re
+from collections.abc import Collection
 
-from bs4 import BeautifulSoup
-from playwright.async_api import Page
-
-from ..schemas import LogLevel, SEOLog
-from .nlp import compare_texts
-from .parsers import extract_markdown_text
+from ..schemas import LogLevel, Page, SEOLog
+from ..settings import settings
+from .duplicates import DUPLICATES_CATEGORY, find_duplicates
+from .facts import SEMANTIC_TAGS, PageFacts
+from .rules import LintRule, RuleRegistry, SiteLintRule, TaskRunner, replace_site_findings
 
 logger = logging.getLogger(__name__)
 
 OPTIMAL_TITLE_LENGTH = 55
 OPTIMAL_TITLE_DELTA = 10
-SEMANTIC_TAGS: Final[list[str]] = [
-    "header", "nav", "main", "article", "section", "aside", "footer"
-]
 MAX_META_DESCRIPTION_LENGTH = 160
 MIN_META_DESCRIPTION_LENGTH = 120
 SHORT_RELEVANCE_SCORE, CRITICAL_RELEVANCE_SCORE = 0.5, 0.3
 GREAT_SEMANTIC_TAG_COUNT = 4
+DESCRIPTION_RELEVANCE_RULE_ID = "description-relevance"
+DUPLICATES_RULE_ID = "duplicates"
+TOPICS_RULE_ID = "topics"
 
 
-def check_title(soup: BeautifulSoup) -> list[SEOLog]:
+def check_title(facts: PageFacts) -> list[SEOLog]:
     """Проверка тега <title>"""
     findings: list[SEOLog] = []
-    tag = soup.find("title")
-    if not tag:
+    if facts.title is None:
         return [SEOLog(
             level=LogLevel.CRITICAL,
             message="Отсутсвует тэг <title>!",
             category="title",
             element="title"
         )]
-    text = tag.get_text().strip()
+    text = facts.title.strip()
     if not text:
         return [SEOLog(
             level=LogLevel.CRITICAL,
@@ -70,18 +68,17 @@ def check_title(soup: BeautifulSoup) -> list[SEOLog]:
     return findings
 
 
-def check_meta_description(soup: BeautifulSoup) -> list[SEOLog]:
+def check_meta_description(facts: PageFacts) -> list[SEOLog]:
     """Проверка meta описания страницы"""
     findings: list[SEOLog] = []
-    meta_description = soup.find("meta", attrs={"name": "description"})
-    if not meta_description:
+    if facts.description is None:
         return [SEOLog(
             level=LogLevel.CRITICAL,
             message="Отсутствует meta-описание",
             category="meta",
             element="meta"
         )]
-    content = meta_description.get("content", "").strip()
+    content = facts.description.strip()
     if not content:
         return [SEOLog(
             level=LogLevel.CRITICAL,
@@ -117,42 +114,40 @@ def check_meta_description(soup: BeautifulSoup) -> list[SEOLog]:
     return findings
 
 
-def check_heading(soup: BeautifulSoup) -> list[SEOLog]:
+def check_heading(facts: PageFacts) -> list[SEOLog]:
     """Проверка структуры заголовков"""
     findings: list[SEOLog] = []
-    h1_tags = soup.find_all("h1")
-    if len(h1_tags) == 0:
+    h1_count = facts.heading_levels.count(1)
+    if h1_count == 0:
         findings.append(SEOLog(
             level=LogLevel.CRITICAL,
             message="Отсутствует тег H1",
             category="heading",
             element="h1"
         ))
-    elif len(h1_tags) > 1:
+    elif h1_count > 1:
         findings.append(SEOLog(
             level=LogLevel.WARNING,
-            message=f"Найдено {len(h1_tags)} тегов H1. Рекомендуется только один H1 на страницу",
+            message=f"Найдено {h1_count} тегов H1. Рекомендуется только один H1 на страницу",
             category="heading",
             element="h1"
         ))
-    elif len(h1_tags) == 1:
+    elif h1_count == 1:
         findings.append(SEOLog(
             level=LogLevel.OPTIMAL,
             message="Оптимальное количество H1 тегов (ровно 1)",
             category="heading",
             element="h1"
         ))
-    headings = soup.find_all(re.compile(r"^h[1-6]$"))
     last_level = 0
     hierarchy_correct = True
-    for heading in headings:
-        level = int(heading.name[1])
+    for level in facts.heading_levels:
         if level > last_level + 1:
             findings.append(SEOLog(
                 level=LogLevel.WARNING,
                 message=f"Нарушена иерархия заголовков: H{level} после H{last_level}",
                 category="heading",
-                element=heading.name
+                element=f"h{level}"
             ))
             hierarchy_correct = False
         last_level = level
@@ -166,11 +161,10 @@ def check_heading(soup: BeautifulSoup) -> list[SEOLog]:
     return findings
 
 
-def check_images(soup: BeautifulSoup) -> list[SEOLog]:
+def check_images(facts: PageFacts) -> list[SEOLog]:
     """Проверка изображений"""
     findings: list[SEOLog] = []
-    images = soup.find_all("img")
-    if not images:
+    if not facts.images:
         return [SEOLog(
             level=LogLevel.INFO,
             message="На странице нет изображений",
@@ -181,8 +175,7 @@ def check_images(soup: BeautifulSoup) -> list[SEOLog]:
     images_without_alt = 0  # Количество изображений без атрибута alt
     images_without_description = 0  # Изображения без описания в названии файла
 
-    for image in images:
-        alt, src = image.get("alt", ""), image.get("src", "")
+    for alt, src in facts.images:
         if not alt:
             images_without_alt += 1
         else:
@@ -227,14 +220,13 @@ def check_images(soup: BeautifulSoup) -> list[SEOLog]:
     return findings
 
 
-def check_semantic_structure(soup: BeautifulSoup) -> list[SEOLog]:
+def check_semantic_structure(facts: PageFacts) -> list[SEOLog]:
     """Проверка семантической структуры"""
     findings: list[SEOLog] = []
     used_semantic_tags: list[str] = []
     unused_semantic_tags: list[str] = []
     for semantic_tag in SEMANTIC_TAGS:
-        elements = soup.find_all(semantic_tag)
-        if not elements:
+        if semantic_tag not in facts.semantic_tags:
             unused_semantic_tags.append(semantic_tag)
         else:
             used_semantic_tags.append(semantic_tag)
@@ -262,23 +254,17 @@ def check_semantic_structure(soup: BeautifulSoup) -> list[SEOLog]:
     return findings
 
 
-def check_meta_and_body_relevance(soup: BeautifulSoup) -> list[SEOLog]:
-    """Проверяет сематическое соответствие между meta-описанием и контентом на странице"""
+def _empty_content_log() -> SEOLog:
+    return SEOLog(
+        level=LogLevel.CRITICAL,
+        message="Страница с пустым контентом",
+        category="semantic",
+        element="body"
+    )
+
+
+def _get_relevance_findings(similarity_score: float) -> list[SEOLog]:
     findings: list[SEOLog] = []
-    meta_description = soup.find("meta", attrs={"name": "description"})
-    if not meta_description:
-        return findings
-    content = meta_description.get("content", "").strip()
-    body = soup.find("body")
-    if body is None:
-        return [SEOLog(
-            level=LogLevel.CRITICAL,
-            message="Страница с пустым контентом",
-            category="semantic",
-            element="body"
-        )]
-    text = extract_markdown_text(soup)
-    similarity_score = compare_texts(content, text)
     if CRITICAL_RELEVANCE_SCORE < similarity_score < SHORT_RELEVANCE_SCORE:
         findings.append(SEOLog(
             level=LogLevel.INFO,
@@ -306,20 +292,95 @@ def check_meta_and_body_relevance(soup: BeautifulSoup) -> list[SEOLog]:
     return findings
 
 
-async def lint_page(page: Page) -> list[SEOLog]:
-    """Выполняет SEO линтинг страницы. Возвращает найденные замечания.
+async def lint_description_relevance(
+        pages: list[Page],
+        indexes: Collection[int],
+        runner: TaskRunner,
+        method: Literal["tf-idf", "embeddings"] = settings.scanner.relevance_method,
+) -> None:
+    """Проверяет соответствие meta-описаний контенту страниц сайта и добавляет замечания
+    в SEO логи. Страницы оцениваются одним пакетом: TF-IDF моделью, обученной
+    на описаниях и текстах всех страниц сайта, или векторами сервиса эмбеддингов.
+    Сходство вычисляется только для страниц, которым добавляются замечания.
 
-    :param page: Объект Playwright страницы.
-    :return Список найденных SEO замечаний страницы.
+    :param pages: Отсканированные страницы сайта, все они используются для обучения модели.
+    :param indexes: Индексы страниц, которым добавляются замечания.
+    :param runner: Исполнитель обучения TF-IDF модели вне event loop.
+    :param method: Способ оценки релевантности.
     """
-    await page.wait_for_selector("body:not(:empty)")
-    content = await page.content()
-    soup = BeautifulSoup(content, "html.parser")
+    comparable = {
+        i for i, page in enumerate(pages)
+        if page.content.meta.description.strip() and page.content.text.strip()
+    }
+    scored = sorted(comparable.intersection(indexes))
+    pairs = [(pages[i].content.meta.description.strip(), pages[i].content.text) for i in scored]
+    from .nlp import acompare_texts_batch, compare_texts_batch  # noqa: PLC0415
+
+    if method == "embeddings":
+        similarity_scores = await acompare_texts_batch(pairs)
+    else:
+        # Остальные страницы сайта участвуют только в обучении модели
+        fit_texts = [
+            text
+            for i in sorted(comparable.difference(scored))
+            for text in (pages[i].content.meta.description.strip(), pages[i].content.text)
+        ]
+        similarity_scores = await runner.run(compare_texts_batch, pairs, fit_texts=fit_texts)
+    scores = dict(zip(scored, similarity_scores, strict=True))
+    for i in indexes:
+        page = pages[i]
+        # Отсутствующее или пустое meta-описание отмечает правило 'meta-description'
+        if not page.content.meta.description.strip():
+            continue
+        if i not in scores:
+            page.seo_logs.append(_empty_content_log())
+            continue
+        page.seo_logs.extend(_get_relevance_findings(scores[i]))
+
+
+async def _lint_duplicates(pages: list[Page], indexes: list[int], runner: TaskRunner) -> None:
+    """Добавляет замечания о дубликатах, поиск выполняется вне event loop"""
+    findings = await runner.run(find_duplicates, pages)
+    replace_site_findings(pages, indexes, DUPLICATES_CATEGORY, findings)
+
+
+async def _lint_topics(pages: list[Page], indexes: list[int], runner: TaskRunner) -> None:
+    """Добавляет замечания о темах сайта, кластеризация выполняется вне event loop"""
+    # Кластеризация импортирует NLP стек, поэтому модуль загружается только здесь
+    from .topics import TOPICS_CATEGORY, find_topic_issues  # noqa: PLC0415
+
+    findings = await runner.run(find_topic_issues, pages)
+    replace_site_findings(pages, indexes, TOPICS_CATEGORY, findings)
+
+
+LINT_RULES = RuleRegistry([
+    LintRule("title", "title", "cheap", lambda facts, _: check_title(facts)),
+    LintRule("meta-description", "meta", "cheap", lambda facts, _: check_meta_description(facts)),
+    LintRule("heading", "heading", "cheap", lambda facts, _: check_heading(facts)),
+    LintRule("images", "image", "cheap", lambda facts, _: check_images(facts)),
+    LintRule(
+        "semantic-structure", "semantic", "cheap", lambda facts, _: check_semantic_structure(facts)
+    ),
+])
+# Правила, которые сравнивают страницы между собой, поэтому выполняются после сканирования сайта
+SITE_LINT_RULES = RuleRegistry([
+    # Одна TF-IDF модель на сайт, переиспользованные страницы участвуют в её обучении
+    SiteLintRule(
+        DESCRIPTION_RELEVANCE_RULE_ID, "semantic", "expensive", lint_description_relevance
+    ),
+    SiteLintRule(
+        DUPLICATES_RULE_ID, DUPLICATES_CATEGORY, "cheap", _lint_duplicates, refresh_reused=True
+    ),
+    SiteLintRule(TOPICS_RULE_ID, "topics", "expensive", _lint_topics, refresh_reused=True),
+])
+
+
+def lint_facts(facts: PageFacts) -> list[SEOLog]:
+    """Выполняет проверки не требующие текстового контента страницы по собранным фактам"""
     return [
-        *check_title(soup),
-        *check_meta_description(soup),
-        *check_heading(soup),
-        *check_images(soup),
-        *check_semantic_structure(soup),
-        *check_meta_and_body_relevance(soup),
+        *check_title(facts),
+        *check_meta_description(facts),
+        *check_heading(facts),
+        *check_images(facts),
+        *check_semantic_structure(facts),
     ]
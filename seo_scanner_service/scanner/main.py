@@ -1,40 +1,377 @@
+from typing import Literal
+
+import asyncio
 import logging
+import time
 
+import httpx
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import Page as PlaywrightPage
+from playwright.async_api import Response
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
-from playwright.async_api import async_playwright
 from pydantic import HttpUrl
+from tqdm.asyncio import tqdm_asyncio
 
-from ..schemas import Page, PageContent, Website
-from .linting import lint_page
-from .parsers import extract_page_meta, extract_page_text
-from .performance import measure_page_rendering_time
-from .tree import PRIORITY_KEYWORDS, build_site_tree, extract_key_pages
-from .utils import iter_pages, scroll_page_to_bottom
+from ..exceptions import AnalysisError, EmbeddingError
+from ..schemas import Page, Website
+from ..settings import settings
+from .analysis import (
+    AnalysisExecutor,
+    PageAnalysis,
+    analyze_html,
+    analyze_snapshot,
+    compute_content_hash,
+)
+from .facts import PageSnapshot, collect_page_snapshot
+from .fetching import create_http_client, fetch_page, is_js_rendered_shell
+from .incremental import get_last_modified, reuse_unchanged_pages
+from .linting import LINT_RULES, SITE_LINT_RULES
+from .parsers import wait_for_page_loading
+from .performance import PageRenderingInfo, measure_page_rendering_time
+from .pool import BrowserPool
+from .profiles import FULL_PROFILE, SCAN_PROFILES, ScanProfile, install_resource_blocking
+from .rules import DEFAULT_RULE_SELECTION, RuleSelection, RuleTimingStats
+from .tree import PRIORITY_KEYWORDS, build_site_trie, extract_key_pages, get_url_key
+from .utils import trigger_lazy_content
 
 logger = logging.getLogger(__name__)
 
+FetchMode = Literal["browser", "http"]
+SnapshotMode = Literal["html", "facts"]
+
+
+async def _capture_page_snapshot(
+        page: PlaywrightPage, snapshot_mode: SnapshotMode
+) -> str | PageSnapshot:
+    """Догружает контент страницы и снимает её HTML снимок,
+    либо собирает в браузере только факты для линтинга и фрагменты с текстом.
+    """
+    await trigger_lazy_content(
+        page, settings.scanner.scroll_mode, time_budget=settings.scanner.scroll_time_budget
+    )
+    await page.wait_for_selector("body:not(:empty)")
+    await wait_for_page_loading(page)
+    if snapshot_mode == "facts":
+        return await collect_page_snapshot(page)
+    return await page.content()
+
+
+async def _hash_document(response: Response | None) -> str | None:
+    """Хеш текста HTML документа отданного сервером при навигации"""
+    if response is None:
+        return None
+    try:
+        return compute_content_hash(await response.text())
+    except PlaywrightError:
+        return None
+
+
+async def _analyze(
+        url: HttpUrl,
+        snapshot: str | PageSnapshot,
+        executor: AnalysisExecutor | None,
+        rule_ids: frozenset[str] | None,
+) -> PageAnalysis | None:
+    """Анализирует снимок страницы в пуле процессов, если он передан, иначе в event loop.
+    Возвращает None, если процесс анализа страницы падает повторно.
+    """
+    try:
+        if isinstance(snapshot, PageSnapshot):
+            if executor is None:
+                return analyze_snapshot(snapshot, rule_ids)
+            return await executor.analyze_snapshot(snapshot, rule_ids)
+        if executor is None:
+            return analyze_html(snapshot, rule_ids)
+        return await executor.analyze(snapshot, rule_ids)
+    except AnalysisError as e:
+        logger.warning("Error while analyzing page %s, skip it, error: %s", url, e)
+        return None
+
+
+async def scan_page(
+        pool: BrowserPool,
+        url: HttpUrl,
+        semaphore: asyncio.Semaphore,
+        profile: ScanProfile = FULL_PROFILE,
+        executor: AnalysisExecutor | None = None,
+        snapshot_mode: SnapshotMode = settings.scanner.snapshot_mode,
+        rule_ids: frozenset[str] | None = None,
+        measure_rendering: bool = True,
+) -> Page | None:
+    """Сканирует страницу в арендованном у пула stealth контексте.
+
+    :param pool: Пул браузеров.
+    :param url: URL адрес страницы.
+    :param semaphore: Семафор ограничивающий количество одновременно открытых страниц.
+    :param profile: Профиль сканирования для стадий линтинга и извлечения контента.
+    :param executor: Пул процессов для анализа HTML снимка.
+    :param snapshot_mode: Снимок страницы, 'html' - сериализованный DOM,
+    'facts' - собранные в браузере факты для линтинга и фрагменты с текстом.
+    :param rule_ids: Выполняемые правила линтинга, None - все правила.
+    :param measure_rendering: Измерять ли рендеринг страницы, в профиле с блокировкой
+    ресурсов для этого нужна отдельная навигация со всеми ресурсами.
+    :return Результат сканирования страницы или None, если страница не загрузилась
+    или не была проанализирована.
+    """
+    rendering_info: PageRenderingInfo | None = None
+    async with semaphore:
+        try:
+            async with pool.lease_page() as page:
+                await install_resource_blocking(page, profile)
+                response = await page.goto(str(url), wait_until="domcontentloaded")
+                # Без блокировки ресурсов метрики снимаются с этой же навигации
+                if profile.is_full_fidelity and measure_rendering:
+                    rendering_info = await measure_page_rendering_time(page)
+                content_hash = await _hash_document(response)
+                snapshot = await _capture_page_snapshot(page, snapshot_mode)
+                page_url = page.url
+        except (PlaywrightTimeoutError, TimeoutError):
+            logger.warning("Very long page loading time of %s, skip it", url)
+            return None
+        except PlaywrightError as e:
+            # Ошибка одной страницы (net::ERR_*, упавшая вкладка) не прерывает сканирование сайта
+            logger.warning("Error while scanning page %s, skip it, error: %s", url, e)
+            return None
+    if not profile.is_full_fidelity and measure_rendering:
+        # Заблокированные ресурсы занизили бы метрики рендеринга
+        rendering_info = await measure_page(pool, url, semaphore)
+    # Анализ выполняется после освобождения семафора и контекста браузера
+    analysis = await _analyze(url, snapshot, executor, rule_ids)
+    if analysis is None:
+        return None
+    return Page(
+        url=HttpUrl(page_url),
+        rendering_time=(
+            rendering_info.dom_content_loaded / 1000 if rendering_info is not None else None
+        ),
+        seo_logs=analysis.seo_logs,
+        content=analysis.content,
+        content_hash=content_hash,
+        rule_timings=analysis.rule_timings,
+    )
+
+
+async def measure_page(
+        pool: BrowserPool, url: HttpUrl, semaphore: asyncio.Semaphore
+) -> PageRenderingInfo | None:
+    """Измеряет только метрики рендеринга страницы в браузере со всеми ресурсами"""
+    async with semaphore:
+        try:
+            async with pool.lease_page() as page:
+                return await measure_page_rendering_time(page, str(url))
+        except (PlaywrightTimeoutError, TimeoutError):
+            logger.warning("Very long page loading time of %s, skip measuring", url)
+            return None
+        except PlaywrightError as e:
+            logger.warning("Error while measuring page %s, skip measuring, error: %s", url, e)
+            return None
+
+
+async def scan_page_over_http(
+        client: httpx.AsyncClient,
+        pool: BrowserPool,
+        url: HttpUrl,
+        semaphore: asyncio.Semaphore,
+        profile: ScanProfile = FULL_PROFILE,
+        measure_rendering: bool = False,
+        executor: AnalysisExecutor | None = None,
+        rule_ids: frozenset[str] | None = None,
+) -> Page | None:
+    """Сканирует страницу по HTTP без браузера.
+    Если страница рендерится JavaScript на клиенте, то сканирование передаётся браузеру.
+
+    :param client: HTTP клиент.
+    :param pool: Пул браузеров.
+    :param url: URL адрес страницы.
+    :param semaphore: Семафор ограничивающий количество одновременно открытых страниц.
+    :param profile: Профиль сканирования для страниц переданных браузеру.
+    :param measure_rendering: Измерять ли рендеринг страницы в браузере,
+    иначе в качестве времени рендеринга используется время ответа сервера.
+    :param executor: Пул процессов для анализа HTML.
+    :param rule_ids: Выполняемые правила линтинга, None - все правила.
+    :return Результат сканирования страницы или None, если страница не загрузилась
+    или не была проанализирована.
+    """
+    async with semaphore:
+        fetched_page = await fetch_page(client, url)
+    if fetched_page is None or is_js_rendered_shell(fetched_page.html):
+        logger.info("Page %s requires JavaScript rendering, escalate to browser", url)
+        return await scan_page(
+            pool,
+            url,
+            semaphore,
+            profile,
+            executor,
+            rule_ids=rule_ids,
+            # Без блокировки ресурсов метрики снимаются с навигации сканирования бесплатно
+            measure_rendering=measure_rendering or profile.is_full_fidelity,
+        )
+    rendering_time = fetched_page.elapsed
+    if measure_rendering:
+        rendering_info = await measure_page(pool, url, semaphore)
+        if rendering_info is not None:
+            rendering_time = rendering_info.dom_content_loaded / 1000
+    analysis = await _analyze(url, fetched_page.html, executor, rule_ids)
+    if analysis is None:
+        return None
+    return Page(
+        url=fetched_page.url,
+        rendering_time=rendering_time,
+        seo_logs=analysis.seo_logs,
+        content=analysis.content,
+        content_hash=compute_content_hash(fetched_page.html),
+        rule_timings=analysis.rule_timings,
+    )
+
+
+async def _scan_pages(
+        pool: BrowserPool,
+        urls: list[HttpUrl],
+        concurrency: int,
+        profile: ScanProfile,
+        fetch_mode: FetchMode,
+        executor: AnalysisExecutor | None,
+        rule_ids: list[frozenset[str]],
+) -> list[Page | None]:
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    # Без блокировки ресурсов рендеринг в браузере измеряется на каждой странице бесплатно
+    render_sample_size = (
+        len(urls) if fetch_mode == "browser" and profile.is_full_fidelity
+        else settings.scanner.render_sample_size
+    )
+    # gather сохраняет порядок URL адресов независимо от времени загрузки страниц
+    if fetch_mode == "browser":
+        return await tqdm_asyncio.gather(*(
+            scan_page(
+                pool,
+                url,
+                semaphore,
+                profile,
+                executor,
+                rule_ids=rule_ids[i],
+                measure_rendering=i < render_sample_size,
+            )
+            for i, url in enumerate(urls)
+        ))
+    async with create_http_client() as client:
+        return await tqdm_asyncio.gather(*(
+            scan_page_over_http(
+                client,
+                pool,
+                url,
+                semaphore,
+                profile,
+                measure_rendering=i < render_sample_size,
+                executor=executor,
+                rule_ids=rule_ids[i],
+            )
+            for i, url in enumerate(urls)
+        ))
+
+
+async def _lint_site(
+        pages: list[Page],
+        reused_indexes: set[int],
+        rules: RuleSelection,
+        rule_timing_stats: RuleTimingStats,
+        executor: AnalysisExecutor | None = None,
+) -> None:
+    """Выполняет проверки, которым нужны все страницы сайта.
+
+    :param pages: Страницы сайта в порядке выбора.
+    :param reused_indexes: Индексы страниц, переиспользованных из предыдущего сканирования.
+    :param rules: Выбор правил линтинга и доля страниц для дорогих правил.
+    :param rule_timing_stats: Статистика времени выполнения правил за сканирование.
+    :param executor: Пул процессов для CPU нагрузки проверок,
+    если не передан, то она выполняется в отдельном потоке.
+    """
+    # Не запущенный исполнитель выполняет функции в отдельном потоке
+    runner = executor if executor is not None else AnalysisExecutor(workers=0)
+    site_rule_ids = [rules.resolve(SITE_LINT_RULES, i) for i in range(len(pages))]
+    for rule in SITE_LINT_RULES:
+        indexes = [
+            i for i, page_rules in enumerate(site_rule_ids)
+            if rule.id in page_rules and (rule.refresh_reused or i not in reused_indexes)
+        ]
+        if not indexes:
+            continue
+        start_time = time.perf_counter()
+        try:
+            await rule.check(pages, indexes, runner)
+        except (AnalysisError, EmbeddingError) as e:
+            # Упавший пул процессов или сервис эмбеддингов не прерывает сканирование сайта
+            logger.warning("Error while checking site rule '%s', skip it, error: %s", rule.id, e)
+            continue
+        rule_timing_stats.record({rule.id: time.perf_counter() - start_time})
+    rule_timing_stats.log()
+
+
+async def scan_website_seo_optimization(
+        url: HttpUrl,
+        headless: bool = True,
+        concurrency: int = settings.scanner.concurrency,
+        pool: BrowserPool | None = None,
+        profile: ScanProfile = SCAN_PROFILES[settings.scanner.scan_profile],
+        fetch_mode: FetchMode = settings.scanner.fetch_mode,
+        previous: Website | None = None,
+        executor: AnalysisExecutor | None = None,
+        rules: RuleSelection = DEFAULT_RULE_SELECTION,
+) -> Website:
+    """Сканирует SEO оптимизацию сайта.
 
-async def scan_website_seo_optimization(url: HttpUrl, headless: bool = True) -> Website:
-    """Сканирует SEO оптимизацию сайта"""
-    tree = build_site_tree(url)
-    urls = extract_key_pages(tree, list(PRIORITY_KEYWORDS), max_result=15)
-    scanned_pages: list[Page] = []
-    async with async_playwright() as playwright:
-        browser = await playwright.chromium.launch(headless=headless)
-        async for page in iter_pages(browser, urls):
-            try:
-                rendering_info = await measure_page_rendering_time(page, page.url)
-                await scroll_page_to_bottom(page)
-                seo_logs = await lint_page(page)
-                meta = await extract_page_meta(page)
-                text = await extract_page_text(page)
-                scanned_pages.append(Page(
-                    url=HttpUrl(page.url),
-                    rendering_time=rendering_info.dom_content_loaded / 1000,
-                    seo_logs=seo_logs,
-                    content=PageContent(meta=meta, text=text),
-                ))
-            except (PlaywrightTimeoutError, TimeoutError):
-                logger.warning("Very long page loading time, skip to net page")
-                continue
-    return Website.from_pages(url, scanned_pages)
+    :param url: URL адрес сайта.
+    :param headless: Запуск браузера в headless режиме (если не передан пул браузеров).
+    :param concurrency: Максимальное количество одновременно сканируемых страниц.
+    :param pool: Запущенный пул браузеров, если не передан, то собственный браузер
+    запускается при первой странице, которой он нужен.
+    :param profile: Профиль сканирования, например 'light' блокирует изображения,
+    шрифты, видео и трекеры, метрики рендеринга при этом измеряются без них.
+    :param fetch_mode: Способ загрузки страниц, 'browser' - рендеринг в Chromium,
+    'http' - загрузка по HTTP с передачей браузеру только JavaScript страниц.
+    :param previous: Предыдущее сканирование сайта для инкрементального сканирования,
+    результаты неизменившихся страниц копируются из него без повторного сканирования.
+    :param executor: Запущенный пул процессов для анализа HTML снимков и проверок сайта,
+    если не передан, то анализ выполняется в event loop, а проверки сайта - в отдельном потоке.
+    :param rules: Выбор правил линтинга и доля страниц для дорогих правил.
+    :return Отсканированный сайт.
+    """
+    trie = await build_site_trie(url)
+    urls = extract_key_pages(trie, list(PRIORITY_KEYWORDS), max_result=15)
+    reused: dict[str, Page] = {}
+    if previous is not None:
+        reused = await reuse_unchanged_pages(trie, urls, previous, concurrency)
+    urls_to_scan = [page_url for page_url in urls if get_url_key(page_url) not in reused]
+    # Дешёвые правила выполняются на всех страницах, дорогие - на выборке
+    rule_ids = [rules.resolve(LINT_RULES, i) for i in range(len(urls_to_scan))]
+    if not urls_to_scan:
+        results: list[Page | None] = []
+    elif pool is not None and pool.is_running:
+        results = await _scan_pages(
+            pool, urls_to_scan, concurrency, profile, fetch_mode, executor, rule_ids
+        )
+    else:
+        # В режиме 'http' Chromium запускается только для переданных браузеру страниц
+        async with BrowserPool(headless=headless, size=concurrency, lazy=True) as own_pool:
+            results = await _scan_pages(
+                own_pool, urls_to_scan, concurrency, profile, fetch_mode, executor, rule_ids
+            )
+    scanned = dict(zip(map(get_url_key, urls_to_scan), results, strict=True))
+    rule_timing_stats = RuleTimingStats()
+    for page in scanned.values():
+        if page is not None:
+            rule_timing_stats.record(page.rule_timings)
+    pages: list[Page] = []
+    reused_indexes: set[int] = set()
+    # Страницы сохраняют порядок выбора независимо от того, были ли они пересканированы
+    for page_url in urls:
+        key = get_url_key(page_url)
+        if key in reused:
+            reused_indexes.add(len(pages))
+            pages.append(reused[key])
+            continue
+        page = scanned.get(key)
+        if page is not None:
+            page.last_modified = get_last_modified(trie, page_url)
+            pages.append(page)
+    await _lint_site(pages, reused_indexes, rules, rule_timing_stats, executor)
+    return Website.from_pages(url, pages)
@@ -1,23 +1,19 @@
-from typing import Final, Literal
+from typing import Literal
 
-import re
+from collections.abc import Iterable
+from functools import lru_cache
 
-import nltk
 import numpy as np
 from embeddings_service.langchain import RemoteHTTPEmbeddings
 from langchain_core.embeddings import Embeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-from nltk.tokenize import word_tokenize
 from sklearn.decomposition import TruncatedSVD
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
 from ..settings import settings
-
-nltk.download("stopwords")
-nltk.download("wordnet")
+from .embeddings import EmbeddingsClient, create_embeddings_cache
+from .preprocessing import get_stopwords, get_text_preprocessor
 
 CHUNK_SIZE, CHUNK_OVERLAP = 1024, 10
 # Минимальное число кластеров
@@ -26,14 +22,22 @@ MIN_CLUSTER_SIZE = 2
 HDBSCAN_METRIC = "euclidian"
 
 RANDOM_STATE = 42
-# Минимальное значение токена для пред обработки текста
-MIN_TOKEN = 2
 # Минимальная длина предложения для извлечения ключевых слов
 MIN_SENTENCE_LENGTH = 10
-# Загрузка стоп-слов для русского языка (слова несущие малую смысловую нагрузку)
-STOPWORDS: Final[list[str]] = list(set(stopwords.words("russian")))
 
-embeddings: Final[Embeddings] = RemoteHTTPEmbeddings(base_url=settings.embeddings.base_url)
+SimilarityStrategy = Literal["max", "mean", "median", "std"]
+
+
+@lru_cache(maxsize=1)
+def get_embeddings() -> Embeddings:
+    """Клиент сервиса эмбеддингов создаётся при первом использовании"""
+    return RemoteHTTPEmbeddings(base_url=settings.embeddings.base_url)
+
+
+@lru_cache(maxsize=1)
+def get_embeddings_client() -> EmbeddingsClient:
+    """Асинхронный клиент сервиса эмбеддингов с кэшем векторов"""
+    return EmbeddingsClient(get_embeddings(), cache=create_embeddings_cache())
 
 
 def preprocess_text(text: str) -> str:
@@ -42,26 +46,25 @@ def preprocess_text(text: str) -> str:
     :param text: Текст для обработки.
     :return Пред обработанный текст.
     """
-    lemmatizer = WordNetLemmatizer()
-    text = text.lower()
-    text = re.sub(r"[^а-яёa-z\s]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    tokens = word_tokenize(text)
-    processed_tokens: list[str] = [
-        lemmatizer.lemmatize(token)
-        for token in tokens
-        if token not in STOPWORDS and len(token) > MIN_TOKEN
-    ]
-    return " ".join(processed_tokens)
+    return get_text_preprocessor().preprocess(text)
+
+
+def preprocess_texts(texts: list[str]) -> list[str]:
+    """Предобработка текстов всех страниц сайта с общим кэшем лемм"""
+    return get_text_preprocessor().preprocess_batch(texts)
+
+
+@lru_cache
+def _get_text_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len
+    )
 
 
 def split_text(
         text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP
 ) -> list[str]:
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len
-    )
-    return splitter.split_text(text)
+    return _get_text_splitter(chunk_size, chunk_overlap).split_text(text)
 
 
 def vectorize_text(
@@ -72,7 +75,7 @@ def vectorize_text(
         max_features=10000,
         min_df=2,
         max_df=0.8,
-        stop_words=list(STOPWORDS),
+        stop_words=get_stopwords(),
         ngram_range=ngram_range
     )
     tfidf_matrix = tfidf_vectorizer.fit_transform(texts)
@@ -85,43 +88,125 @@ def vectorize_text(
     return vectors.tolist()
 
 
-def _get_similarity_matrix(
-        chunks1: list[str], chunks2: list[str], method: Literal["tf-idf", "embeddings"] = "tf-idf"
-) -> np.ndarray:
-    match method:
-        case "tf-idf":
-            vectorizer = TfidfVectorizer(
-                max_features=1000,
-                ngram_range=(1, 2),
-                stop_words=STOPWORDS
-            )
-            tfidf_matrix = vectorizer.fit_transform(chunks1 + chunks2)
-            vectors1, vectors2 = tfidf_matrix[:len(chunks1)], tfidf_matrix[len(chunks1):]
-            return cosine_similarity(vectors1, vectors2)
-        case "embeddings":
-            vectors = embeddings.embed_documents(chunks1 + chunks2)
-            vectors1, vectors2 = vectors[:len(chunks1)], vectors[len(chunks1):]
-            return cosine_similarity(vectors1, vectors2)
+def _get_similarity_matrix(chunks1: list[str], chunks2: list[str]) -> np.ndarray:
+    vectorizer = TfidfVectorizer(
+        max_features=1000,
+        ngram_range=(1, 2),
+        stop_words=get_stopwords()
+    )
+    tfidf_matrix = vectorizer.fit_transform(chunks1 + chunks2)
+    vectors1, vectors2 = tfidf_matrix[:len(chunks1)], tfidf_matrix[len(chunks1):]
+    return cosine_similarity(vectors1, vectors2)
 
 
-def compare_texts(
-        text1: str,
-        text2: str,
-        method: Literal["tf-idf", "embeddings"] = "tf-idf",
-        similarity_strategy: Literal["max", "mean", "median", "std"] = "max"
+def _aggregate_similarity(
+        similarities: np.ndarray, similarity_strategy: SimilarityStrategy
 ) -> float:
-    """Сравнивает семантическую релевантность двух текстов"""
-    chunks1, chunks2 = split_text(text1), split_text(text2)
-    similarity_matrix = _get_similarity_matrix(chunks1, chunks2, method)
     match similarity_strategy:
         case "max":
-            similarity_score = np.max(similarity_matrix)
+            similarity_score = np.max(similarities)
         case "mean":
-            similarity_score = np.mean(similarity_matrix)
+            similarity_score = np.mean(similarities)
         case "median":
-            similarity_score = np.median(similarity_matrix)
+            similarity_score = np.median(similarities)
         case "std":
-            similarity_score = np.std(similarity_matrix)
+            similarity_score = np.std(similarities)
         case _:
             similarity_score = np.nan
     return float(similarity_score)
+
+
+def compare_texts(
+        text1: str, text2: str, similarity_strategy: SimilarityStrategy = "max"
+) -> float:
+    """Сравнивает семантическую релевантность двух текстов TF-IDF моделью этой пары.
+    Векторы сервиса эмбеддингов запрашиваются асинхронно через acompare_texts_batch.
+    """
+    chunks1, chunks2 = split_text(text1), split_text(text2)
+    similarity_matrix = _get_similarity_matrix(chunks1, chunks2)
+    return _aggregate_similarity(similarity_matrix, similarity_strategy)
+
+
+def compare_texts_batch(
+        pairs: list[tuple[str, str]],
+        similarity_strategy: SimilarityStrategy = "max",
+        fit_texts: Iterable[str] = (),
+) -> list[float]:
+    """Сравнивает релевантность пар текстов одной TF-IDF моделью.
+
+    Словарь и IDF веса вычисляются по чанкам всех пар и дополнительных текстов
+    (например, всех страниц сайта), а не по нескольким чанкам одной пары.
+    Сходство вычисляется только для переданных пар одной операцией над разреженной матрицей.
+
+    :param pairs: Пары текстов, например: meta-описание и контент страницы.
+    :param similarity_strategy: Агрегация сходства чанков пары.
+    :param fit_texts: Тексты, которые участвуют только в обучении модели.
+    :return Оценки релевантности в порядке пар, 0 - если в паре нет текста для сравнения.
+    """
+    chunks: list[str] = []
+    left_rows: list[int] = []
+    right_rows: list[int] = []
+    pair_sizes: list[int] = []
+    for text1, text2 in pairs:
+        chunks1, chunks2 = split_text(text1), split_text(text2)
+        start, middle = len(chunks), len(chunks) + len(chunks1)
+        chunks.extend(chunks1)
+        chunks.extend(chunks2)
+        for row in range(start, middle):
+            left_rows.extend([row] * len(chunks2))
+            right_rows.extend(range(middle, middle + len(chunks2)))
+        pair_sizes.append(len(chunks1) * len(chunks2))
+    scores = [0.0] * len(pairs)
+    if not left_rows:
+        return scores
+    for text in fit_texts:
+        chunks.extend(split_text(text))
+    vectorizer = TfidfVectorizer(
+        max_features=10000, ngram_range=(1, 2), stop_words=get_stopwords()
+    )
+    try:
+        tfidf_matrix = vectorizer.fit_transform(chunks)
+    except ValueError:
+        # Пустой словарь, тексты состоят только из стоп-слов
+        return scores
+    # Строки TF-IDF нормированы, поэтому скалярное произведение равно косинусному сходству
+    similarities = np.asarray(
+        tfidf_matrix[left_rows].multiply(tfidf_matrix[right_rows]).sum(axis=1)
+    ).ravel()
+    offset = 0
+    for i, size in enumerate(pair_sizes):
+        if size:
+            scores[i] = _aggregate_similarity(
+                similarities[offset:offset + size], similarity_strategy
+            )
+        offset += size
+    return scores
+
+
+async def acompare_texts_batch(
+        pairs: list[tuple[str, str]], similarity_strategy: SimilarityStrategy = "max"
+) -> list[float]:
+    """Сравнивает релевантность пар текстов по векторам сервиса эмбеддингов.
+
+    Чанки всех пар векторизуются одним вызовом клиента, который объединяет их в пакеты
+    и не запрашивает повторно векторы уже встречавшихся чанков.
+
+    :param pairs: Пары текстов, например: meta-описание и контент страницы.
+    :param similarity_strategy: Агрегация сходства чанков пары.
+    :return Оценки релевантности в порядке пар, 0 - если в паре нет текста для сравнения.
+    """
+    chunk_pairs = [(split_text(text1), split_text(text2)) for text1, text2 in pairs]
+    vectors = await get_embeddings_client().embed([
+        chunk for chunks1, chunks2 in chunk_pairs for chunk in (*chunks1, *chunks2)
+    ])
+    scores: list[float] = []
+    offset = 0
+    for chunks1, chunks2 in chunk_pairs:
+        middle, end = offset + len(chunks1), offset + len(chunks1) + len(chunks2)
+        if chunks1 and chunks2:
+            similarity_matrix = cosine_similarity(vectors[offset:middle], vectors[middle:end])
+            scores.append(_aggregate_similarity(similarity_matrix, similarity_strategy))
+        else:
+            scores.append(0.0)
+        offset = end
+    return scores
@@ -1,57 +1,66 @@
+from typing import Literal
+
 import logging
+from collections.abc import Iterable
 
 import html_to_markdown
 from bs4 import BeautifulSoup
 from playwright.async_api import Page
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
-from ..schemas import PageMeta
+from ..settings import settings
 
 logger = logging.getLogger(__name__)
 
 MIN_TEXT_LENGTH = 10
+# Элементы, которые не относятся к текстовому контенту страницы
+NON_CONTENT_TAGS: frozenset[str] = frozenset({
+    "script", "style", "svg", "path", "meta", "link", "nav", "footer", "header"
+})
+# Основные семантические элементы в порядке важности
+TEXT_TAGS: frozenset[str] = frozenset({"h1", "h2", "h3", "h4", "h5", "h6", "p", "li", "td", "th"})
+
+HtmlParser = Literal["lxml", "html.parser"]
+
+
+def parse_html(html: str, parser: HtmlParser = settings.scanner.html_parser) -> BeautifulSoup:
+    """Разбирает HTML документ выбранным парсером.
+    На корректной разметке, в том числе на DOM сериализованном браузером,
+    оба парсера строят одинаковое дерево. На некорректной разметке из HTTP ответа
+    деревья расходятся: 'html.parser' вкладывает незакрытые <p> и <li> друг в друга
+    и не добавляет отсутствующий <body>, а 'lxml' восстанавливает документ как браузер.
+    От этого зависят текст страницы и проверки по нему (description-relevance,
+    поиск дубликатов, кластеризация тем), остальные проверки работают по фактам
+    о странице и от парсера не зависят.
+
+    :param html: HTML документ.
+    :param parser: Парсер, 'lxml' (libxml2) или 'html.parser' (стандартная библиотека Python).
+    :return Разобранный документ.
+    """
+    return BeautifulSoup(html, parser)
+
+
+def convert_fragments_to_markdown(fragments: Iterable[str]) -> str:
+    """Преобразует HTML фрагменты текстовых элементов в Markdown"""
+    return "\n".join([html_to_markdown.convert(fragment) for fragment in fragments])
 
 
 def extract_markdown_text(soup: BeautifulSoup) -> str:
     """Извлекает текст со страницы в формате Markdown"""
-    for element in soup.find_all({
-        "script", "style", "svg", "path", "meta", "link", "nav", "footer", "header"
-    }):
+    for element in soup.find_all(NON_CONTENT_TAGS):
         element.decompose()
     body = soup.find("body")
     if body is None:
         return ""
-    # Основные семантические элементы в порядке важности
-    elements = body.find_all({"h1", "h2", "h3", "h4", "h5", "h6", "p", "li", "td", "th"})
-    return "\n".join([html_to_markdown.convert(str(element)) for element in elements])
-
+    elements = body.find_all(TEXT_TAGS)
+    return convert_fragments_to_markdown(str(element) for element in elements)
 
-async def extract_page_text(page: Page) -> str:
-    """Извлекает весь текст с текущей страницы из body.
 
-    :param page: Текущая Playwright страница.
-    :return: Текстовый контент страницы.
-    """
+async def wait_for_page_loading(page: Page) -> None:
+    """Ожидает загрузку страницы вместе с сетевыми запросами"""
     try:
         await page.wait_for_load_state("networkidle", timeout=5_000)
     except PlaywrightTimeoutError:
         # Fallback в случае неудачного ожидания загрузки страницы
         logger.warning("Networkidle timeout for %s, using domcontentloaded", page.url)
         await page.wait_for_load_state("domcontentloaded")
-    content = await page.content()
-    soup = BeautifulSoup(content, "html.parser")
-    return extract_markdown_text(soup)
-
-
-async def extract_page_meta(page: Page) -> PageMeta:
-    """Извлекает мета-данные страницы.
-
-    :param page: Текущая Playwright страница.
-    :return: Извлечённые мета-данные страницы.
-    """
-    title = await page.title()
-    description_element = await page.query_selector("meta[name='description']")
-    if description_element is None:
-        return PageMeta(title=title, description="")
-    description = await description_element.get_attribute("content")
-    return PageMeta(title=title, description=description)
@@ -38,14 +38,18 @@ class PageRenderingInfo(BaseModel):
     first_paint: float
 
 
-async def measure_page_rendering_time(page: Page, url: str) -> PageRenderingInfo:
+async def measure_page_rendering_time(
+        page: Page, url: str | None = None
+) -> PageRenderingInfo:
     """Измеряет скорость рендеринга страницы.
 `
     :param page: Текущая playwright страница.
-    :param url: URL адрес страницы.
+    :param url: URL адрес страницы, если не передан,
+    то метрики снимаются с уже загруженной страницы без повторной навигации.
     :return информация о рендеринге страницы.
     """
-    await page.goto(url, wait_until="domcontentloaded")
+    if url is not None:
+        await page.goto(url, wait_until="domcontentloaded")
     response = await page.evaluate(JS_PERFORMANCE_SCRIPT)
-    logger.info("Measured rendering time of page %s!", url)
+    logger.info("Measured rendering time of page %s!", page.url)
     return PageRenderingInfo.model_validate(response)
@@ -0,0 +1,164 @@
+"""Пул долгоживущих браузеров Playwright для переиспользования между сканированиями"""
+
+from typing import Self
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+
+from playwright.async_api import Browser, BrowserContext, Page, Playwright, async_playwright
+from playwright.async_api import Error as PlaywrightError
+
+from ..settings import settings
+from .stealth import create_new_stealth_context
+
+logger = logging.getLogger(__name__)
+
+# JS скрипт для получения объёма используемой JS кучи страницы (только Chromium)
+JS_MEMORY_USAGE_SCRIPT = "() => performance.memory ? performance.memory.usedJSHeapSize : 0"
+BYTES_IN_MEGABYTE = 1024 * 1024
+
+
+class _PooledContext:
+    """Stealth контекст выданный пулом"""
+    __slots__ = ("browser", "context", "page_count")
+
+    def __init__(self, browser: Browser, context: BrowserContext) -> None:
+        self.browser = browser
+        self.context = context
+        self.page_count = 0
+
+
+async def _close_quietly(target: Page | BrowserContext) -> None:
+    """Закрывает страницу или контекст игнорируя ошибки упавшего браузера"""
+    with suppress(PlaywrightError):
+        await target.close()
+
+
+async def _measure_memory_usage(page: Page) -> int | None:
+    """Измеряет объём используемой JS кучи страницы в байтах"""
+    try:
+        return int(await page.evaluate(JS_MEMORY_USAGE_SCRIPT))
+    except PlaywrightError:
+        return None
+
+
+class BrowserPool:
+    """Пул stealth контекстов поверх одного долгоживущего браузера Chromium.
+
+    Контексты выдаются в аренду сканированиям и переиспользуются между ними.
+    Контекст пересоздаётся после max_pages_per_context страниц или при превышении лимита памяти,
+    упавший браузер перезапускается при следующей аренде. Ленивый пул запускает браузер
+    только при первой аренде, поэтому сканирования без браузера не запускают Chromium.
+    """
+
+    def __init__(
+            self,
+            headless: bool = True,
+            size: int = settings.scanner.pool_size,
+            max_pages_per_context: int = settings.scanner.max_pages_per_context,
+            memory_limit_mb: int = settings.scanner.context_memory_limit_mb,
+            lazy: bool = False,
+    ) -> None:
+        self.headless = headless
+        self.lazy = lazy
+        self.max_pages_per_context = max_pages_per_context
+        self.memory_limit = memory_limit_mb * BYTES_IN_MEGABYTE
+        self._semaphore = asyncio.Semaphore(max(1, size))
+        self._lock = asyncio.Lock()
+        self._playwright: Playwright | None = None
+        self._browser: Browser | None = None
+        self._idle: list[_PooledContext] = []
+
+    @property
+    def is_running(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self) -> None:
+        """Запускает Playwright и браузер"""
+        async with self._lock:
+            if self._playwright is not None:
+                return
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            logger.info("Browser pool started")
+
+    async def stop(self) -> None:
+        """Закрывает все контексты, браузер и останавливает Playwright"""
+        async with self._lock:
+            if self._playwright is None:
+                return
+            for pooled in self._idle:
+                await _close_quietly(pooled.context)
+            self._idle.clear()
+            if self._browser is not None and self._browser.is_connected():
+                await self._browser.close()
+            if self._playwright is not None:
+                await self._playwright.stop()
+            self._browser, self._playwright = None, None
+            logger.info("Browser pool stopped")
+
+    async def __aenter__(self) -> Self:
+        if not self.lazy:
+            await self.start()
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        await self.stop()
+
+    async def _get_browser(self) -> Browser:
+        """Возвращает подключённый браузер, перезапуская его после падения"""
+        if self._playwright is None:
+            raise RuntimeError("Browser pool is not started")
+        if self._browser is None or not self._browser.is_connected():
+            logger.warning("Browser is disconnected, restarting it")
+            self._idle.clear()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        return self._browser
+
+    async def _acquire(self) -> _PooledContext:
+        async with self._lock:
+            browser = await self._get_browser()
+            while self._idle:
+                pooled = self._idle.pop()
+                if pooled.browser is browser:
+                    return pooled
+            context = await create_new_stealth_context(browser)
+            return _PooledContext(browser, context)
+
+    async def _release(self, pooled: _PooledContext, memory_usage: int | None) -> None:
+        is_exhausted = (
+            pooled.page_count >= self.max_pages_per_context
+            or memory_usage is None
+            or memory_usage >= self.memory_limit
+        )
+        if is_exhausted or not pooled.browser.is_connected():
+            await _close_quietly(pooled.context)
+            return
+        self._idle.append(pooled)
+
+    @asynccontextmanager
+    async def lease_page(self) -> AsyncIterator[Page]:
+        """Выдаёт в аренду stealth контекст пула с новой страницей.
+        При ошибке во время аренды контекст не возвращается в пул.
+
+        :return Новая страница арендованного контекста.
+        """
+        if self.lazy and not self.is_running:
+            await self.start()
+        async with self._semaphore:
+            pooled = await self._acquire()
+            pooled.page_count += 1
+            try:
+                page = await pooled.context.new_page()
+            except PlaywrightError:
+                await _close_quietly(pooled.context)
+                raise
+            memory_usage: int | None = None
+            try:
+                yield page
+                memory_usage = await _measure_memory_usage(page)
+            finally:
+                await _close_quietly(page)
+                await self._release(pooled, memory_usage)
@@ -0,0 +1,118 @@
+"""Предобработка текстов: токенизация, удаление стоп-слов и лемматизация"""
+
+from typing import Final
+
+import logging
+import re
+import time
+from collections.abc import Callable, Iterable
+from functools import lru_cache
+
+import nltk
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+
+logger = logging.getLogger(__name__)
+
+# Используемые данные NLTK и их пути, в образе загружаются заранее при сборке
+NLTK_RESOURCES: Final[dict[str, str]] = {
+    "stopwords": "corpora/stopwords",
+    "wordnet": "corpora/wordnet",
+}
+# Минимальное значение токена для пред обработки текста
+MIN_TOKEN = 2
+# Максимальное количество токенов в кэше лемм
+LEMMA_CACHE_SIZE = 100_000
+# Токен - непрерывная последовательность букв, заменяет очистку текста и word_tokenize
+TOKEN_PATTERN: Final[re.Pattern[str]] = re.compile(r"[а-яёa-z]+")
+
+
+def ensure_nltk_data(package: str) -> None:
+    """Загружает данные NLTK, если они не были подготовлены заранее"""
+    try:
+        nltk.data.find(NLTK_RESOURCES[package])
+    except LookupError:
+        logger.warning("NLTK data '%s' is not provisioned, downloading it", package)
+        nltk.download(package, quiet=True)
+
+
+def tokenize_text(text: str) -> list[str]:
+    """Приводит текст к нижнему регистру и выделяет токены из букв"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+@lru_cache(maxsize=1)
+def get_stopwords() -> list[str]:
+    """Стоп-слова русского языка (слова несущие малую смысловую нагрузку)"""
+    ensure_nltk_data("stopwords")
+    return list(set(stopwords.words("russian")))
+
+
+class TextPreprocessor:
+    """Переиспользуемый обработчик текстов: очистка, лемматизация, удаление стоп-слов.
+
+    Токены выделяются одним скомпилированным регулярным выражением, стоп-слова проверяются
+    по frozenset, а леммы токенов запоминаются в ограниченном LRU кэше, так как словарь
+    страниц одного сайта сильно пересекается.
+    """
+
+    def __init__(
+            self,
+            stop_words: Iterable[str] | None = None,
+            min_token_length: int = MIN_TOKEN,
+            lemma_cache_size: int = LEMMA_CACHE_SIZE,
+    ) -> None:
+        ensure_nltk_data("wordnet")
+        self.stop_words = frozenset(stop_words if stop_words is not None else get_stopwords())
+        self.min_token_length = min_token_length
+        self._lemmatize: Callable[[str], str] = lru_cache(maxsize=lemma_cache_size)(
+            WordNetLemmatizer().lemmatize
+        )
+        # Статистика производительности
+        self.token_count = 0
+        self.elapsed_time = 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Средняя скорость обработки токенов"""
+        return self.token_count / self.elapsed_time if self.elapsed_time else 0.0
+
+    def preprocess(self, text: str) -> str:
+        """Предобработка текста.
+
+        :param text: Текст для обработки.
+        :return Пред обработанный текст.
+        """
+        start_time = time.perf_counter()
+        tokens = tokenize_text(text)
+        lemmatize, stop_words = self._lemmatize, self.stop_words
+        processed_tokens = [
+            lemmatize(token)
+            for token in tokens
+            if len(token) > self.min_token_length and token not in stop_words
+        ]
+        self.token_count += len(tokens)
+        self.elapsed_time += time.perf_counter() - start_time
+        return " ".join(processed_tokens)
+
+    def preprocess_batch(self, texts: Iterable[str]) -> list[str]:
+        """Предобработка текстов, например: всех страниц сайта, с общим кэшем лемм.
+
+        :param texts: Тексты для обработки.
+        :return Пред обработанные тексты в том же порядке.
+        """
+        token_count, elapsed_time = self.token_count, self.elapsed_time
+        processed_texts = [self.preprocess(text) for text in texts]
+        batch_time = self.elapsed_time - elapsed_time
+        logger.debug(
+            "Preprocessed %s texts, %.0f tokens/s",
+            len(processed_texts),
+            (self.token_count - token_count) / batch_time if batch_time else 0.0,
+        )
+        return processed_texts
+
+
+@lru_cache(maxsize=1)
+def get_text_preprocessor() -> TextPreprocessor:
+    """Общий обработчик текстов процесса, создаётся при первом использовании"""
+    return TextPreprocessor()
@@ -0,0 +1,85 @@
+"""Профили сканирования с блокировкой ненужных ресурсов страницы"""
+
+from typing import Final
+
+import logging
+from urllib.parse import urlparse
+
+from playwright.async_api import BrowserContext, Page, Route
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Типы ресурсов ненужные для линтинга и извлечения текста
+HEAVY_RESOURCE_TYPES: frozenset[str] = frozenset({"image", "media", "font"})
+# Домены счётчиков и трекеров
+TRACKER_DOMAINS: frozenset[str] = frozenset({
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "connect.facebook.net",
+    "mc.yandex.ru",
+    "mc.yandex.com",
+    "top-fwz1.mail.ru",
+    "counter.yadro.ru",
+    "hotjar.com",
+    "clarity.ms",
+})
+
+
+class ScanProfile(BaseModel):
+    """Профиль сканирования страниц.
+
+    Attributes:
+        name: Название профиля.
+        blocked_resource_types: Типы ресурсов Playwright, запросы которых прерываются,
+        например: 'image', 'font', 'media'.
+        blocked_domains: Домены (вместе с поддоменами), запросы к которым прерываются.
+    """
+    name: str
+    blocked_resource_types: frozenset[str] = frozenset()
+    blocked_domains: frozenset[str] = frozenset()
+
+    @property
+    def is_full_fidelity(self) -> bool:
+        """Загружаются ли все ресурсы страницы"""
+        return not self.blocked_resource_types and not self.blocked_domains
+
+    def is_blocked(self, resource_type: str, url: str) -> bool:
+        """Нужно ли прервать запрос"""
+        if resource_type in self.blocked_resource_types:
+            return True
+        hostname = urlparse(url).hostname or ""
+        return any(
+            hostname == domain or hostname.endswith(f".{domain}")
+            for domain in self.blocked_domains
+        )
+
+
+FULL_PROFILE: Final[ScanProfile] = ScanProfile(name="full")
+LIGHT_PROFILE: Final[ScanProfile] = ScanProfile(
+    name="light", blocked_resource_types=HEAVY_RESOURCE_TYPES, blocked_domains=TRACKER_DOMAINS
+)
+SCAN_PROFILES: Final[dict[str, ScanProfile]] = {
+    FULL_PROFILE.name: FULL_PROFILE, LIGHT_PROFILE.name: LIGHT_PROFILE
+}
+
+
+async def install_resource_blocking(target: Page | BrowserContext, profile: ScanProfile) -> None:
+    """Устанавливает обработчик запросов, прерывающий загрузку заблокированных профилем ресурсов.
+
+    :param target: Страница или контекст Playwright.
+    :param profile: Профиль сканирования.
+    """
+    if profile.is_full_fidelity:
+        return
+
+    async def handle_route(route: Route) -> None:
+        request = route.request
+        if profile.is_blocked(request.resource_type, request.url):
+            await route.abort()
+            return
+        await route.continue_()
+
+    await target.route("**/*", handle_route)
+    logger.debug("Installed resource blocking for profile '%s'", profile.name)
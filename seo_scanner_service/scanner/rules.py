@@ -0,0 +1,229 @@
+"""Реестр правил SEO линтинга с замером времени выполнения каждого правила"""
+
+from typing import Any, Final, Literal, NamedTuple, Protocol
+
+import logging
+import math
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable, Collection, Iterable, Iterator
+from operator import itemgetter
+
+from pydantic import BaseModel, Field
+
+from ..schemas import Page, SEOLog
+from ..settings import settings
+from .facts import PageFacts
+
+logger = logging.getLogger(__name__)
+
+RuleCost = Literal["cheap", "expensive"]
+RuleCheck = Callable[[PageFacts, str], list[SEOLog]]
+
+
+class TaskRunner(Protocol):
+    """Выполняет CPU нагрузку правил сайта вне event loop, например: в пуле процессов анализа.
+    Функция и её аргументы должны сериализоваться pickle.
+    """
+
+    def run[R](self, func: Callable[..., R], /, *args: Any, **kwargs: Any) -> Awaitable[R]: ...
+
+
+SiteRuleCheck = Callable[[list[Page], list[int], TaskRunner], Awaitable[None]]
+
+
+class LintRule(NamedTuple):
+    """Правило линтинга.
+
+    Attributes:
+        id: Уникальный идентификатор правила, например: 'title', 'description-relevance'.
+        category: Категория замечаний правила, например: 'heading', 'semantic'.
+        cost: Класс стоимости, 'expensive' правила можно выполнять на выборке страниц.
+        check: Проверка, принимающая факты о странице и её текст.
+    """
+    id: str
+    category: str
+    cost: RuleCost
+    check: RuleCheck
+
+
+class SiteLintRule(NamedTuple):
+    """Правило линтинга, которое выполняется после сканирования для всех страниц сайта разом.
+
+    Attributes:
+        id: Уникальный идентификатор правила, например: 'duplicates'.
+        category: Категория замечаний правила.
+        cost: Класс стоимости, 'expensive' правила можно выполнять на выборке страниц.
+        check: Проверка, принимающая все страницы сайта, индексы страниц,
+        которым добавляются замечания, и исполнителя CPU нагрузки.
+        refresh_reused: Обновляет ли правило замечания страниц, переиспользованных
+        из предыдущего сканирования, так как они зависят от остальных страниц сайта.
+    """
+    id: str
+    category: str
+    cost: RuleCost
+    check: SiteRuleCheck
+    refresh_reused: bool = False
+
+
+def replace_site_findings(
+        pages: list[Page],
+        indexes: Collection[int],
+        category: str,
+        findings: dict[int, list[SEOLog]],
+) -> None:
+    """Заменяет замечания категории правила сайта, в том числе скопированные
+    из предыдущего сканирования, новыми замечаниями.
+
+    :param pages: Страницы сайта.
+    :param indexes: Индексы страниц, которым добавляются замечания.
+    :param category: Категория замечаний правила.
+    :param findings: Новые замечания по индексам страниц.
+    """
+    for i in indexes:
+        page = pages[i]
+        page.seo_logs = [seo_log for seo_log in page.seo_logs if seo_log.category != category]
+        page.seo_logs.extend(findings.get(i, []))
+
+
+class RuleRegistry[RuleT: (LintRule, SiteLintRule)]:
+    """Упорядоченный реестр правил линтинга, правила выполняются в порядке регистрации"""
+
+    def __init__(self, rules: Iterable[RuleT] = ()) -> None:
+        self._rules: dict[str, RuleT] = {}
+        for rule in rules:
+            self.register(rule)
+
+    def register(self, rule: RuleT) -> RuleT:
+        """Регистрирует правило"""
+        if rule.id in self._rules:
+            raise ValueError(f"Lint rule '{rule.id}' is already registered")
+        self._rules[rule.id] = rule
+        return rule
+
+    def __iter__(self) -> Iterator[RuleT]:
+        return iter(self._rules.values())
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def __contains__(self, rule_id: object) -> bool:
+        return rule_id in self._rules
+
+    def select(
+            self,
+            rule_ids: Collection[str] | None = None,
+            categories: Collection[str] | None = None,
+            costs: Collection[RuleCost] | None = None,
+    ) -> list[RuleT]:
+        """Отбирает правила в порядке регистрации, None означает отсутствие фильтра.
+
+        :param rule_ids: Идентификаторы правил.
+        :param categories: Категории правил.
+        :param costs: Классы стоимости правил.
+        :return Отобранные правила.
+        """
+        return [
+            rule for rule in self._rules.values()
+            if (rule_ids is None or rule.id in rule_ids)
+            and (categories is None or rule.category in categories)
+            and (costs is None or rule.cost in costs)
+        ]
+
+    def run(
+            self: "RuleRegistry[LintRule]",
+            facts: PageFacts,
+            text: str,
+            rule_ids: Collection[str] | None = None,
+    ) -> tuple[list[SEOLog], dict[str, float]]:
+        """Выполняет правила и замеряет время выполнения каждого из них.
+
+        :param facts: Факты о странице.
+        :param text: Текстовый контент страницы.
+        :param rule_ids: Идентификаторы выполняемых правил, None - все правила.
+        :return Найденные замечания и время выполнения правил в секундах.
+        """
+        seo_logs: list[SEOLog] = []
+        rule_timings: dict[str, float] = {}
+        for rule in self.select(rule_ids):
+            start_time = time.perf_counter()
+            seo_logs.extend(rule.check(facts, text))
+            rule_timings[rule.id] = time.perf_counter() - start_time
+        return seo_logs, rule_timings
+
+
+class RuleSelection(BaseModel):
+    """Выбор правил линтинга для сканирования.
+
+    Attributes:
+        rule_ids: Выполняемые правила, пустое множество - все зарегистрированные правила.
+        disabled_rule_ids: Отключённые правила.
+        expensive_sample_rate: Доля страниц, на которых выполняются 'expensive' правила,
+        страницы выборки равномерно распределены по списку сканируемых страниц.
+    """
+    rule_ids: frozenset[str] = frozenset()
+    disabled_rule_ids: frozenset[str] = frozenset()
+    expensive_sample_rate: float = Field(default=1.0, ge=0, le=1)
+
+    def is_sampled(self, page_index: int) -> bool:
+        """Попадает ли страница в выборку для 'expensive' правил,
+        первая (самая приоритетная) страница всегда попадает в непустую выборку.
+        """
+        rate = self.expensive_sample_rate
+        return math.floor(page_index * rate) > math.floor((page_index - 1) * rate)
+
+    def resolve(
+            self,
+            registry: RuleRegistry[LintRule] | RuleRegistry[SiteLintRule],
+            page_index: int = 0,
+    ) -> frozenset[str]:
+        """Идентификаторы правил, выполняемых на странице с указанным индексом"""
+        costs: tuple[RuleCost, ...] = (
+            ("cheap", "expensive") if self.is_sampled(page_index) else ("cheap",)
+        )
+        return frozenset(
+            rule.id for rule in registry.select(self.rule_ids or None, costs=costs)
+            if rule.id not in self.disabled_rule_ids
+        )
+
+
+DEFAULT_RULE_SELECTION: Final[RuleSelection] = RuleSelection(
+    rule_ids=frozenset(settings.scanner.lint_rules),
+    disabled_rule_ids=frozenset(settings.scanner.disabled_lint_rules),
+    expensive_sample_rate=settings.scanner.expensive_rules_sample_rate,
+)
+
+
+class RuleTimingStats:
+    """Суммарное время выполнения правил линтинга за сканирование"""
+
+    def __init__(self) -> None:
+        self.calls: defaultdict[str, int] = defaultdict(int)
+        self.total_time: defaultdict[str, float] = defaultdict(float)
+
+    def record(self, rule_timings: dict[str, float]) -> None:
+        """Добавляет время выполнения правил на одной странице"""
+        for rule_id, elapsed in rule_timings.items():
+            self.calls[rule_id] += 1
+            self.total_time[rule_id] += elapsed
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Количество вызовов, суммарное и среднее время правил, самые медленные первыми"""
+        return {
+            rule_id: {
+                "calls": self.calls[rule_id],
+                "total": total_time,
+                "mean": total_time / self.calls[rule_id],
+            }
+            for rule_id, total_time in sorted(
+                self.total_time.items(), key=itemgetter(1), reverse=True
+            )
+        }
+
+    def log(self) -> None:
+        """Логирует время выполнения правил"""
+        for rule_id, stats in self.summary().items():
+            logger.info(
+                "Lint rule '%s': %d calls, total %.3f s, mean %.4f s",
+                rule_id, stats["calls"], stats["total"], stats["mean"],
+            )
@@ -0,0 +1,372 @@
+"""Асинхронная загрузка и потоковый разбор sitemap.xml"""
+
+from typing import NamedTuple, cast
+
+import asyncio
+import gzip
+import hashlib
+import logging
+import zlib
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterator
+from contextlib import suppress
+from datetime import UTC, datetime
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser  # noqa: S405
+
+import httpx
+from pydantic import BaseModel, HttpUrl, ValidationError
+
+from ..settings import settings
+from .cache import BYTES_IN_MEGABYTE, _DiskTier
+
+logger = logging.getLogger(__name__)
+
+# Стандартные расположения sitemap.xml
+SITEMAP_PATHS: tuple[str, ...] = (
+    "sitemap.xml",
+    "sitemap.xml.gz",
+    "sitemap_index.xml",
+    "sitemap-index.xml",
+    "sitemap_index.xml.gz",
+    "sitemap/sitemap.xml",
+)
+GZIP_MAGIC_NUMBER = b"\x1f\x8b"
+SITEMAP_FILE_SUFFIX = ".json.gz"
+# Максимальное количество записей в очереди между загрузчиком и построением дерева
+QUEUE_SIZE = 10_000
+
+
+class SitemapEntry(NamedTuple):
+    """Страница из sitemap.xml"""
+    url: str
+    priority: float | None = None
+    last_modified: datetime | None = None
+
+
+def discover_sitemap_urls(url: HttpUrl) -> list[str]:
+    """Возможные URL адреса sitemap.xml сайта"""
+    base_url = f"{str(url).rstrip("/")}/"
+    return [urljoin(base_url, path) for path in SITEMAP_PATHS]
+
+
+def _local_name(element: Element) -> str:
+    """Название тега без XML namespace"""
+    return element.tag.rsplit("}", 1)[-1]
+
+
+def _child_text(element: Element, name: str) -> str | None:
+    for child in element:
+        if _local_name(child) == name:
+            return (child.text or "").strip() or None
+    return None
+
+
+def _parse_priority(value: str | None) -> float | None:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _parse_last_modified(value: str | None) -> datetime | None:
+    """Дата последнего изменения в UTC, даты без часового пояса считаются датами в UTC"""
+    if value is None:
+        return None
+    try:
+        last_modified = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if last_modified.tzinfo is None:
+        return last_modified.replace(tzinfo=UTC)
+    return last_modified.astimezone(UTC)
+
+
+def resolve_loc(loc: str, base_url: str | None = None) -> str | None:
+    """URL адрес из <loc>, относительный адрес разрешается относительно URL адреса sitemap.
+    Возвращает None, если адрес некорректен.
+    """
+    try:
+        return urljoin(base_url, loc) if base_url is not None else loc
+    except ValueError as e:
+        logger.warning("Invalid sitemap location %s, skip it, error: %s", loc, e)
+        return None
+
+
+def parse_url_element(element: Element, base_url: str | None = None) -> SitemapEntry | None:
+    """Преобразует элемент <url> в запись sitemap.
+
+    :param element: Элемент <url>.
+    :param base_url: URL адрес sitemap, относительно которого разрешается относительный <loc>.
+    :return Запись sitemap или None, если у элемента нет корректного <loc>.
+    """
+    loc = _child_text(element, "loc")
+    url = resolve_loc(loc, base_url) if loc is not None else None
+    if url is None:
+        return None
+    return SitemapEntry(
+        url=url,
+        priority=_parse_priority(_child_text(element, "priority")),
+        last_modified=_parse_last_modified(_child_text(element, "lastmod")),
+    )
+
+
+class CachedSitemap(BaseModel):
+    """Разобранный sitemap вместе с заголовками для условных запросов.
+
+    Attributes:
+        url: URL адрес sitemap.
+        etag: Значение заголовка ETag ответа.
+        last_modified: Значение заголовка Last-Modified ответа.
+        sitemaps: URL адреса вложенных sitemap (для индекса sitemap).
+        entries: Страницы sitemap.
+    """
+    url: str
+    etag: str | None = None
+    last_modified: str | None = None
+    sitemaps: list[str] = []
+    entries: list[SitemapEntry] = []
+
+    @property
+    def is_validatable(self) -> bool:
+        """Можно ли проверить актуальность sitemap условным запросом"""
+        return self.etag is not None or self.last_modified is not None
+
+    @property
+    def conditional_headers(self) -> dict[str, str]:
+        """Заголовки условного GET запроса"""
+        headers: dict[str, str] = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class SitemapCache:
+    """Кэш разобранных sitemap на локальном диске (JSON сжатый gzip),
+    ключом является URL адрес sitemap. При превышении размера вытесняются
+    давно не использованные sitemap.
+    """
+
+    def __init__(
+            self, directory: Path, disk_limit_mb: int = settings.scanner.sitemap_cache_disk_mb
+    ) -> None:
+        self._disk = _DiskTier(directory, disk_limit_mb * BYTES_IN_MEGABYTE, SITEMAP_FILE_SUFFIX)
+
+    @staticmethod
+    def _make_key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def _read(self, url: str) -> CachedSitemap | None:
+        value = self._disk.get(self._make_key(url))
+        if value is None:
+            return None
+        try:
+            sitemap = CachedSitemap.model_validate_json(gzip.decompress(value))
+        except (OSError, EOFError, ValidationError) as e:
+            logger.warning("Error while reading cached sitemap %s, error: %s", url, e)
+            return None
+        return sitemap if sitemap.url == url else None
+
+    def _write(self, sitemap: CachedSitemap) -> None:
+        value = gzip.compress(sitemap.model_dump_json().encode(), compresslevel=5)
+        self._disk.put(self._make_key(sitemap.url), value)
+
+    async def get(self, url: str) -> CachedSitemap | None:
+        """Получает разобранный sitemap из кэша"""
+        try:
+            return await asyncio.to_thread(self._read, url)
+        except OSError as e:
+            logger.warning("Error while reading cached sitemap %s, error: %s", url, e)
+            return None
+
+    async def put(self, sitemap: CachedSitemap) -> None:
+        """Сохраняет разобранный sitemap в кэш"""
+        try:
+            await asyncio.to_thread(self._write, sitemap)
+        except OSError as e:
+            logger.warning("Error while caching sitemap %s, error: %s", sitemap.url, e)
+
+
+@lru_cache(maxsize=1)
+def _create_sitemap_cache() -> SitemapCache:
+    # Один экземпляр на процесс, чтобы размер кэша учитывался для всех сканирований
+    return SitemapCache(settings.scanner.sitemap_cache_dir)
+
+
+def get_sitemap_cache() -> SitemapCache | None:
+    """Кэш sitemap согласно настройкам сканера"""
+    if not settings.scanner.sitemap_cache_enabled:
+        return None
+    return _create_sitemap_cache()
+
+
+async def iter_response_elements(response: httpx.Response) -> AsyncIterator[Element]:
+    """Потоково разбирает тело ответа с sitemap (в том числе сжатым gzip)
+    и возвращает элементы <url> и <sitemap> по мере разбора.
+
+    :param response: Потоковый ответ на запрос sitemap.
+    :return Разобранные элементы sitemap.
+    """
+    parser: XMLPullParser[Element] = XMLPullParser(events=("start", "end"))
+    decompressor: zlib._Decompress | None = None
+    root: Element | None = None
+    is_first_chunk = True
+    async for chunk in response.aiter_bytes():
+        if is_first_chunk:
+            is_first_chunk = False
+            if chunk.startswith(GZIP_MAGIC_NUMBER):
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        parser.feed(decompressor.decompress(chunk) if decompressor else chunk)
+        # Парсер подписан только на 'start' и 'end', события которых всегда содержат элемент
+        events = cast("Iterator[tuple[str, Element]]", parser.read_events())
+        for event, element in events:
+            if event == "start":
+                root = element if root is None else root
+                continue
+            if _local_name(element) in {"url", "sitemap"}:
+                yield element
+                # Освобождение памяти от уже обработанных элементов
+                if root is not None:
+                    root.clear()
+    parser.close()
+
+
+async def iter_sitemap_elements(
+        client: httpx.AsyncClient, url: str
+) -> AsyncIterator[Element]:
+    """Потоково загружает sitemap (в том числе сжатый gzip)
+    и возвращает элементы <url> и <sitemap> по мере разбора.
+
+    :param client: HTTP клиент.
+    :param url: URL адрес sitemap.
+    :return Разобранные элементы sitemap.
+    """
+    async with client.stream("GET", url) as response:
+        if response.status_code != httpx.codes.OK:
+            return
+        async for element in iter_response_elements(response):
+            yield element
+
+
+class _SitemapCrawler:
+    """Конкурентно обходит вложенные sitemap с ограничением запросов на один хост.
+    При наличии кэша sitemap запрашиваются условно, неизменившиеся sitemap берутся из кэша.
+    """
+
+    def __init__(
+            self,
+            client: httpx.AsyncClient,
+            queue: asyncio.Queue[SitemapEntry | None],
+            per_host_limit: int,
+            max_sitemaps: int,
+            cache: SitemapCache | None = None,
+    ) -> None:
+        self.client = client
+        self.queue = queue
+        self.max_sitemaps = max_sitemaps
+        self.cache = cache
+        self.seen: set[str] = set()
+        self.host_semaphores: defaultdict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(per_host_limit)
+        )
+
+    def schedule(self, group: asyncio.TaskGroup, url: str) -> None:
+        if url in self.seen or len(self.seen) >= self.max_sitemaps:
+            return
+        self.seen.add(url)
+        group.create_task(self.crawl(group, url))
+
+    async def crawl(self, group: asyncio.TaskGroup, url: str) -> None:
+        async with self.host_semaphores[urlparse(url).netloc]:
+            try:
+                await self._crawl(group, url)
+            # Некорректный <loc> в индексе sitemap пропускается, не прерывая обход остальных
+            except (httpx.HTTPError, httpx.InvalidURL, ParseError, zlib.error) as e:
+                logger.warning("Error while reading sitemap %s, error: %s", url, e)
+
+    async def _crawl(self, group: asyncio.TaskGroup, url: str) -> None:
+        cached = await self.cache.get(url) if self.cache is not None else None
+        headers = cached.conditional_headers if cached is not None else None
+        async with self.client.stream("GET", url, headers=headers) as response:
+            if response.status_code == httpx.codes.NOT_MODIFIED and cached is not None:
+                logger.debug("Sitemap %s is not modified, using cached entries", url)
+                await self._replay(group, cached)
+                return
+            if response.status_code != httpx.codes.OK:
+                return
+            sitemap = CachedSitemap(
+                url=url,
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified"),
+            )
+            # Кэшируются только sitemap, актуальность которых можно проверить условным запросом
+            is_cacheable = self.cache is not None and sitemap.is_validatable
+            # Относительные <loc> разрешаются относительно sitemap после редиректов
+            base_url = str(response.url)
+            async for element in iter_response_elements(response):
+                if _local_name(element) == "sitemap":
+                    loc = _child_text(element, "loc")
+                    sitemap_url = resolve_loc(loc, base_url) if loc is not None else None
+                    if sitemap_url is not None:
+                        sitemap.sitemaps.append(sitemap_url)
+                        self.schedule(group, sitemap_url)
+                    continue
+                entry = parse_url_element(element, base_url)
+                if entry is not None:
+                    if is_cacheable:
+                        sitemap.entries.append(entry)
+                    await self.queue.put(entry)
+        if is_cacheable and self.cache is not None:
+            await self.cache.put(sitemap)
+
+    async def _replay(self, group: asyncio.TaskGroup, sitemap: CachedSitemap) -> None:
+        """Повторно использует разобранный sitemap из кэша,
+        вложенные sitemap проверяются отдельными условными запросами.
+        """
+        for url in sitemap.sitemaps:
+            self.schedule(group, url)
+        for entry in sitemap.entries:
+            await self.queue.put(entry)
+
+    async def run(self, urls: list[str]) -> None:
+        try:
+            async with asyncio.TaskGroup() as group:
+                for url in urls:
+                    self.schedule(group, url)
+        finally:
+            await self.queue.put(None)
+
+
+async def iter_sitemap_entries(
+        client: httpx.AsyncClient,
+        urls: list[str],
+        per_host_limit: int = settings.scanner.sitemap_per_host_limit,
+        max_sitemaps: int = settings.scanner.max_sitemaps,
+        cache: SitemapCache | None = None,
+) -> AsyncIterator[SitemapEntry]:
+    """Конкурентно загружает sitemap и вложенные индексы,
+    возвращая страницы по мере их поступления.
+
+    :param client: HTTP клиент.
+    :param urls: URL адреса корневых sitemap.
+    :param per_host_limit: Максимальное количество одновременных загрузок с одного хоста.
+    :param max_sitemaps: Максимальное количество загружаемых sitemap.
+    :param cache: Кэш разобранных sitemap для условных запросов.
+    :return Страницы из sitemap.
+    """
+    queue: asyncio.Queue[SitemapEntry | None] = asyncio.Queue(maxsize=QUEUE_SIZE)
+    crawler = _SitemapCrawler(client, queue, per_host_limit, max_sitemaps, cache)
+    producer = asyncio.create_task(crawler.run(urls))
+    try:
+        while (entry := await queue.get()) is not None:
+            yield entry
+    finally:
+        producer.cancel()
+        with suppress(asyncio.CancelledError):
+            await producer
@@ -0,0 +1,160 @@
+"""Тематическая кластеризация страниц сайта: поиск тонких и каннибализирующих тем"""
+
+from typing import Final, NamedTuple
+
+import logging
+import math
+from collections.abc import Collection
+
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.preprocessing import normalize
+
+from ..schemas import LogLevel, Page, SEOLog
+from .duplicates import format_page_urls
+from .nlp import MIN_CLUSTER_SIZE, RANDOM_STATE, preprocess_texts
+from .rules import replace_site_findings
+
+logger = logging.getLogger(__name__)
+
+# Категория замечаний о темах, по ней замечания предыдущего сканирования заменяются новыми
+TOPICS_CATEGORY: Final[str] = "topics"
+# Размерность хешируемого словаря, ограничивает память SVD независимо от словаря сайта
+HASHING_FEATURES = 2 ** 17
+SVD_COMPONENTS = 100
+MAX_TOPICS = 100
+KMEANS_BATCH_SIZE = 1024
+# Минимальное количество значимых слов страницы для участия в кластеризации
+MIN_TOPIC_WORDS = 20
+# Медианное количество слов на страницах темы, ниже которого тема раскрыта слабо
+THIN_TOPIC_WORDS = 300
+# Косинусное сходство страницы с центром темы, выше которого страницы конкурируют за запросы
+CANNIBALIZATION_SIMILARITY = 0.9
+
+
+class Topic(NamedTuple):
+    """Тема - кластер близких по содержанию страниц.
+
+    Attributes:
+        page_indexes: Индексы страниц темы.
+        similarities: Косинусное сходство страниц с центром темы.
+    """
+    page_indexes: list[int]
+    similarities: list[float]
+
+
+def vectorize_topics(texts: list[str]) -> np.ndarray | None:
+    """Векторизует пред обработанные тексты в пространство тем ограниченного размера.
+
+    Хеширование слов не хранит словарь и ограничивает его размер, TF-IDF и SVD работают
+    с разреженной матрицей, поэтому память растёт линейно с количеством страниц.
+
+    :param texts: Пред обработанные тексты страниц.
+    :return Нормированные векторы текстов или None, если страниц или различных слов
+    слишком мало для пространства тем больше чем из одного измерения.
+    """
+    hashing_vectorizer = HashingVectorizer(
+        n_features=HASHING_FEATURES, alternate_sign=False, norm=None, dtype=np.float32
+    )
+    tfidf_matrix = TfidfTransformer(sublinear_tf=True).fit_transform(
+        hashing_vectorizer.transform(texts)
+    ).tocsr()
+    # Неиспользуемые хеши отбрасываются, SVD хранит плотную матрицу размером со словарь
+    tfidf_matrix = tfidf_matrix[:, np.unique(tfidf_matrix.indices)]
+    # Размерность SVD должна быть меньше количества страниц и количества различных слов
+    n_components = min(SVD_COMPONENTS, len(texts) - 1, tfidf_matrix.shape[1] - 1)
+    if n_components <= 1:
+        return None
+    svd = TruncatedSVD(n_components=n_components, random_state=RANDOM_STATE)
+    return normalize(svd.fit_transform(tfidf_matrix)).astype(np.float32)
+
+
+def cluster_topics(texts: list[str]) -> list[Topic]:
+    """Группирует тексты страниц по темам с помощью MiniBatchKMeans.
+
+    :param texts: Текстовый контент страниц.
+    :return Темы из не менее чем MIN_CLUSTER_SIZE страниц.
+    """
+    processed_texts = preprocess_texts(texts)
+    indexes = [
+        i for i, text in enumerate(processed_texts) if len(text.split()) >= MIN_TOPIC_WORDS
+    ]
+    if len(indexes) < 2 * MIN_CLUSTER_SIZE:
+        return []
+    vectors = vectorize_topics([processed_texts[i] for i in indexes])
+    if vectors is None:
+        logger.info("Vocabulary of %s pages is too small for clustering", len(indexes))
+        return []
+    n_clusters = min(MAX_TOPICS, max(2, round(math.sqrt(len(indexes)))))
+    kmeans = MiniBatchKMeans(
+        n_clusters=n_clusters,
+        batch_size=KMEANS_BATCH_SIZE,
+        n_init=3,
+        random_state=RANDOM_STATE,
+    )
+    labels = kmeans.fit_predict(vectors)
+    centroids = normalize(kmeans.cluster_centers_)
+    similarities = np.einsum("ij,ij->i", vectors, centroids[labels])
+    topics: list[Topic] = []
+    for label in range(n_clusters):
+        members = np.flatnonzero(labels == label)
+        if len(members) < MIN_CLUSTER_SIZE:
+            continue
+        topics.append(Topic(
+            page_indexes=[indexes[member] for member in members],
+            similarities=similarities[members].tolist(),
+        ))
+    logger.info("Clustered %s pages into %s topics", len(indexes), len(topics))
+    return topics
+
+
+def find_topic_issues(pages: list[Page]) -> dict[int, list[SEOLog]]:
+    """Находит тонкие и каннибализирующие темы сайта.
+
+    Тонкая тема раскрыта страницами с малым количеством текста. Каннибализирующая тема
+    содержит несколько почти одинаковых по содержанию страниц, конкурирующих за одни запросы.
+
+    :param pages: Отсканированные страницы сайта.
+    :return Замечания о темах по индексам страниц.
+    """
+    findings: dict[int, list[SEOLog]] = {}
+    for topic in cluster_topics([page.content.text for page in pages]):
+        word_count = float(np.median([
+            len(pages[i].content.text.split()) for i in topic.page_indexes
+        ]))
+        if word_count < THIN_TOPIC_WORDS:
+            for i in topic.page_indexes:
+                findings.setdefault(i, []).append(SEOLog(
+                    level=LogLevel.WARNING,
+                    message=f"Тема страниц слабо раскрыта: медиана {word_count:.0f} слов "
+                            f"на {len(topic.page_indexes)} страницах темы",
+                    category=TOPICS_CATEGORY,
+                    element="body",
+                ))
+        competing = [
+            i for i, similarity in zip(topic.page_indexes, topic.similarities, strict=True)
+            if similarity >= CANNIBALIZATION_SIMILARITY
+        ]
+        if len(competing) < MIN_CLUSTER_SIZE:
+            continue
+        for i in competing:
+            findings.setdefault(i, []).append(SEOLog(
+                level=LogLevel.WARNING,
+                message="Страница конкурирует за одну тему со страницами: "
+                        f"{format_page_urls(pages, (j for j in competing if j != i))}",
+                category=TOPICS_CATEGORY,
+                element="body",
+            ))
+    return findings
+
+
+def lint_topics(pages: list[Page], indexes: Collection[int]) -> None:
+    """Добавляет в SEO логи страниц замечания о темах сайта,
+    заменяя замечания о темах, скопированные из предыдущего сканирования.
+
+    :param pages: Отсканированные страницы сайта, темы выделяются среди всех них.
+    :param indexes: Индексы страниц, которым добавляются замечания.
+    """
+    replace_site_findings(pages, indexes, TOPICS_CATEGORY, find_topic_issues(pages))
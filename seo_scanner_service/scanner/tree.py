@@ -2,14 +2,31 @@
 
 from __future__ import annotations
 
+from typing import TextIO
+
+import asyncio
+import heapq
+import logging
+import sys
 from collections.abc import Iterator
 from datetime import datetime
+from operator import itemgetter
 from urllib.parse import urlparse
 
-from pydantic import BaseModel, Field, HttpUrl, field_validator
+from pydantic import BaseModel, Field, HttpUrl, PrivateAttr, field_validator
 from usp.objects.page import SitemapPage
 from usp.tree import sitemap_tree_for_homepage
 
+from .fetching import create_http_client
+from .sitemaps import (
+    SitemapEntry,
+    discover_sitemap_urls,
+    get_sitemap_cache,
+    iter_sitemap_entries,
+)
+
+logger = logging.getLogger(__name__)
+
 PRIORITY_KEYWORDS: tuple[str, ...] = (
     "product",
     "services",
@@ -48,25 +65,48 @@ def parse_url_path(url: str) -> list[str]:
     return [segment for segment in path.strip("/").split("/") if segment]
 
 
-class TreeNode(BaseModel):
-    """Узел дерева структуры страниц сайта"""
+def parse_last_modified(value: object) -> datetime | None:
+    """Приводит дату последнего изменения страницы к datetime"""
+    if not value or value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except (ValueError, AttributeError):
+            return None
+    return value if isinstance(value, datetime) else None
+
+
+def get_url_key(url: HttpUrl | str) -> str:
+    """Ключ URL адреса для индекса дерева (без завершающего слэша)"""
+    return str(url).rstrip("/")
+
+
+class TreeNode(BaseModel):  # noqa: PLR0904
+    """Узел дерева структуры страниц сайта.
+
+    Каждый узел хранит ссылку на родителя, а корень дерева - индекс URL -> узел,
+    который строится при первом обращении и поддерживается методом add_child.
+    """
     name: str
     url: HttpUrl
     priority: float | None = None
     last_modified: datetime | None = None
     children: list[TreeNode] = Field(default_factory=list)
 
+    _parent: TreeNode | None = PrivateAttr(default=None)
+    _index: dict[str, TreeNode] | None = PrivateAttr(default=None)
+
+    def model_post_init(self, _context: object, /) -> None:
+        for child in self.children:
+            child.parent = self
+
     @field_validator("last_modified", mode="before")
     @classmethod
     def validate_last_modified(cls, value: str | None) -> datetime | None:
-        if not value or value is None:
-            return None
         if isinstance(value, str):
-            try:
-                return datetime.fromisoformat(value)
-            except (ValueError, AttributeError):
-                return None
-        return value
+            return parse_last_modified(value)
+        return value or None
 
     @property
     def sections(self) -> list[str]:
@@ -86,24 +126,101 @@ class TreeNode(BaseModel):
         """Является ли узел листом"""
         return len(self.children) == 0
 
+    @property
+    def parent(self) -> TreeNode | None:
+        """Родительский узел"""
+        return self._parent
+
+    @parent.setter
+    def parent(self, node: TreeNode | None) -> None:
+        self._parent = node
+
+    @property
+    def root(self) -> TreeNode:
+        """Корень дерева"""
+        node = self
+        while node.parent is not None:
+            node = node.parent
+        return node
+
+    @property
+    def url_index(self) -> dict[str, TreeNode]:
+        """Индекс URL -> узел всего дерева, строится при первом обращении"""
+        root = self.root
+        if root is not self:
+            return root.url_index
+        if self._index is None:
+            index: dict[str, TreeNode] = {}
+            for node in self.iter_nodes():
+                index.setdefault(get_url_key(node.url), node)
+                for child in node.children:
+                    child.parent = node
+            self._index = index
+        return self._index
+
+    @property
+    def is_indexed(self) -> bool:
+        """Построен ли индекс URL для дерева"""
+        return self.root._index is not None  # noqa: SLF001
+
+    def iter_ancestors(self) -> Iterator[TreeNode]:
+        """Итерация по предкам узла от родителя до корня"""
+        node = self.parent
+        while node is not None:
+            yield node
+            node = node.parent
+
+    def get_section(self) -> TreeNode | None:
+        """Раздел сайта (узел первого уровня) в котором находится страница"""
+        if self.parent is None:
+            return None
+        node = self
+        while node.parent is not None and node.parent.parent is not None:
+            node = node.parent
+        return node
+
+    def is_ancestor_of(self, node: TreeNode) -> bool:
+        """Находится ли узел в поддереве текущего узла"""
+        return any(ancestor is self for ancestor in node.iter_ancestors())
+
+    def add_child(self, child: TreeNode) -> TreeNode:
+        """Добавляет дочерний узел с сохранением ссылки на родителя и индекса URL"""
+        child.parent = self
+        self.children.append(child)
+        if self.is_indexed:
+            index = self.url_index
+            for node in child.iter_nodes():
+                index.setdefault(get_url_key(node.url), node)
+        return child
+
     def max_depth(self) -> int:
         """Максимальная глубина дерева"""
-        if not self.children:
-            return 0
-        return max(child.max_depth() for child in self.children) + 1
+        depth = 0
+        stack: list[tuple[TreeNode, int]] = [(self, 0)]
+        while stack:
+            node, node_depth = stack.pop()
+            depth = max(depth, node_depth)
+            stack.extend((child, node_depth + 1) for child in node.children)
+        return depth
 
     def count_nodes(self) -> int:
         """Подсчитывает общее количество узлов в дереве"""
-        count = 1
-        for child in self.children:
-            count += child.count_nodes()
+        count = 0
+        stack: list[TreeNode] = [self]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children)
         return count
 
     def iter_nodes(self) -> Iterator[TreeNode]:
-        """Итерация по всем узлам дерева"""
-        yield self
-        for child in self.children:
-            yield from child.iter_nodes()
+        """Итерация по всем узлам дерева в прямом порядке (родитель перед потомками)"""
+        stack: list[TreeNode] = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            # Потомки кладутся в обратном порядке, чтобы первый потомок был обработан первым
+            stack.extend(reversed(node.children))
 
     def iter_leaves(self) -> Iterator[TreeNode]:
         """Итерация по листьям дерева"""
@@ -111,21 +228,28 @@ class TreeNode(BaseModel):
             if node.is_leaf:
                 yield node
 
-    def find_node(self, url: str) -> TreeNode | None:
-        """Рекурсивный поиск страницы по её URL"""
-        if self.url == url:
-            return self
-        for child in self.children:
-            found = child.find_node(url)
-            if found:
-                return found
-        return None
+    def find_node(self, url: HttpUrl | str) -> TreeNode | None:
+        """Поиск страницы в поддереве по её URL через индекс корня дерева"""
+        node = self.url_index.get(get_url_key(url))
+        if node is None or (node is not self and not self.is_ancestor_of(node)):
+            return None
+        return node
 
     def to_string(self, max_depth: int | None = None) -> str:
         """Представление дерева в человеко-читаемом формате"""
-        lines: list[str] = []
-        self.draw_tree_lines(lines, max_depth=max_depth)
-        return "\n".join(lines)
+        return "\n".join(self.iter_tree_lines(max_depth))
+
+    def write_tree(self, file: TextIO, max_depth: int | None = None) -> None:
+        """Построчно записывает представление дерева в файлоподобный объект
+        без формирования всего представления в памяти.
+
+        :param file: Файлоподобный объект открытый на запись текста.
+        :param max_depth: Максимальная глубина отображения.
+        """
+        for i, line in enumerate(self.iter_tree_lines(max_depth)):
+            if i:
+                file.write("\n")
+            file.write(line)
 
     def draw_tree_lines(
             self,
@@ -136,29 +260,45 @@ class TreeNode(BaseModel):
             is_last: bool = True,
     ) -> None:
         """Формирует строковое представление для отображения дерева"""
-        if max_depth is not None and current_depth >= max_depth:
-            return
+        lines.extend(self.iter_tree_lines(max_depth, current_depth, prefix, is_last))
+
+    def iter_tree_lines(
+            self,
+            max_depth: int | None = None,
+            current_depth: int = 0,
+            prefix: str = "",
+            is_last: bool = True,
+    ) -> Iterator[str]:
+        """Итерация по строкам представления дерева в порядке отображения"""
+        stack: list[tuple[TreeNode, int, str, bool]] = [(self, current_depth, prefix, is_last)]
+        while stack:
+            node, depth, node_prefix, node_is_last = stack.pop()
+            if max_depth is not None and depth >= max_depth:
+                continue
+            yield node.format_tree_line(depth, node_prefix, node_is_last)
+            if depth == 0:
+                child_prefix = node_prefix
+            else:
+                child_prefix = node_prefix + ("    " if node_is_last else "│   ")
+            last_index = len(node.children) - 1
+            stack.extend(
+                (child, depth + 1, child_prefix, i == last_index)
+                for i, child in reversed(list(enumerate(node.children)))
+            )
+
+    def format_tree_line(self, depth: int = 0, prefix: str = "", is_last: bool = True) -> str:
+        """Строка представления узла в дереве"""
         meta_parts: list[str] = []
         if self.priority is not None:
             meta_parts.append(f"Приоритет: {self.priority}")
         if self.last_modified:
             meta_parts.append(f"Последнее изменение: {self.last_modified.strftime("%d.%m.%Y")}")
         meta_str = " [" + ", ".join(meta_parts) + "]" if meta_parts else ""
-        if current_depth == 0:
-            icon = "🌐"
-            line = f"{icon} {self.name} ({self.url}){meta_str}"
-            lines.append(line)
-        else:
-            icon = "📄" if self.is_leaf else "📁"
-            connector = "└── " if is_last else "├── "
-            line = f"{prefix}{connector}{icon} {self.name}{meta_str}"
-            lines.append(line)
-        new_prefix = prefix if current_depth == 0 else prefix + ("    " if is_last else "│   ")
-        for i, child in enumerate(self.children):
-            is_last_child = (i == len(self.children) - 1)
-            child.draw_tree_lines(
-                lines, max_depth, current_depth + 1, new_prefix, is_last_child
-            )
+        if depth == 0:
+            return f"🌐 {self.name} ({self.url}){meta_str}"
+        icon = "📄" if self.is_leaf else "📁"
+        connector = "└── " if is_last else "├── "
+        return f"{prefix}{connector}{icon} {self.name}{meta_str}"
 
     def last_site_change(self) -> datetime | None:
         """Последнее изменение на сайте"""
@@ -178,45 +318,138 @@ class TreeNode(BaseModel):
         return max(nodes, key=lambda x: x.last_modified, default=None)
 
     def __hash__(self) -> int:
-        return hash(self.url)
+        return hash(str(self.url))
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, TreeNode):
             return False
-        return self.url == other.url
+        return str(self.url) == str(other.url)
 
 
 def add_page_to_tree(
         base_url: HttpUrl,
         root: TreeNode,
-        page: SitemapPage,
+        page: SitemapPage | SitemapEntry,
         segments: list[str],
         current_depth: int = 0
 ) -> None:
-    if current_depth >= len(segments):
-        return
-    current_segment = segments[current_depth]
-    node: TreeNode | None = next(
-        (child for child in root.children if child.name == current_segment), None
-    )
-    if node is None:
-        path_part = "/".join(segments[:current_depth + 1])
-        full_url = f"{str(base_url).rstrip("/")}/{path_part}"
-        node = TreeNode.model_validate({
-            "name": current_segment,
-            "url": full_url,
-            "priority": page.priority,
-            "last_modified": page.last_modified,
-        })
-        root.children.append(node)
-    add_page_to_tree(base_url, node, page, segments, current_depth + 1)
-
-
-def build_site_tree(url: HttpUrl) -> TreeNode:
-    """Рекурсивно строит дерево сайта по страницам из sitemap.xml.
+    base = str(base_url).rstrip("/")
+    parent = root
+    for depth in range(current_depth, len(segments)):
+        current_segment = segments[depth]
+        node: TreeNode | None = next(
+            (child for child in parent.children if child.name == current_segment), None
+        )
+        if node is None:
+            path_part = "/".join(segments[:depth + 1])
+            node = TreeNode.model_validate({
+                "name": current_segment,
+                "url": f"{base}/{path_part}",
+                "priority": page.priority,
+                "last_modified": page.last_modified,
+            })
+            parent.add_child(node)
+        parent = node
+
+
+class _TrieNode:
+    """Компактный узел дерева сайта"""
+    __slots__ = ("children", "last_modified", "name", "priority")
+
+    def __init__(
+            self,
+            name: str,
+            priority: float | None = None,
+            last_modified: datetime | None = None,
+    ) -> None:
+        self.name = name
+        self.priority = priority
+        self.last_modified = last_modified
+        self.children: dict[str, _TrieNode] = {}
+
+
+class SiteTrie:
+    """Компактное префиксное дерево страниц сайта для построения по большим sitemap.
+
+    Узлы хранятся в __slots__ объектах, дочерние узлы доступны по сегменту пути за O(1),
+    сегменты интернируются, а URL адреса строятся только при преобразовании в TreeNode.
+    """
+    __slots__ = ("base_url", "root", "size", "url")
+
+    def __init__(self, url: HttpUrl, name: str) -> None:
+        self.url = url
+        self.base_url = str(url).rstrip("/")
+        self.root = _TrieNode(name)
+        self.size = 1
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add_page(self, page: SitemapPage | SitemapEntry) -> None:
+        """Добавляет страницу, недостающие узлы получают её приоритет и дату изменения"""
+        priority = float(page.priority) if page.priority is not None else None
+        last_modified = parse_last_modified(page.last_modified)
+        node = self.root
+        for segment in parse_url_path(page.url):
+            child = node.children.get(segment)
+            if child is None:
+                name = sys.intern(segment)
+                child = _TrieNode(name, priority, last_modified)
+                node.children[name] = child
+                self.size += 1
+            node = child
+
+    def find(self, url: HttpUrl | str) -> _TrieNode | None:
+        """Поиск узла страницы по её URL без построения URL адресов остальных узлов"""
+        key = get_url_key(url)
+        if key == self.base_url:
+            return self.root
+        if not key.startswith(f"{self.base_url}/"):
+            return None
+        node: _TrieNode | None = self.root
+        for segment in key[len(self.base_url) + 1:].split("/"):
+            if node is None:
+                break
+            node = node.children.get(segment)
+        return node
+
+    def to_tree_node(self) -> TreeNode:
+        """Преобразует компактное дерево в дерево TreeNode.
+        Дорогая операция для больших сайтов, выполняется только для сохранения
+        или отображения дерева.
+        """
+        root = TreeNode(name=self.root.name, url=self.url)
+        stack: list[tuple[_TrieNode, TreeNode, str]] = [(self.root, root, self.base_url)]
+        while stack:
+            trie_node, tree_node, url = stack.pop()
+            for name, child in trie_node.children.items():
+                child_url = f"{url}/{name}"
+                # Значения уже приведены к нужным типам, валидируется только URL
+                child_tree_node = TreeNode.model_construct(
+                    name=name,
+                    url=HttpUrl(child_url),
+                    priority=child.priority,
+                    last_modified=child.last_modified,
+                    children=[],
+                )
+                child_tree_node.parent = tree_node
+                tree_node.children.append(child_tree_node)
+                stack.append((child, child_tree_node, child_url))
+        return root
+
+
+def _get_sitemap_pages(url: HttpUrl) -> list[SitemapPage]:
+    """Синхронно получает страницы через ultimate-sitemap-parser"""
+    sitemap = sitemap_tree_for_homepage(str(url), use_robots=False)
+    return list(sitemap.all_pages())
+
+
+async def build_site_trie(url: HttpUrl) -> SiteTrie:
+    """Строит компактное дерево сайта по страницам из sitemap.xml.
+    Страницы добавляются в дерево по мере загрузки sitemap без блокировки event loop.
 
     :param url: URL адрес сайта.
-    :return Построенное дерево структуры сайта.
+    :return Построенное компактное дерево структуры сайта.
     """
     name = (
         str(url)
@@ -224,46 +457,54 @@ def build_site_tree(url: HttpUrl) -> TreeNode:
         .replace("https://", "")
         .replace("/", "")
     )
-    root = TreeNode(name=name, url=url)
-    sitemap = sitemap_tree_for_homepage(str(url), use_robots=False)
-    for page in sitemap.all_pages():
-        segments = parse_url_path(page.url)
-        add_page_to_tree(url, root, page, segments)
-    return root
-
+    trie = SiteTrie(url, name)
+    page_count = 0
+    async with create_http_client() as client:
+        async for entry in iter_sitemap_entries(
+                client, discover_sitemap_urls(url), cache=get_sitemap_cache()
+        ):
+            trie.add_page(entry)
+            page_count += 1
+    if page_count > 0:
+        return trie
+    # Sitemap не найден по стандартным расположениям, поиск через ultimate-sitemap-parser
+    logger.info("Sitemap of %s is not found, fallback to ultimate-sitemap-parser", url)
+    for page in await asyncio.to_thread(_get_sitemap_pages, url):
+        trie.add_page(page)
+    return trie
+
+
+async def build_site_tree(url: HttpUrl) -> TreeNode:
+    """Строит дерево сайта по страницам из sitemap.xml для сохранения или отображения.
+    Для отбора ключевых страниц достаточно компактного дерева из build_site_trie.
 
-def _get_path_segments(url: HttpUrl) -> list[str]:
-    """Получение сегментов URL адреса,
-    пример: 'http://example.ru/services/3' -> ['services', '3']
-
-    :param url: Адрес страницы для разбиения.
-    :return Секции на странице.
+    :param url: URL адрес сайта.
+    :return Построенное дерево структуры сайта.
     """
-    parsed = urlparse(str(url))
-    return [section for section in parsed.path.strip("/").split("/") if section]
+    trie = await build_site_trie(url)
+    return trie.to_tree_node()
 
 
-def _sort_by_last_modified(nodes: list[TreeNode]) -> list[TreeNode]:
-    """Сортировка по последней дате изменений"""
-    with_dates: list[TreeNode] = []
-    without_dates: list[TreeNode] = []
-    for node in nodes:
+def _sort_by_last_modified(nodes: list[tuple[str, _TrieNode]]) -> list[tuple[str, _TrieNode]]:
+    """Сортировка узлов с их URL адресами по последней дате изменений"""
+    with_dates: list[tuple[str, _TrieNode]] = []
+    without_dates: list[tuple[str, _TrieNode]] = []
+    for url, node in nodes:
         if node.last_modified is None:
-            without_dates.append(node)
+            without_dates.append((url, node))
         else:
-            with_dates.append(node)
-    with_dates.sort(key=lambda node: node.last_modified, reverse=True)
+            with_dates.append((url, node))
+    with_dates.sort(key=lambda item: item[1].last_modified, reverse=True)  # type: ignore[arg-type, return-value]
     return with_dates + without_dates
 
 
-def _is_denied_url(url: HttpUrl) -> bool:
+def _is_denied_url(url: str) -> bool:
     """Проверка URL на запрещённый, True если запрещён, False если разрешён"""
-    return not any(
-        str(url).split(".")[-1].lower().endswith(extension) for extension in DENIED_EXTENSIONS
-    )
+    extension_part = url.rsplit(".", maxsplit=1)[-1].lower()
+    return not any(extension_part.endswith(extension) for extension in DENIED_EXTENSIONS)
 
 
-def _get_node_sort_key(node: TreeNode) -> tuple[float, float, float]:
+def _get_node_sort_key(node: _TrieNode, depth: int) -> tuple[float, float, float]:
     """Сортировка узлов
      - Высокий приоритет из sitemap.xml (если есть)
      - Дата изменения (сначала новые)
@@ -271,56 +512,99 @@ def _get_node_sort_key(node: TreeNode) -> tuple[float, float, float]:
     """
     priority_score = node.priority if node.priority is not None else 0.5
     date_score = node.last_modified.timestamp() if node.last_modified else 0
-    depth_penalty = len(_get_path_segments(node.url)) * 0.01
+    depth_penalty = depth * 0.01
     return -priority_score, -date_score, depth_penalty
 
 
+# Ключ ранжирования узла: ключ сортировки и порядковый номер узла при обходе дерева
+RankKey = tuple[tuple[float, float, float], int]
+
+
+class _TopLeaves:
+    """Ограниченная куча для отбора k лучших листьев за один проход"""
+    __slots__ = ("heap", "size")
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        # Хранятся инвертированные ключи, поэтому на вершине кучи худший из отобранных листьев
+        self.heap: list[tuple[tuple[float, float, float], int, str]] = []
+
+    def push(self, rank_key: RankKey, url: str) -> None:
+        (priority_score, date_score, depth_penalty), order = rank_key
+        item = ((-priority_score, -date_score, -depth_penalty), -order, url)
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, item)
+        elif self.size > 0 and item[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, item)
+
+    def sorted_urls(self) -> list[str]:
+        items = sorted(self.heap, key=itemgetter(0, 1), reverse=True)
+        return [url for _, _, url in items]
+
+
 def extract_key_pages(  # noqa: C901
-        tree: TreeNode, key_segments: list[str], max_result: int = 15
+        trie: SiteTrie, key_segments: list[str], max_result: int = 15
 ) -> list[HttpUrl]:
-    """Извлекает URL ключевых страниц сайта.
+    """Извлекает URL ключевых страниц сайта за один обход компактного дерева.
+    URL адреса валидируются только для отобранных страниц.
 
-    :param tree: Дерево сайта.
+    :param trie: Компактное дерево сайта.
     :param key_segments: Ключевые секции сайта которые нужно посетить.
     :param max_result: Максимальное количество извлекаемых страниц.
     :return Уникальные ключевые URL адреса сайта.
     """
-    key_pages: set[HttpUrl] = {tree.url}  # Добавление главной страницы сайта
-    nodes_with_key_segments: list[TreeNode] = []  # Узлы содержащие ключевые сегменты
-    used_segments: set[str] = set()  # Использованные сегменты для избежания двойной обработки
+    # Позиция ключевого сегмента определяет его приоритет при нахождении в пути
+    key_positions: dict[str, int] = {}
+    for position, key_segment in enumerate(key_segments):
+        key_positions.setdefault(key_segment, position)
+    no_position = len(key_segments)
+    last_changed: tuple[str, datetime] | None = None
+    # Лучший узел для каждого ключевого сегмента
+    best_nodes: dict[str, tuple[RankKey, str, _TrieNode]] = {}
+    top_leaves = _TopLeaves(max(max_result, 0))
+    # Минимальная позиция ключевого сегмента в пути наследуется от родителя
+    stack: list[tuple[_TrieNode, str, int, int]] = [(trie.root, trie.base_url, 0, no_position)]
+    order = 0
+    while stack:
+        node, url, depth, position = stack.pop()
+        if node.last_modified is not None and (
+                last_changed is None or node.last_modified > last_changed[1]
+        ):
+            last_changed = (url, node.last_modified)
+        rank_key = (_get_node_sort_key(node, depth), order)
+        order += 1
+        if not node.children:
+            top_leaves.push(rank_key, url)
+        if depth > 0:
+            position = min(position, key_positions.get(node.name, no_position))
+        stack.extend(
+            (child, f"{url}/{name}", depth + 1, position)
+            for name, child in reversed(node.children.items())
+        )
+        if position == no_position or not _is_denied_url(url):
+            continue
+        found_key_segment = key_segments[position]
+        best = best_nodes.get(found_key_segment)
+        if best is None or rank_key < best[0]:
+            best_nodes[found_key_segment] = (rank_key, url, node)
+    # Словарь сохраняет порядок добавления страниц
+    key_pages: dict[str, None] = {trie.base_url: None}  # Добавление главной страницы сайта
     # Добавление последней изменённой страницы
-    last_changed_node = tree.last_changed_node()
-    if last_changed_node is not None:
-        key_pages.add(last_changed_node.url)
-    for node in tree.iter_nodes():
-        if len(key_pages) > max_result:
-            break
-        segments = _get_path_segments(node.url)
-        # Проверка наличия ключевых сегментов в пути
-        has_key_segment = any(key_segment in segments for key_segment in key_segments)
-        if has_key_segment and _is_denied_url(node.url):
-            nodes_with_key_segments.append(node)
-    nodes_with_key_segments.sort(key=_get_node_sort_key)
-    for node_with_key_segment in nodes_with_key_segments:
-        if len(key_pages) >= max_result:
-            break
-        segments = _get_path_segments(node_with_key_segment.url)
-        # Нахождение ключевого сегмента в узле
-        found_key_segment = next((
-            key_segment for key_segment in key_segments if key_segment in segments
-        ), None)
-        if found_key_segment is not None and found_key_segment not in used_segments:
-            key_pages.add(node_with_key_segment.url)
-            used_segments.add(found_key_segment)
+    if last_changed is not None:
+        key_pages[last_changed[0]] = None
+    if len(key_pages) <= max_result:
+        for _, url, node in sorted(best_nodes.values(), key=itemgetter(0)):
+            if len(key_pages) >= max_result:
+                break
+            key_pages[url] = None
             # Добавление свежих дочерних страниц из текущей директории
-            if not node_with_key_segment.is_leaf:
-                children = _sort_by_last_modified(node_with_key_segment.children)
-                for child in children:
-                    if len(key_pages) < max_result and _is_denied_url(child.url):
-                        key_pages.add(child.url)
+            children = [(f"{url}/{name}", child) for name, child in node.children.items()]
+            for child_url, _ in _sort_by_last_modified(children):
+                if len(key_pages) < max_result and _is_denied_url(child_url):
+                    key_pages[child_url] = None
     # Если не набрано достаточное количество страниц, то добавляются популярные листья
     if len(key_pages) < max_result:
-        leaves = list(tree.iter_leaves())
-        leaves.sort(key=_get_node_sort_key)
-        key_pages.update(leaf.url for leaf in leaves[:max_result - len(key_pages)])
-    return list(key_pages)
+        leaves = top_leaves.sorted_urls()
+        for url in leaves[:max_result - len(key_pages)]:
+            key_pages[url] = None
+    return [trie.url if url == trie.base_url else HttpUrl(url) for url in key_pages]
@@ -1,20 +1,61 @@
-from typing import Any, TypeVar
+from typing import Any, Literal, TypeVar
 
 import logging
 import time
-from collections.abc import AsyncIterator, Callable
+from collections.abc import Callable
 from functools import wraps
 
-from playwright.async_api import Browser, Page
-from pydantic import HttpUrl
-from tqdm import tqdm
-
-from .stealth import create_new_stealth_context
+from playwright.async_api import Page
 
 TIMEOUT = 600
 MIN_TEXT_LENGTH = 10
 MIN_SCROLL_ATTEMPT = 10
 LARGE_PAGE_SCROLL_STEP = 1000
+# Допуск при проверке достижения конца страницы в пикселях
+SCROLL_END_TOLERANCE = 10
+
+# JS скрипт возвращающий высоту страницы и текущую позицию за один вызов
+JS_SCROLL_METRICS_SCRIPT = """
+() => [
+    Math.max(
+        document.body.scrollHeight, document.documentElement.scrollHeight,
+        document.body.offsetHeight, document.documentElement.offsetHeight,
+        document.body.clientHeight, document.documentElement.clientHeight
+    ),
+    window.pageYOffset + window.innerHeight
+]
+"""
+# JS скрипт мгновенного скролла в конец страницы с ожиданием затишья DOM и сети
+JS_FAST_SCROLL_SCRIPT = """
+([quietPeriod, maxWait]) => new Promise((resolve) => {
+    const metrics = () => [
+        Math.max(document.body.scrollHeight, document.documentElement.scrollHeight),
+        window.pageYOffset + window.innerHeight
+    ];
+    window.scrollTo({top: document.body.scrollHeight, behavior: 'instant'});
+    let quietTimer = null;
+    let maxTimer = null;
+    const mutationObserver = new MutationObserver(() => restart());
+    const resourceObserver = new PerformanceObserver(() => restart());
+    const finish = () => {
+        mutationObserver.disconnect();
+        resourceObserver.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(maxTimer);
+        resolve(metrics());
+    };
+    const restart = () => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(finish, quietPeriod);
+    };
+    mutationObserver.observe(document.documentElement, {childList: true, subtree: true});
+    resourceObserver.observe({type: 'resource', buffered: false});
+    maxTimer = setTimeout(finish, maxWait);
+    restart();
+})
+"""
+
+ScrollMode = Literal["fast", "thorough"]
 
 logger = logging.getLogger(__name__)
 
@@ -52,35 +93,6 @@ def timer[T](func: Callable[..., T]) -> Callable[..., T]:
     return async_wrapper if hasattr(func, "__await__") else sync_wrapper
 
 
-async def get_current_page(browser: Browser) -> Page:
-    """Получает текущую страницу в браузере.
-
-    :param browser: Playwright браузер.
-    :return Текущая страница.
-    """
-    if not browser.contexts:
-        context = await create_new_stealth_context(browser)
-        return await context.new_page()
-    context = browser.contexts[0]
-    if not context.pages:
-        return await context.new_page()
-    return context.pages[-1]
-
-
-async def iter_pages(browser: Browser, urls: list[HttpUrl]) -> AsyncIterator[Page]:
-    """Итерация по Playwright страницам.
-    Открывает страницу используя Stealth context.
-
-    :param browser: Текущий Playwright браузер.
-    :param urls: URL страниц, которые нужно посетить.
-    :return Открытая страница.
-    """
-    for url in tqdm(urls):
-        page = await get_current_page(browser)
-        await page.goto(str(url))
-        yield page
-
-
 async def smooth_scroll(page: Page, step: int) -> bool:
     """Выполняет один шаг скролла и возвращает True если достигнут конец"""
     scrolled = await page.evaluate(f"""
@@ -100,7 +112,8 @@ async def scroll_page_to_bottom(
         page: Page,
         scroll_delay: int = 1000,
         scroll_step: int = 300,
-        max_scroll_attempts: int = 100
+        max_scroll_attempts: int = 100,
+        time_budget: float | None = None,
 ) -> None:
     """Плавный скроллинг страницы до её конца.
 
@@ -108,30 +121,78 @@ async def scroll_page_to_bottom(
     :param scroll_delay: Задержка между скроллами в миллисекундах.
     :param scroll_step: Размер шага скролла в пикселях (по умолчанию 300 px).
     :param max_scroll_attempts: Максимальное количество попыток скролла страницы.
+    :param time_budget: Максимальное время скроллинга в секундах.
     """
+    deadline = None if time_budget is None else time.monotonic() + time_budget
     scroll_attempts = 0
     last_height = await page.evaluate(
         "document.body.scrollHeight || document.documentElement.scrollHeight"
     )
     while scroll_attempts < max_scroll_attempts:
+        if deadline is not None and time.monotonic() >= deadline:
+            logger.info("Scroll time budget exceeded for %s", page.url)
+            break
         scroll_attempts += 1
         reached_end = await smooth_scroll(page, scroll_step)
         if reached_end:
             break
         await page.wait_for_timeout(scroll_delay)
-        new_height = await page.evaluate(  # Проверка изменение высоты
-            "Math.max(document.body.scrollHeight, document.documentElement.scrollHeight, "
-            "document.body.offsetHeight, document.documentElement.offsetHeight, "
-            "document.body.clientHeight, document.documentElement.clientHeight)"
-        )
-        current_position = await page.evaluate(  # Проверка текущей позиции
-            "window.pageYOffset + window.innerHeight"
-        )
+        # Проверка изменения высоты и текущей позиции
+        new_height, current_position = await page.evaluate(JS_SCROLL_METRICS_SCRIPT)
         if (new_height == last_height and
-                current_position >= new_height - 10):  # Допуск в 10px
+                current_position >= new_height - SCROLL_END_TOLERANCE):
             break
         last_height = new_height
         # Динамическое увеличение шага для длинных страниц
         if scroll_attempts > MIN_SCROLL_ATTEMPT and scroll_step < LARGE_PAGE_SCROLL_STEP:
             scroll_step = min(1000, scroll_step + 100)
     await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+
+
+async def fast_scroll_page_to_bottom(
+        page: Page,
+        quiet_period: int = 500,
+        max_wait: int = 3000,
+        max_scroll_attempts: int = 30,
+        time_budget: float | None = None,
+) -> None:
+    """Быстрая догрузка ленивого контента: мгновенный скролл в конец страницы
+    с ожиданием затишья DOM и сети вместо фиксированных задержек.
+
+    :param page: Текущая Playwright страница.
+    :param quiet_period: Время без изменений DOM и новых сетевых ресурсов в миллисекундах,
+    после которого страница считается догруженной.
+    :param max_wait: Максимальное ожидание затишья после одного скролла в миллисекундах.
+    :param max_scroll_attempts: Максимальное количество скроллов страницы.
+    :param time_budget: Максимальное время скроллинга в секундах.
+    """
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    last_height = None
+    for _ in range(max_scroll_attempts):
+        wait = max_wait
+        if deadline is not None:
+            remaining = int((deadline - time.monotonic()) * 1000)
+            if remaining <= 0:
+                logger.info("Scroll time budget exceeded for %s", page.url)
+                break
+            wait = min(max_wait, remaining)
+        height, position = await page.evaluate(JS_FAST_SCROLL_SCRIPT, [quiet_period, wait])
+        if height == last_height and position >= height - SCROLL_END_TOLERANCE:
+            break
+        last_height = height
+
+
+async def trigger_lazy_content(
+        page: Page, mode: ScrollMode = "fast", time_budget: float | None = None
+) -> None:
+    """Скроллит страницу до конца для загрузки ленивого контента.
+
+    :param page: Текущая Playwright страница.
+    :param mode: Режим скроллинга, 'fast' - мгновенный скролл с ожиданием затишья,
+    'thorough' - плавный скролл с фиксированными задержками.
+    :param time_budget: Максимальное время скроллинга в секундах.
+    """
+    if mode == "fast":
+        await fast_scroll_page_to_bottom(page, time_budget=time_budget)
+    else:
+        await scroll_page_to_bottom(page, time_budget=time_budget)
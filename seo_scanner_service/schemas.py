@@ -1,6 +1,7 @@
 from typing import Self
 
 from collections import Counter
+from datetime import datetime
 from enum import StrEnum
 from uuid import UUID, uuid4
 
@@ -58,11 +59,26 @@ class PageContent(BaseModel):
 
 
 class Page(_Entity):
-    """Результат SEO сканирования страницы"""
+    """Результат SEO сканирования страницы.
+
+    Attributes:
+        url: URL адрес страницы.
+        rendering_time: Время рендеринга страницы со всеми ресурсами в секундах, None - если
+        страница загружена с блокировкой ресурсов и не попала в выборку для измерения.
+        seo_logs: SEO замечания на странице.
+        content: Текстовый контент страницы.
+        content_hash: Хеш title, meta-описания и видимого текста HTML документа отданного
+        сервером, используется для поиска изменившихся страниц при инкрементальном сканировании.
+        last_modified: Дата последнего изменения страницы из sitemap.xml.
+        rule_timings: Время выполнения правил линтинга в секундах (не сериализуется).
+    """
     url: HttpUrl
-    rendering_time: NonNegativeFloat
+    rendering_time: NonNegativeFloat | None
     seo_logs: list[SEOLog]
     content: PageContent
+    content_hash: str | None = None
+    last_modified: datetime | None = None
+    rule_timings: dict[str, float] = Field(default_factory=dict, exclude=True)
 
 
 class LogLevelDistribution(BaseModel):
@@ -17,6 +17,13 @@ class AppSettings(BaseSettings):
 
 class EmbeddingsSettings(BaseSettings):
     base_url: str = "http://127.0.0.1:8000"
+    # Максимальное количество текстов в одном запросе и время ожидания текстов других страниц
+    batch_size: int = 64
+    batch_delay: float = 0.05
+    # Кэш векторов по хешу текста: LRU в памяти и float16 векторы на диске
+    cache_memory_mb: int = 64
+    cache_dir: Path | None = BASE_DIR / ".cache" / "embeddings"
+    cache_disk_mb: int = 512
 
     model_config = SettingsConfigDict(env_prefix="EMBEDDINGS_")
 
@@ -49,11 +56,61 @@ class PostgresSettings(BaseSettings):
         return f"postgresql+{self.driver}://{self.user}:{self.password}@{self.host}:{self.port}/{self.db}"
 
 
+class ScannerSettings(BaseSettings):
+    concurrency: int = 5
+    # Профиль сканирования: 'full' - все ресурсы, 'light' - без изображений, шрифтов и трекеров
+    scan_profile: Literal["full", "light"] = "full"
+    # Режим догрузки ленивого контента и бюджет времени скроллинга страницы в секундах
+    scroll_mode: Literal["fast", "thorough"] = "fast"
+    scroll_time_budget: float = 30
+    # Снимок страницы в браузере: 'html' - весь DOM, 'facts' - только факты для линтинга и текст
+    snapshot_mode: Literal["html", "facts"] = "html"
+    # Способ загрузки страниц: 'browser' - Chromium, 'http' - HTTP с переходом на Chromium для SPA
+    fetch_mode: Literal["browser", "http"] = "browser"
+    # Количество страниц, для которых рендеринг измеряется в браузере со всеми ресурсами
+    # в режиме 'http' и в профиле 'light' (остальные страницы 'light' остаются без измерения)
+    render_sample_size: int = 1
+    http_timeout: float = 15
+    http_max_connections: int = 20
+    # Парсер HTML для линтинга и извлечения текста: 'lxml' (libxml2) или 'html.parser' (Python).
+    # На некорректной разметке 'html.parser' может изменить текст страницы и проверки по нему
+    html_parser: Literal["lxml", "html.parser"] = "lxml"
+    # Загрузка sitemap
+    sitemap_per_host_limit: int = 4
+    max_sitemaps: int = 500
+    # Кэш разобранных sitemap для условных запросов при повторных сканированиях
+    sitemap_cache_enabled: bool = True
+    sitemap_cache_dir: Path = BASE_DIR / ".cache" / "sitemaps"
+    sitemap_cache_disk_mb: int = 256
+    # Пул браузеров воркера
+    pool_size: int = 5
+    max_pages_per_context: int = 20
+    context_memory_limit_mb: int = 512
+    # Количество процессов для анализа HTML снимков, 0 - анализ выполняется в event loop
+    analysis_workers: int = 2
+    # Правила линтинга (пустой список - все правила), отключённые правила
+    # и доля страниц, на которых выполняются дорогие правила
+    lint_rules: list[str] = []
+    disabled_lint_rules: list[str] = []
+    expensive_rules_sample_rate: float = 1
+    # Кэш результатов анализа по хешу контента: LRU в памяти и опциональный кэш на диске
+    analysis_cache_memory_mb: int = 64
+    analysis_cache_dir: Path | None = None
+    analysis_cache_disk_mb: int = 1024
+    # Максимальное расстояние Хэмминга между SimHash текстов страниц-почти дубликатов (из 64 бит)
+    near_duplicate_max_distance: int = 6
+    # Оценка релевантности meta-описания: 'tf-idf' - модель сайта, 'embeddings' - сервис векторов
+    relevance_method: Literal["tf-idf", "embeddings"] = "tf-idf"
+
+    model_config = SettingsConfigDict(env_prefix="SCANNER_")
+
+
 class Settings(BaseSettings):
     embeddings: EmbeddingsSettings = EmbeddingsSettings()
     rabbitmq: RabbitMQSettings = RabbitMQSettings()
     postgres: PostgresSettings = PostgresSettings()
     app: AppSettings = AppSettings()
+    scanner: ScannerSettings = ScannerSettings()
 
 
 settings: Final[Settings] = Settings()
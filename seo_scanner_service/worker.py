@@ -0,0 +1,48 @@
+"""Воркер сканирования сайтов, обрабатывает события из очереди 'start_scan'.
+
+Сканер (Playwright, пул процессов анализа, NLP) импортируется только воркером,
+API процесс использует брокер лишь для публикации событий.
+"""
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from faststream import FastStream
+
+from .broker import ScanCompletedEvent, StartScanEvent, broker
+from .database.base import create_tables
+from .database.quieries import persist_website, read_latest_website_by_url
+from .scanner import (
+    AnalysisExecutor,
+    BrowserPool,
+    create_analysis_cache,
+    scan_website_seo_optimization,
+)
+
+# Общий для всех сканирований пул браузеров воркера
+browser_pool = BrowserPool()
+# Пул процессов для анализа HTML снимков вне event loop
+analysis_executor = AnalysisExecutor(cache=create_analysis_cache())
+
+
+@asynccontextmanager
+async def lifespan() -> AsyncIterator[None]:
+    await create_tables()
+    async with browser_pool, analysis_executor:
+        yield
+
+
+faststream_app = FastStream(broker, lifespan=lifespan)
+
+
+@broker.subscriber("start_scan")
+@broker.publisher("scan_completed")
+async def handle_start_seo_scan(event: StartScanEvent) -> ScanCompletedEvent:
+    previous = await read_latest_website_by_url(str(event.url)) if event.incremental else None
+    website = await scan_website_seo_optimization(
+        event.url, pool=browser_pool, previous=previous, executor=analysis_executor
+    )
+    await persist_website(website)
+    return ScanCompletedEvent(
+        website_id=website.id, url=website.url, page_count=website.page_count
+    )
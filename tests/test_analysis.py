@@ -0,0 +1,54 @@
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from seo_scanner_service.exceptions import AnalysisError
+from seo_scanner_service.scanner.analysis import AnalysisExecutor
+from seo_scanner_service.scanner.cache import AnalysisCache
+
+
+def crash_once(marker: str, _: frozenset[str] | None) -> str:
+    # Первый вызов завершает процесс пула, как при нехватке памяти
+    path = Path(marker)
+    if not path.exists():
+        path.touch()
+        os._exit(1)
+    return "analyzed"
+
+
+def crash_always(_: str, __: frozenset[str] | None) -> str:
+    os._exit(1)
+
+
+def echo(payload: str, _: frozenset[str] | None) -> str:
+    return payload
+
+
+def test_analysis_is_retried_once_on_restarted_pool(tmp_path: Path) -> None:
+    async def run() -> tuple[str, bool]:
+        async with AnalysisExecutor(workers=1) as executor:
+            broken_executor = executor._executor
+            result = await executor._execute(crash_once, str(tmp_path / "marker"), None)
+            return result, executor._executor is not broken_executor
+
+    assert asyncio.run(run()) == ("analyzed", True)
+
+
+def test_analysis_fails_after_second_crash_and_pool_stays_usable() -> None:
+    async def run() -> str:
+        async with AnalysisExecutor(workers=1) as executor:
+            with pytest.raises(AnalysisError):
+                await executor._execute(crash_always, "", None)
+            return await executor._execute(echo, "next page", None)
+
+    assert asyncio.run(run()) == "next page"
+
+
+def test_cache_key_keeps_whitespace_of_payload() -> None:
+    html = "<html><body><pre>def f():\n    return 1</pre></body></html>"
+    collapsed = "<html><body><pre>def f(): return 1</pre></body></html>"
+    assert AnalysisCache.make_key(html, "lxml") != AnalysisCache.make_key(collapsed, "lxml")
+    assert AnalysisCache.make_key(html, "lxml") == AnalysisCache.make_key(html, "lxml")
+    assert AnalysisCache.make_key(html, "lxml") != AnalysisCache.make_key(html, "html.parser")
@@ -0,0 +1,190 @@
+import asyncio
+import functools
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+from pydantic import HttpUrl
+
+from seo_scanner_service.exceptions import EmbeddingError
+from seo_scanner_service.scanner import main, nlp
+from seo_scanner_service.scanner.cache import TieredCache
+from seo_scanner_service.scanner.embeddings import EmbeddingsClient
+from seo_scanner_service.scanner.linting import (
+    DESCRIPTION_RELEVANCE_RULE_ID,
+    DUPLICATES_RULE_ID,
+    SITE_LINT_RULES,
+    lint_description_relevance,
+)
+from seo_scanner_service.scanner.rules import RuleSelection, RuleTimingStats
+from seo_scanner_service.schemas import Page, PageContent, PageMeta
+
+
+class StubEmbeddingsServer(Embeddings):
+    """Заменяет сервис эмбеддингов: вектор текста - его длина и сумма кодов символов"""
+
+    def __init__(self, missing_vectors: int = 0, error: Exception | None = None) -> None:
+        self.missing_vectors = missing_vectors
+        self.error = error
+        self.requests: list[list[str]] = []
+        self.requested = asyncio.Event()
+        # Пока событие не установлено, сервис не отвечает
+        self.responding = asyncio.Event()
+        self.responding.set()
+
+    @staticmethod
+    def vectorize(text: str) -> list[float]:
+        return [float(len(text)), float(sum(map(ord, text)) % 1000)]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        raise NotImplementedError
+
+    def embed_query(self, text: str) -> list[float]:
+        raise NotImplementedError
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.requests.append(texts)
+        self.requested.set()
+        await self.responding.wait()
+        if self.error is not None:
+            raise self.error
+        return [self.vectorize(text) for text in texts[self.missing_vectors:]]
+
+
+def make_client(
+        server: StubEmbeddingsServer, batch_size: int = 8, cache: TieredCache | None = None
+) -> EmbeddingsClient:
+    return EmbeddingsClient(
+        server, cache=cache, batch_size=batch_size, batch_delay=0, namespace="stub"
+    )
+
+
+def assert_settled(client: EmbeddingsClient) -> None:
+    assert not client._futures
+    assert not client._queue
+    assert client._flush_task is None
+
+
+def test_concurrent_texts_are_batched_and_deduplicated() -> None:
+    server = StubEmbeddingsServer()
+    client = make_client(server, batch_size=3)
+
+    async def run() -> tuple[np.ndarray, np.ndarray]:
+        return await asyncio.gather(
+            client.embed(["один", "два"]), client.embed(["два", "три", "четыре"])
+        )
+
+    first, second = asyncio.run(run())
+    assert sorted(map(len, server.requests)) == [1, 3]
+    assert sorted(text for request in server.requests for text in request) == [
+        "два", "один", "три", "четыре"
+    ]
+    np.testing.assert_array_equal(first[1], second[0])
+    np.testing.assert_array_equal(second[2], StubEmbeddingsServer.vectorize("четыре"))
+    assert_settled(client)
+
+
+def test_short_response_fails_whole_batch() -> None:
+    server = StubEmbeddingsServer(missing_vectors=1)
+    client = make_client(server)
+
+    async def run() -> tuple[np.ndarray | BaseException, np.ndarray | BaseException]:
+        calls = asyncio.gather(
+            client.embed(["один"]), client.embed(["два", "три"]), return_exceptions=True
+        )
+        return await asyncio.wait_for(calls, timeout=1)
+
+    results = asyncio.run(run())
+    # Ни один вызов не получает вектор чужого текста
+    assert all(isinstance(result, EmbeddingError) for result in results)
+    assert_settled(client)
+
+
+def test_service_error_is_passed_to_callers() -> None:
+    server = StubEmbeddingsServer(error=ConnectionError("service is down"))
+    client = make_client(server)
+
+    async def run() -> np.ndarray:
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(client.embed(["один", "два"]), timeout=1)
+        assert_settled(client)
+        # Следующий запрос отправляется заново, ошибка не кэшируется
+        server.error = None
+        return await client.embed(["один"])
+
+    np.testing.assert_array_equal(asyncio.run(run())[0], StubEmbeddingsServer.vectorize("один"))
+    assert len(server.requests) == 2
+
+
+@pytest.mark.parametrize("batch_size", [1, 8])
+def test_cancelled_flush_fails_sent_and_queued_texts(batch_size: int) -> None:
+    server = StubEmbeddingsServer()
+    server.responding.clear()
+    client = make_client(server, batch_size=batch_size)
+
+    async def run() -> tuple[np.ndarray | BaseException, np.ndarray | BaseException]:
+        calls = asyncio.gather(
+            client.embed(["один"]), client.embed(["два", "три"]), return_exceptions=True
+        )
+        await server.requested.wait()
+        assert client._flush_task is not None
+        client._flush_task.cancel()
+        return await asyncio.wait_for(calls, timeout=1)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, EmbeddingError) for result in results)
+    # При пакете из одного текста остальные тексты ещё не были отправлены
+    assert len(server.requests) == 1
+    assert_settled(client)
+
+
+def test_cached_vectors_are_not_requested_again() -> None:
+    server = StubEmbeddingsServer()
+    client = make_client(server, cache=TieredCache(1, None, 0, ".f16"))
+
+    async def run() -> tuple[np.ndarray, np.ndarray]:
+        first = await client.embed(["один", "два"])
+        return first, await client.embed(["два", "один"])
+
+    first, second = asyncio.run(run())
+    assert len(server.requests) == 1
+    np.testing.assert_array_equal(first[::-1], second)
+
+
+def test_site_linting_skips_relevance_when_embeddings_fail(
+        monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    rule = next(rule for rule in SITE_LINT_RULES if rule.id == DESCRIPTION_RELEVANCE_RULE_ID)
+    monkeypatch.setitem(
+        SITE_LINT_RULES._rules,
+        DESCRIPTION_RELEVANCE_RULE_ID,
+        rule._replace(check=functools.partial(lint_description_relevance, method="embeddings")),
+    )
+    pages = [
+        Page(
+            url=HttpUrl(f"https://shop.example/{i}"),
+            rendering_time=0.5,
+            seo_logs=[],
+            content=PageContent(
+                meta=PageMeta(title="Каталог", description="Телефоны с доставкой"),
+                text="Смартфоны и аксессуары с доставкой по городу",
+            ),
+        )
+        for i in range(2)
+    ]
+    stats = RuleTimingStats()
+
+    async def run() -> None:
+        # Сервис возвращает меньше векторов, чем запрошено текстов
+        client = make_client(StubEmbeddingsServer(missing_vectors=1))
+        monkeypatch.setattr(nlp, "get_embeddings_client", lambda: client)
+        rules = RuleSelection(
+            rule_ids=frozenset({DESCRIPTION_RELEVANCE_RULE_ID, DUPLICATES_RULE_ID})
+        )
+        await main._lint_site(pages, set(), rules, stats)
+
+    asyncio.run(run())
+    # Правило релевантности пропущено, остальные правила сайта выполнены
+    assert list(stats.summary()) == [DUPLICATES_RULE_ID]
+    for page in pages:
+        assert [seo_log.element for seo_log in page.seo_logs] == ["title", "meta", "body"]
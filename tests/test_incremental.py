@@ -0,0 +1,98 @@
+import asyncio
+
+import httpx
+import pytest
+from pydantic import HttpUrl
+
+from seo_scanner_service.scanner import incremental
+from seo_scanner_service.scanner.analysis import compute_content_hash
+from seo_scanner_service.scanner.fetching import STABLE_HEADERS
+from seo_scanner_service.scanner.sitemaps import SitemapEntry
+from seo_scanner_service.scanner.tree import SiteTrie
+from seo_scanner_service.schemas import Page, PageContent, PageMeta, Website
+
+SITE_URL = HttpUrl("https://shop.example/")
+
+BROWSER_DOCUMENT = """<!doctype html>
+<html><head><title>Каталог</title>
+<meta name="csrf-token" content="a1b2c3">
+<meta content="Телефоны и ноутбуки" name="description">
+<script nonce="r4nd0m">window.__STATE__ = {"session": "xyz"}</script></head>
+<body><main class="content"><h1>Каталог</h1><p>Телефоны   и ноутбуки</p></main></body></html>
+"""
+PROBE_DOCUMENT = """<html><head><title>Каталог</title>
+<meta name="description" content="Телефоны и ноутбуки">
+<script nonce="0ther">window.__STATE__ = {"session": "abc"}</script></head>
+<body><main><h1>Каталог</h1>
+<p>Телефоны и ноутбуки</p></main></body></html>
+"""
+
+
+def test_content_hash_ignores_markup_and_scripts() -> None:
+    assert compute_content_hash(BROWSER_DOCUMENT) == compute_content_hash(PROBE_DOCUMENT)
+
+
+@pytest.mark.parametrize(
+    ("old", "new"),
+    [
+        ("<title>Каталог</title>", "<title>Каталог товаров</title>"),
+        ('content="Телефоны и ноутбуки"', 'content="Телефоны, ноутбуки и планшеты"'),
+        ("<p>Телефоны и ноутбуки</p>", "<p>Телефоны и планшеты</p>"),
+    ],
+)
+def test_content_hash_changes_with_content(old: str, new: str) -> None:
+    assert old in PROBE_DOCUMENT
+    changed_document = PROBE_DOCUMENT.replace(old, new)
+    assert compute_content_hash(changed_document) != compute_content_hash(PROBE_DOCUMENT)
+
+
+def build_trie(*urls: str) -> SiteTrie:
+    trie = SiteTrie(SITE_URL, "shop.example")
+    for url in urls:
+        trie.add_page(SitemapEntry(url=url))
+    return trie
+
+
+def make_page(url: str, content_hash: str) -> Page:
+    return Page(
+        url=HttpUrl(url),
+        rendering_time=0.5,
+        seo_logs=[],
+        content=PageContent(meta=PageMeta(title="Каталог", description=""), text="Каталог"),
+        content_hash=content_hash,
+    )
+
+
+def test_probe_reuses_unchanged_pages(monkeypatch: pytest.MonkeyPatch) -> None:
+    documents = {
+        "/catalog": PROBE_DOCUMENT,
+        "/blog": PROBE_DOCUMENT.replace("ноутбуки</p>", "планшеты</p>"),
+    }
+    requests: list[httpx.Request] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/html; charset=utf-8"},
+            stream=httpx.ByteStream(documents[request.url.path].encode()),
+        )
+
+    def create_http_client(headers: dict[str, str] | None = None) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(handle), headers=headers)
+
+    monkeypatch.setattr(incremental, "create_http_client", create_http_client)
+    urls = [HttpUrl("https://shop.example/catalog"), HttpUrl("https://shop.example/blog")]
+    previous_hash = compute_content_hash(BROWSER_DOCUMENT)
+    previous = Website.from_pages(
+        SITE_URL, [make_page(str(url), previous_hash) for url in urls]
+    )
+    reused = asyncio.run(incremental.reuse_unchanged_pages(
+        build_trie(*map(str, urls)), urls, previous
+    ))
+    assert list(reused) == ["https://shop.example/catalog"]
+    assert reused["https://shop.example/catalog"].id != previous.pages[0].id
+    assert len(requests) == len(urls)
+    for request in requests:
+        for name, value in STABLE_HEADERS.items():
+            assert request.headers[name] == value
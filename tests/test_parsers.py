@@ -0,0 +1,79 @@
+import pytest
+
+from seo_scanner_service.scanner.facts import PageFacts, collect_page_facts
+from seo_scanner_service.scanner.linting import LINT_RULES
+from seo_scanner_service.scanner.parsers import HtmlParser, extract_markdown_text, parse_html
+from seo_scanner_service.schemas import SEOLog
+
+PARSERS: tuple[HtmlParser, ...] = ("lxml", "html.parser")
+# Правила, которые работают только по фактам о странице и не используют её текст
+FACT_RULE_IDS = frozenset(rule.id for rule in LINT_RULES.select(costs=["cheap"]))
+
+WELL_FORMED_DOCUMENTS = [
+    """<!DOCTYPE html><html lang="ru"><head><meta charset="utf-8">
+    <title>  Купить   телефон в Тюмени  </title>
+    <meta name="description" content="Телефоны и аксессуары с доставкой по городу">
+    <script>var state = {"a": "<p>не текст</p>"};</script><style>h1 { color: red; }</style>
+    </head><body><header><nav><a href="/">Главная</a></nav></header>
+    <main><article><h1>Телефоны</h1><p>Каталог <b>смартфонов</b> и &laquo;аксессуаров&raquo;.</p>
+    <h2>Бренды</h2><ul><li>Apple</li><li>Samsung</li></ul>
+    <img src="/a.png" alt="Смартфон"><img src="/b.png">
+    <table><tbody><tr><th>Модель</th><td>Цена</td></tr></tbody></table></article></main>
+    <footer><p>Контакты</p></footer></body></html>""",
+    """<html><head><title>Блог</title></head><body>
+    <section><h3>Без h1</h3><h2>Потом h2</h2>
+    <p>Текст&nbsp;с&nbsp;неразрывными пробелами</p></section>
+    <svg><path d="M0 0"></path></svg><aside><p>Сбоку</p></aside></body></html>""",
+    "<html><head><title></title></head><body></body></html>",
+]
+# Незакрытые <p> и <li> и документ без <body> - браузер восстанавливает их так же как lxml
+MALFORMED_DOCUMENTS = [
+    (
+        (
+            "<html><head><title>Список</title></head><body>"
+            "<ul><li>один<li>два<li>три</ul><p>первый<p>второй</body></html>"
+        ),
+        (
+            "<html><head><title>Список</title></head><body>"
+            "<ul><li>один</li><li>два</li><li>три</li></ul><p>первый</p><p>второй</p></body></html>"
+        ),
+    ),
+    (
+        (
+            "<title>Без body</title><meta name=description content=Описание>"
+            "<h1>Заголовок</h1><p>Текст"
+        ),
+        (
+            "<html><head><title>Без body</title><meta name=description content=Описание></head>"
+            "<body><h1>Заголовок</h1><p>Текст</p></body></html>"
+        ),
+    ),
+]
+
+
+def analyze(html: str, parser: HtmlParser) -> tuple[PageFacts, str, list[SEOLog]]:
+    soup = parse_html(html, parser)
+    facts = collect_page_facts(soup)
+    text = extract_markdown_text(soup)
+    seo_logs, _ = LINT_RULES.run(facts, text, FACT_RULE_IDS)
+    return facts, text, seo_logs
+
+
+@pytest.mark.parametrize("html", WELL_FORMED_DOCUMENTS)
+def test_parsers_agree_on_well_formed_documents(html: str) -> None:
+    assert analyze(html, "lxml") == analyze(html, "html.parser")
+
+
+@pytest.mark.parametrize(("html", "browser_html"), MALFORMED_DOCUMENTS)
+def test_lxml_recovers_malformed_documents_like_browser(html: str, browser_html: str) -> None:
+    assert analyze(html, "lxml") == analyze(browser_html, "lxml")
+
+
+@pytest.mark.parametrize(("html", "browser_html"), MALFORMED_DOCUMENTS)
+def test_html_parser_differs_only_in_text(html: str, browser_html: str) -> None:
+    facts, text, seo_logs = analyze(html, "html.parser")
+    browser_facts, browser_text, browser_seo_logs = analyze(browser_html, "lxml")
+    assert text != browser_text
+    assert seo_logs == browser_seo_logs
+    # Отсутствующий <body> html.parser не добавляет
+    assert facts.model_copy(update={"has_body": True}) == browser_facts
@@ -0,0 +1,87 @@
+from typing import ClassVar
+
+from collections import Counter
+
+import nltk
+import pytest
+
+from seo_scanner_service.scanner import preprocessing
+from seo_scanner_service.scanner.preprocessing import (
+    NLTK_RESOURCES,
+    TextPreprocessor,
+    tokenize_text,
+)
+
+STOP_WORDS = ["и", "в", "на", "для", "это"]
+
+
+class CountingLemmatizer:
+    """Лемматизатор без данных NLTK, считающий вызовы для каждого токена"""
+
+    calls: ClassVar[Counter[str]] = Counter()
+
+    def lemmatize(self, word: str) -> str:
+        self.calls[word] += 1
+        return word.removesuffix("ы")
+
+
+@pytest.fixture
+def lemmatizer(monkeypatch: pytest.MonkeyPatch) -> type[CountingLemmatizer]:
+    CountingLemmatizer.calls = Counter()
+    monkeypatch.setattr(preprocessing, "ensure_nltk_data", lambda _: None)
+    monkeypatch.setattr(preprocessing, "WordNetLemmatizer", CountingLemmatizer)
+    return CountingLemmatizer
+
+
+def test_tokenize_text_keeps_only_letters() -> None:
+    assert tokenize_text("Ёлки-палки, 2024 года: SEO & web3!") == [
+        "ёлки", "палки", "года", "seo", "web"
+    ]
+
+
+def test_preprocess_drops_stop_words_and_short_tokens(
+        lemmatizer: type[CountingLemmatizer],
+) -> None:
+    preprocessor = TextPreprocessor(stop_words=STOP_WORDS)
+    assert preprocessor.preprocess("Это телефоны и планшеты в Тюмени, до 5 шт") == (
+        "телефон планшет тюмени"
+    )
+    assert set(lemmatizer.calls) == {"телефоны", "планшеты", "тюмени"}
+
+
+def test_batch_lemmatizes_each_token_once(lemmatizer: type[CountingLemmatizer]) -> None:
+    preprocessor = TextPreprocessor(stop_words=STOP_WORDS)
+    texts = ["Телефоны и планшеты", "Планшеты для дома", "Телефоны, телефоны!"]
+    assert preprocessor.preprocess_batch(texts) == [
+        "телефон планшет", "планшет дома", "телефон телефон"
+    ]
+    # Словарь страниц сайта пересекается, повторные токены берутся из кэша лемм
+    assert set(lemmatizer.calls.values()) == {1}
+    assert preprocessor.token_count == 8
+    assert preprocessor.tokens_per_second > 0
+
+
+def test_lemma_cache_is_bounded(lemmatizer: type[CountingLemmatizer]) -> None:
+    preprocessor = TextPreprocessor(stop_words=(), lemma_cache_size=2)
+    preprocessor.preprocess("один два три один")
+    # 'один' вытеснен из кэша токенами 'два' и 'три' и лемматизируется повторно
+    assert lemmatizer.calls["один"] == 2
+    preprocessor.preprocess("три три три")
+    assert lemmatizer.calls["три"] == 1
+
+
+@pytest.mark.usefixtures("lemmatizer")
+def test_batch_matches_single_texts() -> None:
+    texts = ["Купить смартфоны в Тюмени", "", "Смартфоны и аксессуары для смартфонов"]
+    batch = TextPreprocessor(stop_words=STOP_WORDS).preprocess_batch(texts)
+    preprocessor = TextPreprocessor(stop_words=STOP_WORDS)
+    assert batch == [preprocessor.preprocess(text) for text in texts]
+
+
+def test_wordnet_lemmatization() -> None:
+    try:
+        nltk.data.find(NLTK_RESOURCES["wordnet"])
+    except LookupError:
+        pytest.skip("NLTK data 'wordnet' is not provisioned")
+    preprocessor = TextPreprocessor(stop_words=())
+    assert preprocessor.preprocess("cars and geese") == "car and goose"
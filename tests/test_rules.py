@@ -0,0 +1,150 @@
+import asyncio
+from collections.abc import Iterable
+
+import pytest
+from pydantic import HttpUrl
+
+from seo_scanner_service.scanner import main, nlp
+from seo_scanner_service.scanner.analysis import AnalysisExecutor
+from seo_scanner_service.scanner.duplicates import DUPLICATES_CATEGORY, lint_duplicates
+from seo_scanner_service.scanner.linting import (
+    DESCRIPTION_RELEVANCE_RULE_ID,
+    DUPLICATES_RULE_ID,
+    LINT_RULES,
+    SITE_LINT_RULES,
+    lint_description_relevance,
+)
+from seo_scanner_service.scanner.rules import RuleSelection, RuleTimingStats
+from seo_scanner_service.schemas import LogLevel, Page, PageContent, PageMeta, SEOLog
+
+RELEVANCE_PAGES = [
+    ("Купить смартфон с доставкой", "Смартфоны и телефоны с доставкой по городу"),
+    ("Семена и рассада для сада", "Семена овощей, рассада томатов и удобрения для огорода"),
+    ("Ремонт ноутбуков", "Замена экрана и батареи ноутбука, ремонт клавиатуры"),
+    ("Доставка цветов", "Букеты роз и тюльпанов с доставкой в день заказа"),
+]
+
+
+def make_page(
+        path: str,
+        title: str,
+        seo_logs: list[SEOLog] | None = None,
+        description: str = "",
+        text: str = "",
+) -> Page:
+    return Page(
+        url=HttpUrl(f"https://shop.example/{path}"),
+        rendering_time=0.5,
+        seo_logs=seo_logs or [],
+        content=PageContent(meta=PageMeta(title=title, description=description), text=text),
+    )
+
+
+def test_site_rules_are_not_page_rules() -> None:
+    site_rule_ids = {rule.id for rule in SITE_LINT_RULES}
+    assert {DESCRIPTION_RELEVANCE_RULE_ID, DUPLICATES_RULE_ID} <= site_rule_ids
+    assert not site_rule_ids & {rule.id for rule in LINT_RULES}
+
+
+def test_selection_gates_site_rules() -> None:
+    all_rules = RuleSelection()
+    assert DUPLICATES_RULE_ID in all_rules.resolve(SITE_LINT_RULES)
+    assert DESCRIPTION_RELEVANCE_RULE_ID in all_rules.resolve(SITE_LINT_RULES)
+    # Выбор только постраничных правил отключает правила сайта
+    assert not RuleSelection(rule_ids=frozenset({"title"})).resolve(SITE_LINT_RULES)
+    disabled = RuleSelection(disabled_rule_ids=frozenset({DUPLICATES_RULE_ID}))
+    assert DUPLICATES_RULE_ID not in disabled.resolve(SITE_LINT_RULES)
+    # Дешёвые правила сайта выполняются на всех страницах, дорогие - на выборке
+    sampled = RuleSelection(expensive_sample_rate=0.5)
+    resolved = [sampled.resolve(SITE_LINT_RULES, i) for i in range(4)]
+    assert all(DUPLICATES_RULE_ID in page_rules for page_rules in resolved)
+    assert [DESCRIPTION_RELEVANCE_RULE_ID in page_rules for page_rules in resolved] == [
+        True, False, True, False
+    ]
+
+
+def test_lint_duplicates_updates_only_selected_pages() -> None:
+    stale_log = SEOLog(
+        level=LogLevel.ERROR, message="Устаревшее", category=DUPLICATES_CATEGORY, element="title"
+    )
+    pages = [
+        make_page("a", "Каталог", [stale_log]),
+        make_page("b", "Каталог"),
+        make_page("c", "Блог", [stale_log]),
+    ]
+    lint_duplicates(pages, [1, 2])
+    assert pages[0].seo_logs == [stale_log]
+    assert [seo_log.element for seo_log in pages[1].seo_logs] == ["title"]
+    assert "https://shop.example/a" in pages[1].seo_logs[0].message
+    assert pages[2].seo_logs == []
+
+
+def test_site_rules_run_in_analysis_process_pool() -> None:
+    stale_log = SEOLog(
+        level=LogLevel.ERROR, message="Устаревшее", category=DUPLICATES_CATEGORY, element="title"
+    )
+    pages = [
+        make_page("a", "Каталог", [stale_log]),
+        make_page("b", "Каталог"),
+        make_page("c", "Блог", [stale_log]),
+    ]
+    rules = RuleSelection(rule_ids=frozenset({DUPLICATES_RULE_ID}))
+
+    async def run() -> None:
+        async with AnalysisExecutor(workers=1) as executor:
+            await main._lint_site(pages, set(), rules, RuleTimingStats(), executor)
+
+    asyncio.run(run())
+    # Замечания найдены в процессе пула и применены к страницам в event loop
+    assert [[seo_log.element for seo_log in page.seo_logs] for page in pages] == [
+        ["title"], ["title"], []
+    ]
+    assert "https://shop.example/b" in pages[0].seo_logs[0].message
+
+
+def test_rule_timing_stats_counts_site_rules() -> None:
+    stats = RuleTimingStats()
+    stats.record({"title": 0.01})
+    stats.record({"title": 0.03, DUPLICATES_RULE_ID: 0.5})
+    summary = stats.summary()
+    assert list(summary) == [DUPLICATES_RULE_ID, "title"]
+    assert summary["title"]["calls"] == 2
+    assert summary[DUPLICATES_RULE_ID]["mean"] == pytest.approx(0.5)
+
+
+def test_description_relevance_scores_only_selected_pages(
+        monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    scored_pairs: list[tuple[str, str]] = []
+    fitted_texts: list[str] = []
+
+    def compare_texts_batch(
+            pairs: list[tuple[str, str]], fit_texts: Iterable[str] = ()
+    ) -> list[float]:
+        scored_pairs.extend(pairs)
+        fitted_texts.extend(fit_texts)
+        return [0.9] * len(pairs)
+
+    monkeypatch.setattr(nlp, "compare_texts_batch", compare_texts_batch)
+    pages = [
+        make_page(str(i), "Страница", description=description, text=text)
+        for i, (description, text) in enumerate(RELEVANCE_PAGES)
+    ]
+    asyncio.run(
+        lint_description_relevance(pages, [1, 3], AnalysisExecutor(workers=0), method="tf-idf")
+    )
+    # Оцениваются только выбранные страницы, остальные лишь обучают модель
+    assert scored_pairs == [RELEVANCE_PAGES[1], RELEVANCE_PAGES[3]]
+    assert fitted_texts == [*RELEVANCE_PAGES[0], *RELEVANCE_PAGES[2]]
+    assert [len(page.seo_logs) for page in pages] == [0, 1, 0, 1]
+
+
+def test_fit_texts_give_the_same_scores_as_the_full_batch(
+        monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # Стоп-слова NLTK не нужны для сравнения двух способов обучения модели
+    monkeypatch.setattr(nlp, "get_stopwords", list)
+    full_scores = nlp.compare_texts_batch(RELEVANCE_PAGES)
+    fit_texts = [text for pair in (RELEVANCE_PAGES[0], *RELEVANCE_PAGES[2:]) for text in pair]
+    scores = nlp.compare_texts_batch([RELEVANCE_PAGES[1]], fit_texts=fit_texts)
+    assert scores == pytest.approx([full_scores[1]])
@@ -0,0 +1,83 @@
+import asyncio
+from datetime import UTC, datetime
+from pathlib import Path
+
+import httpx
+
+from seo_scanner_service.scanner.sitemaps import (
+    CachedSitemap,
+    SitemapCache,
+    SitemapEntry,
+    _parse_last_modified,
+    iter_sitemap_entries,
+)
+
+SITEMAP_NAMESPACE = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+SITEMAPS = {
+    "/sitemap.xml": f"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex {SITEMAP_NAMESPACE}>
+    <sitemap><loc>http://[::1/broken.xml</loc></sitemap>
+    <sitemap><loc>https://shop.example:port/broken.xml</loc></sitemap>
+    <sitemap><loc>/sitemaps/pages.xml</loc></sitemap>
+</sitemapindex>""",
+    "/sitemaps/pages.xml": f"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset {SITEMAP_NAMESPACE}>
+    <url><loc>https://shop.example/catalog</loc><lastmod>2026-01-02T03:00:00+03:00</lastmod></url>
+    <url><loc>blog</loc><priority>0.8</priority></url>
+    <url><loc>https://[shop.example/broken</loc></url>
+</urlset>""",
+}
+
+
+def handle(request: httpx.Request) -> httpx.Response:
+    document = SITEMAPS.get(request.url.path)
+    if document is None:
+        return httpx.Response(404)
+    return httpx.Response(200, stream=httpx.ByteStream(document.encode()))
+
+
+async def collect_entries() -> list[SitemapEntry]:
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handle)) as client:
+        return [
+            entry async for entry in
+            iter_sitemap_entries(client, ["https://shop.example/sitemap.xml"])
+        ]
+
+
+def test_invalid_loc_is_skipped_and_relative_locs_are_resolved() -> None:
+    assert asyncio.run(collect_entries()) == [
+        SitemapEntry(
+            url="https://shop.example/catalog",
+            last_modified=datetime(2026, 1, 2, tzinfo=UTC),
+        ),
+        SitemapEntry(url="https://shop.example/sitemaps/blog", priority=0.8),
+    ]
+
+
+def test_last_modified_is_utc() -> None:
+    assert _parse_last_modified("2026-01-02") == datetime(2026, 1, 2, tzinfo=UTC)
+    assert _parse_last_modified("2026-01-02T05:30:00+05:30") == datetime(2026, 1, 2, tzinfo=UTC)
+    assert _parse_last_modified("not a date") is None
+
+
+def test_sitemap_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = SitemapCache(tmp_path)
+    sitemaps = [
+        CachedSitemap(
+            url=f"https://shop.example/sitemap-{i}.xml",
+            entries=[SitemapEntry(url=f"https://shop.example/{i}/{j}") for j in range(50)],
+        )
+        for i in range(3)
+    ]
+
+    async def run() -> list[CachedSitemap | None]:
+        await cache.put(sitemaps[0])
+        # Лимит вмещает две записи
+        cache._disk.max_bytes = cache._disk.size * 5 // 2
+        await cache.put(sitemaps[1])
+        assert await cache.get(sitemaps[0].url) == sitemaps[0]
+        await cache.put(sitemaps[2])
+        return [await cache.get(sitemap.url) for sitemap in sitemaps]
+
+    assert asyncio.run(run()) == [sitemaps[0], None, sitemaps[2]]
+    assert len(list(tmp_path.iterdir())) == 2
@@ -0,0 +1,113 @@
+import asyncio
+import random
+
+import pytest
+from pydantic import HttpUrl
+
+from seo_scanner_service.scanner import main, topics
+from seo_scanner_service.scanner.linting import DUPLICATES_RULE_ID, TOPICS_RULE_ID
+from seo_scanner_service.scanner.preprocessing import tokenize_text
+from seo_scanner_service.scanner.rules import RuleSelection, RuleTimingStats
+from seo_scanner_service.schemas import LogLevel, Page, PageContent, PageMeta, SEOLog
+
+PHONE_WORDS = [
+    "смартфон", "телефон", "экран", "камера", "батарея", "процессор", "память", "зарядка",
+    "корпус", "модель", "дисплей", "аккумулятор", "гарнитура", "чехол", "сенсор",
+]
+GARDEN_WORDS = [
+    "сад", "огород", "семена", "рассада", "полив", "удобрение", "грядка", "теплица", "урожай",
+    "томат", "огурец", "почва", "лопата", "компост", "клубника",
+]
+
+
+@pytest.fixture(autouse=True)
+def simple_preprocessing(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Кластеризация проверяется без лемматизации, которой нужны данные NLTK
+    monkeypatch.setattr(
+        topics, "preprocess_texts", lambda texts: [" ".join(tokenize_text(text)) for text in texts]
+    )
+
+
+def make_text(words: list[str], seed: int, length: int = 60) -> str:
+    return " ".join(random.Random(seed).choices(words, k=length))
+
+
+def make_page(path: str, text: str, seo_logs: list[SEOLog] | None = None) -> Page:
+    return Page(
+        url=HttpUrl(f"https://shop.example/{path}"),
+        rendering_time=0.5,
+        seo_logs=seo_logs or [],
+        content=PageContent(meta=PageMeta(title=path, description=""), text=text),
+    )
+
+
+def test_topics_do_not_mix_subjects() -> None:
+    texts = [make_text(PHONE_WORDS, seed) for seed in range(5)]
+    texts += [make_text(GARDEN_WORDS, seed) for seed in range(5)]
+    found_topics = topics.cluster_topics(texts)
+    assert found_topics
+    for topic in found_topics:
+        assert len({i < 5 for i in topic.page_indexes}) == 1
+        assert all(-1 <= similarity <= 1 + 1e-6 for similarity in topic.similarities)
+
+
+@pytest.mark.parametrize("vocabulary", [["телефон"], ["телефон", "смартфон"]])
+def test_low_vocabulary_site_is_not_clustered(vocabulary: list[str]) -> None:
+    texts = [make_text(vocabulary, seed) for seed in range(6)]
+    processed_texts = topics.preprocess_texts(texts)
+    assert topics.vectorize_topics(processed_texts) is None
+    assert topics.cluster_topics(texts) == []
+
+
+def test_too_few_pages_are_not_clustered() -> None:
+    assert topics.cluster_topics([make_text(PHONE_WORDS, 0), make_text(GARDEN_WORDS, 0)]) == []
+
+
+def test_vectors_are_normalized() -> None:
+    texts = [make_text(PHONE_WORDS + GARDEN_WORDS, seed) for seed in range(8)]
+    vectors = topics.vectorize_topics(topics.preprocess_texts(texts))
+    assert vectors is not None
+    assert vectors.shape[0] == len(texts)
+    assert vectors.shape[1] <= len(texts) - 1
+    assert (abs((vectors ** 2).sum(axis=1) - 1) < 1e-5).all()
+
+
+def test_lint_topics_reports_thin_and_competing_pages() -> None:
+    stale_log = SEOLog(
+        level=LogLevel.WARNING,
+        message="Устаревшее",
+        category=topics.TOPICS_CATEGORY,
+        element="body",
+    )
+    # Страницы одной темы почти одинаковы и содержат меньше THIN_TOPIC_WORDS слов
+    pages = [make_page(f"phone-{i}", make_text(PHONE_WORDS, 0), [stale_log]) for i in range(3)]
+    pages += [make_page(f"garden-{i}", make_text(GARDEN_WORDS, i)) for i in range(3)]
+    topics.lint_topics(pages, [1, 2, 3, 4, 5])
+    assert pages[0].seo_logs == [stale_log]
+    for page in pages[1:3]:
+        messages = [seo_log.message for seo_log in page.seo_logs]
+        assert stale_log.message not in messages
+        assert any(message.startswith("Тема страниц слабо раскрыта") for message in messages)
+        assert any(message.startswith("Страница конкурирует") for message in messages)
+    assert all(
+        seo_log.category == topics.TOPICS_CATEGORY
+        for page in pages[1:] for seo_log in page.seo_logs
+    )
+
+
+def test_site_rules_are_gated_and_timed() -> None:
+    pages = [make_page(f"phone-{i}", make_text(PHONE_WORDS, 0)) for i in range(3)]
+    pages += [make_page(f"garden-{i}", make_text(GARDEN_WORDS, i)) for i in range(3)]
+    stats = RuleTimingStats()
+    rules = RuleSelection(rule_ids=frozenset({DUPLICATES_RULE_ID}))
+    asyncio.run(main._lint_site(pages, set(), rules, stats))
+    assert set(stats.calls) == {DUPLICATES_RULE_ID}
+    assert all(
+        seo_log.category != topics.TOPICS_CATEGORY for page in pages for seo_log in page.seo_logs
+    )
+    # Переиспользованная страница обновляется правилами, зависящими от остальных страниц
+    stats = RuleTimingStats()
+    rules = RuleSelection(rule_ids=frozenset({DUPLICATES_RULE_ID, TOPICS_RULE_ID}))
+    asyncio.run(main._lint_site(pages, {0}, rules, stats))
+    assert set(stats.calls) == {DUPLICATES_RULE_ID, TOPICS_RULE_ID}
+    assert any(seo_log.category == topics.TOPICS_CATEGORY for seo_log in pages[0].seo_logs)
@@ -0,0 +1,123 @@
+import random
+from datetime import UTC, datetime
+
+import pytest
+from pydantic import HttpUrl
+
+from seo_scanner_service.scanner.sitemaps import SitemapEntry
+from seo_scanner_service.scanner.tree import (
+    PRIORITY_KEYWORDS,
+    SiteTrie,
+    TreeNode,
+    extract_key_pages,
+)
+
+SITE_URL = HttpUrl("https://shop.example/")
+
+
+def build_trie(entries: list[SitemapEntry]) -> SiteTrie:
+    trie = SiteTrie(SITE_URL, "shop.example")
+    for entry in entries:
+        trie.add_page(entry)
+    return trie
+
+
+def build_tree(entries: list[SitemapEntry]) -> TreeNode:
+    return build_trie(entries).to_tree_node()
+
+
+def test_trie_shares_path_prefixes() -> None:
+    trie = SiteTrie(SITE_URL, "shop.example")
+    for path in ("catalog/a", "catalog/b", "blog/post", "catalog/a"):
+        trie.add_page(SitemapEntry(url=f"https://shop.example/{path}"))
+    # Корень, catalog, a, b, blog, post
+    assert len(trie) == 6
+
+
+def test_tree_node_keeps_parents_and_url_index() -> None:
+    tree = build_tree([
+        SitemapEntry(url="https://shop.example/catalog/phones/iphone", priority=0.8),
+        SitemapEntry(url="https://shop.example/catalog/laptops"),
+    ])
+    node = tree.find_node("https://shop.example/catalog/phones/iphone/")
+    assert node is not None
+    assert node.priority == pytest.approx(0.8)
+    assert [ancestor.name for ancestor in node.iter_ancestors()] == [
+        "phones", "catalog", "shop.example"
+    ]
+    assert node.root is tree
+    assert node.get_section() is tree.find_node("https://shop.example/catalog")
+    phones = tree.find_node("https://shop.example/catalog/phones")
+    assert phones is not None
+    assert phones.find_node("https://shop.example/catalog/laptops") is None
+
+
+def test_trie_finds_nodes_by_url() -> None:
+    last_modified = datetime(2026, 1, 1, tzinfo=UTC)
+    trie = build_trie([
+        SitemapEntry(url="https://shop.example/catalog/phones", last_modified=last_modified),
+    ])
+    assert trie.find("https://shop.example/") is trie.root
+    node = trie.find(HttpUrl("https://shop.example/catalog/phones/"))
+    assert node is not None
+    assert node.last_modified == last_modified
+    assert trie.find("https://shop.example/catalog/laptops") is None
+    assert trie.find("https://other.example/catalog/phones") is None
+
+
+def test_deep_tree_is_traversed_without_recursion() -> None:
+    # Глубина больше лимита рекурсии, URL узлов короткие, чтобы не превысить длину URL
+    depth = 3000
+    leaf = tree = TreeNode(name=str(depth), url=HttpUrl(f"https://shop.example/{depth}"))
+    for i in reversed(range(1, depth)):
+        tree = TreeNode(name=str(i), url=HttpUrl(f"https://shop.example/{i}"), children=[tree])
+    tree = TreeNode(name="shop.example", url=SITE_URL, children=[tree])
+    assert tree.max_depth() == depth
+    assert tree.count_nodes() == depth + 1
+    assert list(tree.iter_leaves()) == [leaf]
+    assert tree.find_node(leaf.url) is leaf
+    assert leaf.root is tree
+
+
+def test_key_pages_prefer_priority_sections() -> None:
+    trie = build_trie([
+        SitemapEntry(url="https://shop.example/catalog/phones", priority=0.9),
+        SitemapEntry(url="https://shop.example/catalog/laptops", priority=0.3),
+        SitemapEntry(url="https://shop.example/blog/first-post"),
+        SitemapEntry(
+            url="https://shop.example/news/latest",
+            last_modified=datetime(2026, 1, 1, tzinfo=UTC),
+        ),
+        SitemapEntry(url="https://shop.example/misc/page"),
+    ])
+    key_pages = [str(url) for url in extract_key_pages(trie, list(PRIORITY_KEYWORDS), 4)]
+    assert key_pages == [
+        "https://shop.example/",
+        # Недостающие узлы пути получают дату изменения добавленной страницы
+        "https://shop.example/news",
+        "https://shop.example/catalog",
+        "https://shop.example/catalog/phones",
+    ]
+
+
+def test_top_leaves_match_full_sort() -> None:
+    rng = random.Random(42)
+    entries = [
+        SitemapEntry(
+            url=f"https://shop.example/s{rng.randrange(20)}/p{i}",
+            priority=rng.choice([None, 0.1, 0.5, 0.9]),
+        )
+        for i in range(2000)
+    ]
+    trie = build_trie(entries)
+    tree = trie.to_tree_node()
+    max_result = 15
+    # Эталон: полная сортировка листьев по приоритету и порядку обхода,
+    # все листья на одной глубине и без дат изменения
+    leaves = sorted(
+        (-(0.5 if node.priority is None else node.priority), order, str(node.url))
+        for order, node in enumerate(tree.iter_nodes())
+        if node.is_leaf
+    )
+    expected = [tree.url, *(HttpUrl(url) for _, _, url in leaves[:max_result - 1])]
+    assert extract_key_pages(trie, [], max_result) == expected
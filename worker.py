@@ -0,0 +1,8 @@
+import asyncio
+import logging
+
+from seo_scanner_service.worker import faststream_app
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(faststream_app.run())